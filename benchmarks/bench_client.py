@@ -0,0 +1,238 @@
+"""
+Overhead of the client wrapper itself: every method of OpenViduClient and AsyncOpenViduClient against httpx.MockTransport.
+
+The transport answers from canned bytes, so the timings are URL building, header handling, client
+construction, JSON encoding and decoding, retry bookkeeping and error dispatch.
+
+Run: python benchmarks/bench_client.py [--number 2000] [--output results.json] [--compare baseline.json]
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import platform
+import sys
+import time
+from argparse import ArgumentParser
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+
+import openviduconnect
+from openviduconnect import AsyncOpenViduClient, OpenViduClient
+from openviduconnect.client.endpoints import ENDPOINTS
+
+HOST = "https://openvidu.bench"
+SECRET = "MY_SECRET"
+
+SESSION = {
+    "id": "ses_1", "object": "session", "createdAt": 1620000000000, "mediaMode": "ROUTED",
+    "recordingMode": "MANUAL", "defaultRecordingProperties": {"name": "", "outputMode": "COMPOSED"},
+    "customSessionId": "", "connections": {"numberOfElements": 0, "content": []}, "recording": False,
+    "forcedVideoCodec": "VP8", "allowTranscoding": False,
+}
+CONNECTION = {
+    "id": "con_1", "object": "connection", "type": "WEBRTC", "status": "pending", "sessionId": "ses_1",
+    "createdAt": 1620000000000, "activeAt": None, "location": None, "ip": None, "platform": None,
+    "token": "wss://openvidu.bench?sessionId=ses_1&token=tok_1", "serverData": "", "clientData": None,
+    "record": True, "role": "PUBLISHER", "kurentoOptions": None, "rtspUri": None, "adaptativeBitrate": None,
+    "onlyPlayWithSubscribers": None, "networkCache": None, "publishers": [], "subscribers": [],
+}
+RECORDING = {
+    "id": "ses_1", "object": "recording", "name": "ses_1", "outputMode": "COMPOSED", "hasAudio": True,
+    "hasVideo": True, "recordingLayout": "BEST_FIT", "customLayout": "", "resolution": "1280x720",
+    "frameRate": 25, "sessionId": "ses_1", "createdAt": 1620000000000, "size": 0, "duration": 0,
+    "url": None, "status": "started",
+}
+SAMPLES = {"Session": SESSION, "Connection": CONNECTION, "Recording": RECORDING}
+
+# Arguments of one call of every endpoint
+CALLS: Dict[str, Tuple[tuple, dict]] = {
+    "create_session": ((), {"mediaMode": "ROUTED", "recordingMode": "MANUAL"}),
+    "get_session": (("ses_1",), {}),
+    "get_sessions": ((), {}),
+    "delete_session": (("ses_1",), {}),
+    "create_connection": (("ses_1",), {"type": "WEBRTC", "role": "PUBLISHER", "data": "user"}),
+    "get_connection": (("ses_1", "con_1"), {}),
+    "get_connections": (("ses_1",), {}),
+    "update_connection": (("ses_1", "con_1"), {"role": "SUBSCRIBER"}),
+    "delete_connection": (("ses_1", "con_1"), {}),
+    "start_recording": ((), {"session": "ses_1", "outputMode": "COMPOSED"}),
+    "stop_recording": (("ses_1",), {}),
+    "get_recording": (("ses_1",), {}),
+    "get_recordings": ((), {}),
+    "delete_recording": (("ses_1",), {}),
+}
+
+
+def canned_responses() -> Dict[Tuple[str, str], Tuple[int, bytes]]:
+    """(method, path) to (status, body) of every endpoint, encoded once."""
+
+    urls = OpenViduClient(HOST, SECRET)._urls
+    responses = {}
+    for endpoint in ENDPOINTS:
+        args, _ = CALLS[endpoint.name]
+        path = httpx.URL(urls[endpoint.name].format(*args)).path
+        if endpoint.model is None:
+            responses[endpoint.method, path] = (204, b"")
+            continue
+        sample = SAMPLES[endpoint.model.__name__]
+        data = {"numberOfElements": 1, "content": [sample]} if endpoint.page else sample
+        responses[endpoint.method, path] = (200, json.dumps(data).encode())
+    return responses
+
+
+def mock_transport(async_: bool) -> httpx.MockTransport:
+    """MockTransport answering every endpoint from the canned responses."""
+
+    responses = canned_responses()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status, body = responses[request.method, request.url.path]
+        return httpx.Response(status, content=body)
+
+    async def async_handler(request: httpx.Request) -> httpx.Response:
+        return handler(request)
+
+    return httpx.MockTransport(async_handler if async_ else handler)
+
+
+def summarize(durations: List[int]) -> Dict[str, float]:
+    """ops/sec and latency percentiles in microseconds of per-call durations in nanoseconds."""
+
+    durations.sort()
+    total = sum(durations)
+    count = len(durations)
+    return {
+        "ops_per_sec": count / (total / 1e9) if total else 0.0,
+        "p50_us": durations[count // 2] / 1e3,
+        "p99_us": durations[min(count - 1, int(count * 0.99))] / 1e3,
+        "mean_us": total / count / 1e3,
+    }
+
+
+def time_sync(call: Callable[[], Any], number: int) -> Dict[str, float]:
+    """."""
+
+    for _ in range(min(number, 50)):
+        call()
+    durations = []
+    clock = time.perf_counter_ns
+    for _ in range(number):
+        start = clock()
+        call()
+        durations.append(clock() - start)
+    return summarize(durations)
+
+
+async def time_async(call: Callable[[], Any], number: int) -> Dict[str, float]:
+    """."""
+
+    for _ in range(min(number, 50)):
+        await call()
+    durations = []
+    clock = time.perf_counter_ns
+    for _ in range(number):
+        start = clock()
+        await call()
+        durations.append(clock() - start)
+    return summarize(durations)
+
+
+def run(number: int, models: bool) -> Dict[str, Dict[str, float]]:
+    """Time every scenario."""
+
+    results = {}
+    sync_transport = mock_transport(async_=False)
+    async_transport = mock_transport(async_=True)
+
+    client = OpenViduClient(HOST, SECRET, transport=sync_transport, models=models)
+    for name, (args, kwargs) in CALLS.items():
+        method = getattr(client, name)
+        results["sync.%s" % (name,)] = time_sync(lambda: method(*args, **kwargs), number)
+    client.close()
+
+    def per_call_client() -> Any:
+        with OpenViduClient(HOST, SECRET, transport=sync_transport, models=models) as fresh:
+            return fresh.get_session("ses_1")
+
+    results["sync.get_session[per-call client]"] = time_sync(per_call_client, number)
+
+    async def run_async() -> None:
+        async with AsyncOpenViduClient(HOST, SECRET, transport=async_transport, models=models) as aclient:
+            for name, (args, kwargs) in CALLS.items():
+                method = getattr(aclient, name)
+                results["async.%s" % (name,)] = await time_async(lambda: method(*args, **kwargs), number)
+
+        async def per_call_async_client() -> Any:
+            async with AsyncOpenViduClient(HOST, SECRET, transport=async_transport, models=models) as fresh:
+                return await fresh.get_session("ses_1")
+
+        results["async.get_session[per-call client]"] = await time_async(per_call_async_client, number)
+
+    asyncio.run(run_async())
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> int:
+    """Print the change against a baseline, return the number of scenarios slower than `threshold` percent."""
+
+    regressions = 0
+    print("\n%-42s %12s %12s" % ("scenario vs baseline", "ops/sec %", "p99 %"))
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ops = (result["ops_per_sec"] / base["ops_per_sec"] - 1) * 100
+        p99 = (result["p99_us"] / base["p99_us"] - 1) * 100
+        flag = ""
+        if ops < -threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print("%-42s %+12.1f %+12.1f%s" % (name, ops, p99, flag))
+    return regressions
+
+
+def main() -> None:
+    """."""
+
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="Calls per scenario")
+    parser.add_argument("--models", action="store_true", help="Return models instead of dicts")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON written by --output")
+    parser.add_argument("--threshold", type=float, default=10.0, help="ops/sec drop in percent flagged as regression")
+    options = parser.parse_args()
+
+    results = run(options.number, options.models)
+
+    print("%-42s %12s %10s %10s" % ("scenario", "ops/sec", "p50 us", "p99 us"))
+    for name, result in results.items():
+        print("%-42s %12.0f %10.1f %10.1f" % (name, result["ops_per_sec"], result["p50_us"], result["p99_us"]))
+
+    if options.output:
+        client = OpenViduClient(HOST, SECRET)
+        document = {
+            "meta": {
+                "openviduconnect": openviduconnect.__version__,
+                "httpx": httpx.__version__,
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "codec": client.codec.name,
+                "models": options.models,
+                "number": options.number,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            },
+            "results": results,
+        }
+        with open(options.output, "w") as output:
+            json.dump(document, output, indent=2, sort_keys=True)
+
+    if options.compare:
+        with open(options.compare) as baseline:
+            regressions = compare(results, json.load(baseline)["results"], options.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Decode and encode cost of the installed JSON codecs on get_sessions payloads.
+
+Run: python benchmarks/bench_codec.py [--sessions 200] [--connections 20]
+"""
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from timeit import Timer
+
+from bench_models import sessions_payload
+from openviduconnect.client.codec import CODECS
+from openviduconnect.client.projection import SESSION_SUMMARY
+
+
+def main() -> None:
+    """."""
+
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--connections", type=int, default=20)
+    parser.add_argument("--number", type=int, default=10)
+    options = parser.parse_args()
+
+    body = sessions_payload(options.sessions, options.connections)
+    data = CODECS["json"].loads(body)
+    token_body = {"type": "WEBRTC", "role": "PUBLISHER", "record": True, "data": '{"user": 1}'}
+
+    print("payload: %d sessions x %d connections, %.1f MiB of JSON" % (
+        options.sessions, options.connections, len(body) / 2 ** 20
+    ))
+    print("%-8s %14s %14s %16s" % ("codec", "loads ms", "dumps ms", "token body us"))
+    for name, codec in sorted(CODECS.items()):
+        loads = min(Timer(lambda: codec.loads(body)).repeat(repeat=3, number=options.number)) / options.number
+        dumps = min(Timer(lambda: codec.dumps(data)).repeat(repeat=3, number=options.number)) / options.number
+        small = min(Timer(lambda: codec.dumps(token_body)).repeat(repeat=3, number=10000)) / 10000
+        print("%-8s %14.2f %14.2f %16.2f" % (name, loads * 1e3, dumps * 1e3, small * 1e6))
+
+    # The clients scan with the stdlib codec and pick the kept fields from a full decode with the native ones
+    print("%-8s %14s" % ("codec", "SESSION_SUMMARY projection ms"))
+    for name, codec in sorted(CODECS.items()):
+        summary = min(Timer(lambda: SESSION_SUMMARY.project_page(body, codec)).repeat(repeat=3, number=options.number))
+        print("%-8s %14.2f" % (name, summary / options.number * 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Per-call overhead of URL building and error dispatch: the former urljoin chains and if chains against the endpoint table.
+
+Run: python benchmarks/bench_dispatch.py [--number 200000]
+"""
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from timeit import Timer
+from urllib.parse import urljoin
+
+from httpx import Request, Response
+
+from openviduconnect import OpenViduClient
+from openviduconnect.client.endpoints import ENDPOINTS, ENDPOINTS_BY_NAME
+
+HOST = "https://openvidu.example.com/"
+SESSIONS = urljoin(urljoin(HOST, "openvidu/api"), "sessions")
+
+
+def legacy_url(session_id: str, connection_id: str) -> str:
+    """URL of get_connection as the per-method code built it."""
+
+    session_url = urljoin(SESSIONS, session_id)
+    connection_url = urljoin(session_url, "connection")
+    return urljoin(connection_url, connection_id)
+
+
+def legacy_errors(status_code: int) -> None:
+    """Status checks of start_recording as the per-method code ran them, a 200 walks the whole chain."""
+
+    if status_code == 400:
+        raise ValueError
+    if status_code == 404:
+        raise ValueError
+    if status_code == 406:
+        raise ValueError
+    if status_code == 409:
+        raise ValueError
+    if status_code == 422:
+        raise ValueError
+    if status_code == 501:
+        raise ValueError
+
+
+def main() -> None:
+    """."""
+
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=200000)
+    options = parser.parse_args()
+
+    client = OpenViduClient(HOST, "<SECRET>")
+    urls = client._urls
+    start_recording = ENDPOINTS_BY_NAME["start_recording"]
+    get_connection = ENDPOINTS_BY_NAME["get_connection"]
+    ok = Response(200, content=b'{"id": "con_1"}', request=Request("GET", HOST))
+
+    scenarios = (
+        ("url: urljoin chain", lambda: legacy_url("ses_1", "con_1")),
+        ("url: template format", lambda: urls["get_connection"].format("ses_1", "con_1")),
+        ("errors: if chain", lambda: legacy_errors(200)),
+        ("errors: dict lookup", lambda: start_recording.errors.get(200)),
+        ("prepare + finish get_connection", lambda: client._finish(
+            get_connection, client._prepare(get_connection, ("ses_1", "con_1"), {})[1], ok
+        )),
+    )
+
+    print("%d endpoints in the table, %d calls per scenario" % (len(ENDPOINTS), options.number))
+    print("%-34s %12s" % ("scenario", "ns/call"))
+    for name, call in scenarios:
+        best = min(Timer(call).repeat(repeat=5, number=options.number))
+        print("%-34s %12.1f" % (name, best / options.number * 1e9))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Memory held by a get_sessions() response: plain dicts against the slotted models and a projection.
+Untouched models keep their nested connections as decoded dicts, they only shrink once those are parsed.
+
+Run: python benchmarks/bench_models.py [--sessions 500] [--connections 20]
+"""
+from __future__ import annotations
+
+import gc
+import json
+import tracemalloc
+from argparse import ArgumentParser
+from typing import Any, Callable, Tuple
+
+from openviduconnect.client.projection import SESSION_SUMMARY
+from openviduconnect.models import Session
+
+
+def sessions_payload(sessions: int, connections: int) -> bytes:
+    """Body of GET /openvidu/api/sessions shaped like a busy OpenVidu 2.17 server."""
+
+    def connection(session_id: str, index: int) -> dict:
+        return {
+            "id": "con_%s_%d" % (session_id, index), "object": "connection", "type": "WEBRTC", "status": "active",
+            "sessionId": session_id, "createdAt": 1620000000000 + index, "activeAt": 1620000001000 + index,
+            "location": "Madrid, Spain", "ip": "10.0.%d.%d" % (index // 250, index % 250),
+            "platform": "Chrome 90.0.4430.93 on Linux 64-bit",
+            "token": "wss://openvidu.example.com?sessionId=%s&token=tok_%d" % (session_id, index),
+            "serverData": '{"user": %d}' % index, "clientData": "", "record": True, "role": "PUBLISHER",
+            "kurentoOptions": None, "rtspUri": None, "adaptativeBitrate": None, "onlyPlayWithSubscribers": None,
+            "networkCache": None,
+            "publishers": [{
+                "streamId": "str_CAM_%s_%d" % (session_id, index), "createdAt": 1620000002000 + index,
+                "mediaOptions": {
+                    "hasAudio": True, "audioActive": True, "hasVideo": True, "videoActive": True,
+                    "typeOfVideo": "CAMERA", "frameRate": 30, "videoDimensions": '{"width":640,"height":480}',
+                    "filter": {},
+                },
+            }],
+            "subscribers": [{"streamId": "str_CAM_%s_%d" % (session_id, (index + 1) % connections)}],
+        }
+
+    content = []
+    for index in range(sessions):
+        session_id = "ses_%06d" % index
+        content.append({
+            "id": session_id, "object": "session", "createdAt": 1620000000000, "mediaMode": "ROUTED",
+            "recordingMode": "MANUAL", "customSessionId": session_id, "recording": False,
+            "forcedVideoCodec": "VP8", "allowTranscoding": False,
+            "defaultRecordingProperties": {
+                "name": "", "hasAudio": True, "hasVideo": True, "outputMode": "COMPOSED",
+                "recordingLayout": "BEST_FIT", "resolution": "1280x720", "frameRate": 25,
+            },
+            "connections": {
+                "numberOfElements": connections,
+                "content": [connection(session_id, number) for number in range(connections)],
+            },
+        })
+    return json.dumps({"numberOfElements": sessions, "content": content}).encode()
+
+
+def measure(build: Callable[[], Any]) -> Tuple[int, int]:
+    """Bytes retained by the result of `build` and peak bytes while building it."""
+
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak
+
+
+def main() -> None:
+    """."""
+
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--connections", type=int, default=20)
+    options = parser.parse_args()
+
+    body = sessions_payload(options.sessions, options.connections)
+
+    def models_touched() -> list:
+        sessions = [Session(item) for item in json.loads(body)["content"]]
+        for session in sessions:
+            session.connections
+        return sessions
+
+    scenarios = (
+        ("dict", lambda: json.loads(body)),
+        ("models, connections untouched", lambda: [Session(item) for item in json.loads(body)["content"]]),
+        ("models, connections parsed", models_touched),
+        ("SESSION_SUMMARY projection", lambda: SESSION_SUMMARY.project_page(body)),
+    )
+
+    print("payload: %d sessions x %d connections, %.1f MiB of JSON" % (
+        options.sessions, options.connections, len(body) / 2 ** 20
+    ))
+    print("%-32s %12s %12s" % ("scenario", "retained MiB", "peak MiB"))
+    for name, build in scenarios:
+        retained, peak = measure(build)
+        print("%-32s %12.2f %12.2f" % (name, retained / 2 ** 20, peak / 2 ** 20))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,13 @@
-from .client import OpenViduClient, AsyncOpenViduClient
+from .client import (
+    OpenViduClient,
+    AsyncOpenViduClient,
+    BridgedOpenViduClient,
+    ShardedOpenViduClient,
+    AsyncShardedOpenViduClient,
+    ResponseCache,
+    Projection,
+    SESSION_SUMMARY,
+    RECORDING_SUMMARY,
+)
 
 __version__ = "1.0.2"
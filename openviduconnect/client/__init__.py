@@ -1,2 +1,6 @@
 from .syncclient import OpenViduClient
 from .asyncclient import AsyncOpenViduClient
+from .bridge import BridgedOpenViduClient
+from .cache import ResponseCache
+from .sharded import ShardedOpenViduClient, AsyncShardedOpenViduClient
+from .projection import Projection, SESSION_SUMMARY, RECORDING_SUMMARY
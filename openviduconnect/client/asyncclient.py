@@ -1,266 +1,473 @@
 from __future__ import annotations
 
-from urllib.parse import urljoin
+import os
+from asyncio import CancelledError, Future, Semaphore, ensure_future, gather, get_event_loop, shield, sleep
+from contextvars import copy_context
+from copy import deepcopy
+from time import monotonic
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
 
-from httpx import AsyncClient, Response
+from httpx import AsyncClient, Response, TransportError
 
 from .base import BaseClient
-from ..exceptions import (
-    SessionBodyParameterError,
-    SessionExistsError,
-    SessionNotFoundError,
-    ConnectionBodyParameterError,
-    ConnectionIPCAMError,
-    SessionDoesNotExistError,
-    ConnectionNotFound,
-    SessionOrConnectionDoesNotExist,
-    RecordingBodyParameterError,
-    RecordingResolutionOrBrowserSettingsError,
-    RecordingNoConnectedParticipantsError,
-    RecordingNotConfiguredForMediaNodeError,
-    RecordingDisabledOnServerError,
-    RecordingNotFoundError,
-    RecordingStartingProgressError,
-    RecordingNotCompletedError,
+from .cache import MISSING
+from .deadline import attempt_timeout, check, current_deadline, deadline, exceeded, remaining, within
+from .download import (
+    CHUNK_SIZE,
+    PART,
+    SEGMENTS,
+    Progress,
+    ProgressCallback,
+    Segment,
+    destination,
+    finish,
+    open_mode,
+    plan,
+    same_origin,
+    recording_url,
 )
+from .endpoints import ENDPOINTS_BY_NAME, Endpoint, bind
+from .limiter import CONGESTION_STATUSES
+from .metrics import CallTimer
+from .projection import as_projection
+from .retry import ATTEMPTS
+from .scheduler import PriorityScheduler, resolve as resolve_priority
+from .stream import ContentParser
+from .waiter import RecordingWaiter, validate
+from ..exceptions import DeadlineExceededError, RecordingWaitTimeoutError
+from ..exceptions.base import Error
 
 
 class AsyncOpenViduClient(BaseClient):
-    """."""
-
-    def __aenter__(self):
+    """
+    Client of the REST APIs running over a pooled httpx.AsyncClient.
+    Its API coroutines (create_session, get_session, ...) are generated from the endpoint table.
+    """
+
+    def __init__(
+        self: AsyncOpenViduClient, *args: Any, scheduler: PriorityScheduler = None, **kwargs: Any
+    ) -> None:
+        """
+        Same parameters as BaseClient.
+        @:param scheduler: Admission of the requests by priority class, interactive calls first (Default: None)
+        """
+
+        super().__init__(*args, **kwargs)
+        self.scheduler = scheduler
+        self._in_flight: Dict[Tuple[str, tuple, str], Future] = {}
+        self._waiters: Dict[Future, int] = {}
+        self.recording_waiter = RecordingWaiter(self)
+
+    async def __aenter__(self):
         """."""
 
         return self
 
-    def __aexit__(self, exc_type, exc_val, exc_tb):
-        """."""
-
-        pass
-
-    async def create_session(self: AsyncOpenViduClient, **kwargs: str) -> dict:
-        """."""
-
-        async with AsyncClient(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = await client.post(self._apis["sessions"], headers=self._headers, json=kwargs)
-
-        if response.status_code == 400:
-            raise SessionBodyParameterError("Problem with some body parameter")
-        if response.status_code == 409:
-            raise SessionExistsError("Parameter customSessionId corresponds to an existing Session")
-
-        return response.json()
-
-    async def get_session(self: AsyncOpenViduClient, session_id: str) -> dict:
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
         """."""
 
-        url: str = urljoin(self._apis["sessions"], session_id)
-        async with AsyncClient(verify=self._verify, headers=self._timeout) as client:
-            response: Response = await client.get(url, headers=self._headers)
-
-        if response.status_code == 404:
-            raise SessionNotFoundError("No Session exists for the passed SESSION_ID")
-
-        return response.json()
-
-    async def get_sessions(self: AsyncOpenViduClient) -> dict:
-        """."""
-
-        async with AsyncClient(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = await client.get(self._apis["sessions"], headers=self._headers)
-
-        return response.json()
-
-    async def delete_session(self: AsyncOpenViduClient, session_id: str) -> dict:
-        """."""
-
-        url: str = urljoin(self._apis["sessions"], session_id)
-        async with AsyncClient(verify=self._verify, headers=self._timeout) as client:
-            response: Response = await client.delete(url, headers=self._headers)
-
-        if response.status_code == 404:
-            raise SessionNotFoundError("No Session exists for the passed SESSION_ID")
-
-        return response.json()
-
-    async def create_connection(self: AsyncOpenViduClient, session_id: str, **kwargs: str) -> dict:
-        """."""
-
-        session_url: str = urljoin(self._apis["sessions"], session_id)
-        url: str = urljoin(session_url, "connection")
-        async with AsyncClient(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = await client.post(url, headers=self._headers, json=kwargs)
-
-        if response.status_code == 400:
-            raise ConnectionBodyParameterError("Problem with some body parameter")
-        if response.status_code == 404:
-            raise SessionNotFoundError("No session exists for the passed SESSION_ID")
-        if response.status_code == 500:
-            raise ConnectionIPCAMError("Unexpected error when creating the Connection object")
-
-        return response.json()
-
-    async def get_connection(self: AsyncOpenViduClient, session_id: str, connection_id: str) -> dict:
-        """."""
-
-        session_url: str = urljoin(self._apis["sessions"], session_id)
-        connection_url: str = urljoin(session_url, "connection")
-        url: str = urljoin(connection_url, connection_id)
-        async with AsyncClient(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = await client.get(url, headers=self._headers)
-
-        if response.status_code == 400:
-            raise SessionDoesNotExistError("No Session exists for the passed SESSION_ID")
-        if response.status_code == 404:
-            raise ConnectionNotFound("No Connection exists for the passed CONNECTION_ID")
-
-        return response.json()
-
-    async def get_connections(self: AsyncOpenViduClient, session_id: str) -> dict:
-        """."""
-
-        session_url: str = urljoin(self._apis["session"], session_id)
-        url: str = urljoin(session_url, "connection")
-        async with AsyncClient(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = await client.get(url, headers=self._headers)
-
-        if response.status_code == 404:
-            raise SessionNotFoundError("No Session exists for the passed SESSION_ID")
-
-        return response.json()
-
-    async def update_connection(self: AsyncOpenViduClient, session_id: str, connection_id: str, **kwargs: str) -> dict:
-        """."""
-
-        session_url: str = urljoin(self._apis["session"], session_id)
-        connection_url: str = urljoin(session_url, "connection")
-        url: str = urljoin(connection_url, connection_id)
-        async with AsyncClient(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = await client.patch(url, headers=self._headers, json=kwargs)
-
-        if response.status_code == 400:
-            raise ConnectionBodyParameterError("Problem with some body parameter")
-        if response.status_code == 404:
-            raise SessionOrConnectionDoesNotExist(
-                "No Session exists for the passed SESSION_ID, or no Connection exists for the passed CONNECTION_ID"
-            )
-
-        return response.json()
-
-    async def delete_connection(self: AsyncOpenViduClient, session_id: str, connection_id: str) -> dict:
-        """."""
-
-        session_url: str = urljoin(self._apis["session"], session_id)
-        connection_url: str = urljoin(session_url, "connection")
-        url: str = urljoin(connection_url, connection_id)
-        async with AsyncClient(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = await client.delete(url, headers=self._headers)
-
-        if response.status_code == 400:
-            raise SessionDoesNotExistError("No Session exists for the passed SESSION_ID")
-        if response.status_code == 404:
-            raise ConnectionNotFound("No Connection for the passed CONNECTION_ID")
-
-        return response.json()
-
-    async def start_recording(self: AsyncOpenViduClient, **kwargs: str) -> dict:
-        """."""
-
-        url: str = urljoin(self._apis["recordings"], "start")
-        async with AsyncClient(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = await client.post(url, headers=self._headers, json=kwargs)
-
-        if response.status_code == 400:
-            raise RecordingBodyParameterError("Problem with some body parameter")
-        if response.status_code == 404:
-            raise SessionNotFoundError("No session exists for the passed session body parameter")
-        if response.status_code == 406:
-            raise RecordingNoConnectedParticipantsError("The session has no connected participants")
-        if response.status_code == 409:
-            raise RecordingNotConfiguredForMediaNodeError(
-                "The session is not configured for using MediaMode ROUTED or it is already being recorded"
-            )
-        if response.status_code == 422:
-            raise RecordingResolutionOrBrowserSettingsError(
-                "resolution parameter exceeds acceptable values (for both width and height, min 100px and max 1999px) "
-                "or trying to start a recording with both hasAudio and hasVideo to false"
-            )
-        if response.status_code == 501:
-            raise RecordingDisabledOnServerError(
-                "OpenVidu Server recording module is disabled: "
-                "OPENVIDU_RECORDING configuration property is set to false"
-            )
-
-        return response.json()
-
-    async def stop_recording(self: AsyncOpenViduClient, recording_id: str) -> dict:
-        """."""
-
-        stop_url: str = urljoin(self._apis["recordings"], "stop")
-        url: str = urljoin(stop_url, recording_id)
-        async with AsyncClient() as client:
-            response: Response = await client.post(url, headers=self._headers)
-
-        if response.status_code == 404:
-            raise RecordingNotFoundError("No recording exists for the passed RECORDING_ID")
-        if response.status_code == 406:
-            raise RecordingStartingProgressError(
-                "Recording has starting status. Wait until started status before stopping the recording"
-            )
-        if response.status_code == 501:
-            raise RecordingDisabledOnServerError(
-                "OpenVidu Server recording module is disabled: "
-                "OPENVIDU_RECORDING configuration property is set to false"
-            )
-
-        return response.json()
-
-    async def get_recording(self: AsyncOpenViduClient, recording_id: str) -> dict:
-        """."""
-
-        url: str = urljoin(self._apis["recordings"], recording_id)
-        async with AsyncClient() as client:
-            response: Response = await client.get(url, headers=self._headers)
-
-        if response.status_code == 404:
-            raise RecordingNotFoundError("No recording exists for the passed RECORDING_ID")
-        if response.status_code == 501:
-            raise RecordingDisabledOnServerError(
-                "OpenVidu Server recording module is disabled: "
-                "OPENVIDU_RECORDING configuration property is set to false"
-            )
-
-        return response.json()
-
-    async def get_recordings(self: AsyncOpenViduClient) -> dict:
-        """."""
-
-        async with AsyncClient(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = await client.get(self._apis["recordings"], headers=self._headers)
-
-        if response.status_code == 501:
-            raise RecordingDisabledOnServerError(
-                "OpenVidu Server recording module is disabled: "
-                "OPENVIDU_RECORDING configuration property is set to false"
+        await self.aclose()
+
+    @property
+    def client(self: AsyncOpenViduClient) -> AsyncClient:
+        """Pooled HTTP client, created on first use and reused by every call."""
+
+        if self._client is None:
+            self._client = AsyncClient(**self._client_options())
+        return self._client
+
+    async def aclose(self: AsyncOpenViduClient) -> None:
+        """Close the pooled HTTP client, a later call opens a fresh one."""
+
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    async def _send(
+        self: AsyncOpenViduClient,
+        method: str,
+        url: str,
+        json: dict = None,
+        stream: bool = False,
+        timer: CallTimer = None,
+        headers: Dict[str, str] = None,
+        credentials: bool = True,
+        priority: str = None,
+    ) -> Response:
+        """
+        Send the request through the circuit breaker, retrying transient failures of safe operations.
+        Each attempt waits for its turn in the scheduler, with the priority of the call or else of the context.
+        """
+
+        idempotent = self.retry.idempotent(method, json)
+        content = None if json is None else self.codec.dumps(json)
+        extensions = None if timer is None else {"trace": timer.atrace}
+        scheduler = self.scheduler
+        priority = resolve_priority(priority)
+        attempt = 0
+        while True:
+            check()
+            self.circuit_breaker.before()
+            if scheduler is not None:
+                await within(scheduler.acquire(priority))
+            started = None
+            healthy = None
+            try:
+                if self.limiter is not None:
+                    await within(self.limiter.aacquire())
+                started = monotonic()
+                left = check()
+                if timer is not None:
+                    timer.attempt()
+                request = self.client.build_request(
+                    method, url, content=content, headers=headers, extensions=extensions,
+                    timeout=attempt_timeout(self._timeout, left),
+                )
+                if not credentials:
+                    del request.headers["Authorization"]  # Secret of the server, never sent to another host
+                response: Response = await self.client.send(request, stream=stream)
+                healthy = response.status_code not in CONGESTION_STATUSES
+            except TransportError as error:
+                if exceeded(error, self._timeout, left):
+                    raise DeadlineExceededError("Deadline exceeded during %s %s" % (method, url)) from error
+                healthy = False
+                delay = self._retry_delay(idempotent, attempt, error=error)
+                if delay is None:
+                    raise
+                if left is not None and delay >= remaining():
+                    raise DeadlineExceededError("Deadline leaves no time to retry %s %s" % (method, url)) from error
+            else:
+                delay = self._retry_delay(idempotent, attempt, response=response)
+                if delay is None:
+                    if attempt:
+                        response.extensions[ATTEMPTS] = attempt + 1
+                    return response
+                await response.aclose()
+                if left is not None and delay >= remaining():
+                    raise DeadlineExceededError(
+                        "Deadline leaves no time to retry %s %s after status %d" % (method, url, response.status_code)
+                    )
+            finally:
+                if self.limiter is not None and started is not None:
+                    self.limiter.release(monotonic() - started, healthy)
+                if scheduler is not None:
+                    scheduler.release(priority)
+            await sleep(delay)
+            attempt += 1
+
+    async def _coalesce(
+        self: AsyncOpenViduClient, endpoint: str, args: tuple, url: str, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Share one in-flight fetch, its result or its error, between identical concurrent requests."""
+
+        key = (endpoint, args, url)
+        task = self._in_flight.get(key)
+        leader = task is None
+        if leader:
+            # Free of the deadline of the caller that starts it, every caller bounds its own wait with within()
+            context = copy_context()
+            context.run(current_deadline.set, None)
+            task = context.run(ensure_future, fetch())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._landed(key, done))
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # Shielded so a cancelled caller does not cancel the fetch the other callers wait on
+            result = await shield(task)
+        finally:
+            self._left(key, task)
+        # The caller that started the fetch gets the result, the others a copy each they are free to change
+        return result if leader else deepcopy(result)
+
+    def _left(self: AsyncOpenViduClient, key: Tuple[str, tuple, str], task: Future) -> None:
+        """Count a caller out of the fetch, cancel it once nobody waits on it, e.g. all went past their deadlines."""
+
+        waiters = self._waiters.get(task, 0) - 1
+        if waiters > 0:
+            self._waiters[task] = waiters
+            return
+        self._waiters.pop(task, None)
+        if not task.done():
+            # Without a deadline of its own a hung fetch would otherwise hold the key for every later caller
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+            task.cancel()
+
+    def _landed(self: AsyncOpenViduClient, key: Tuple[str, tuple, str], task: Future) -> None:
+        """Release the in-flight slot of a finished fetch."""
+
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        self._waiters.pop(task, None)
+        if not task.cancelled():
+            task.exception()  # Marks the error retrieved when every waiter was cancelled
+
+    def _forget(self: AsyncOpenViduClient, endpoint: str, *args: Hashable) -> None:
+        """Also stop later reads from joining the fetches in flight that the write made stale."""
+
+        super()._forget(endpoint, *args)
+        for key in [key for key in self._in_flight if key[0] == endpoint and key[1][:len(args)] == args]:
+            del self._in_flight[key]
+
+    async def _call(self: AsyncOpenViduClient, endpoint: Endpoint, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """Run one call of the endpoint, identical concurrent GETs share one request."""
+
+        url, args, body, options = self._prepare(endpoint, args, kwargs)
+        with deadline(options.get("deadline", self.deadline)):
+            if endpoint.method != "GET":
+                return await self._fetch(endpoint, url, args, body, options)
+
+            if options.get("cache", True):
+                cached = self._cached(endpoint, *args)
+                if cached is not MISSING:
+                    return cached
+
+            key = url if "projection" not in options else "%s#%s" % (url, ",".join(options["projection"].fields))
+            fetch = self._coalesce(endpoint.name, args, key, lambda: self._fetch(endpoint, url, args, None, options))
+            return await within(fetch, "the response of %s" % (url,))
+
+    async def _fetch(
+        self: AsyncOpenViduClient, endpoint: Endpoint, url: str, args: tuple, body: dict, options: Dict[str, Any]
+    ) -> Any:
+        """Send the call and parse its response, timing it when instrumentation is enabled."""
+
+        priority = resolve_priority(options.get("priority"), endpoint.priority)
+        if self.instrumentation is None:
+            response: Response = await self._send(endpoint.method, url, json=body, priority=priority)
+            if self._replayed(endpoint, response):
+                return await self._recreated(body)
+            return self._finish(endpoint, args, response, options=options)
+
+        timer = CallTimer()
+        outcome = "error"
+        try:
+            response: Response = await self._send(endpoint.method, url, json=body, timer=timer, priority=priority)
+            outcome = str(response.status_code)
+            if self._replayed(endpoint, response):
+                return await self._recreated(body)
+            return self._finish(endpoint, args, response, timer, options)
+        except Exception as error:
+            outcome = error.__class__.__name__
+            raise
+        finally:
+            self.instrumentation.record(endpoint.name, outcome, timer)
+
+    async def _recreated(self: AsyncOpenViduClient, body: dict) -> Any:
+        """Session of a retried create_session answered with a 409, see _replayed."""
+
+        self._invalidate_listings("sessions")
+        return await self.get_session(body["customSessionId"])
+
+    async def bulk(
+        self: AsyncOpenViduClient, calls: Iterable[Callable[[], Awaitable[dict]]], concurrency: int = 10
+    ) -> List[Union[dict, Exception]]:
+        """
+        Run the calls with at most `concurrency` in flight, keeping input order.
+        A failed call leaves its exception in its slot, typed error or not, so the results of the others are kept.
+        """
+
+        semaphore = Semaphore(concurrency)
+
+        async def run(call: Callable[[], Awaitable[dict]]) -> dict:
+            async with semaphore:
+                return await call()
+
+        results = await gather(*(run(call) for call in calls), return_exceptions=True)
+        for result in results:
+            # Cancellations and interrupts are the caller's, not outcomes of the calls
+            if isinstance(result, CancelledError) or (
+                isinstance(result, BaseException) and not isinstance(result, Exception)
+            ):
+                raise result
+        return results
+
+    async def create_sessions(
+        self: AsyncOpenViduClient, specs: Iterable[dict], concurrency: int = 10
+    ) -> List[Union[dict, Exception]]:
+        """Create one session per body in `specs`, results are in input order."""
+
+        return await self.bulk((lambda spec=spec: self.create_session(**spec) for spec in specs), concurrency)
+
+    async def create_connections(
+        self: AsyncOpenViduClient, session_id: str, specs: Iterable[dict], concurrency: int = 10
+    ) -> List[Union[dict, Exception]]:
+        """Create one connection per body in `specs`, results are in input order."""
+
+        return await self.bulk(
+            (lambda spec=spec: self.create_connection(session_id, **spec) for spec in specs), concurrency
+        )
+
+    async def delete_connections(
+        self: AsyncOpenViduClient, session_id: str, connection_ids: Iterable[str], concurrency: int = 10
+    ) -> List[Union[dict, Exception]]:
+        """Delete each connection of `connection_ids` from the session, results are in input order."""
+
+        return await self.bulk(
+            (
+                lambda connection_id=connection_id: self.delete_connection(session_id, connection_id)
+                for connection_id in connection_ids
+            ),
+            concurrency,
+        )
+
+    async def get_sessions_by_id(
+        self: AsyncOpenViduClient, session_ids: Iterable[str], concurrency: int = 10
+    ) -> List[Union[dict, Exception]]:
+        """Fetch each session of `session_ids`, results are in input order."""
+
+        return await self.bulk(
+            (lambda session_id=session_id: self.get_session(session_id) for session_id in session_ids), concurrency
+        )
+
+    async def delete_sessions(
+        self: AsyncOpenViduClient, session_ids: Iterable[str], concurrency: int = 10
+    ) -> List[Union[dict, Exception]]:
+        """Delete each session of `session_ids`, results are in input order."""
+
+        return await self.bulk(
+            (lambda session_id=session_id: self.delete_session(session_id) for session_id in session_ids), concurrency
+        )
+
+    async def wait_for_recording(
+        self: AsyncOpenViduClient, recording_id: str, status: str = "ready", timeout: float = None
+    ) -> Any:
+        """
+        Recording once it is in `status` or past it. Every pending waiter of the client shares one get_recordings poll,
+        tune it through recording_waiter.interval and recording_waiter.max_interval.
+        """
+
+        validate(status)
+        left = remaining()
+        if left is None or (timeout is not None and timeout <= left):
+            return await self.recording_waiter.wait(recording_id, status, timeout)
+        try:
+            return await self.recording_waiter.wait(recording_id, status, max(0.0, left))
+        except RecordingWaitTimeoutError:
+            raise DeadlineExceededError(
+                "Deadline exceeded waiting for recording %s to reach %s" % (recording_id, status)
             )
 
-        return response.json()
-
-    async def delete_recording(self: AsyncOpenViduClient, recording_id: str) -> dict:
-        """."""
-
-        url: str = urljoin(self._apis["recordings"], recording_id)
-        async with AsyncClient(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = await client.delete(url, headers=self._headers)
-
-        if response.status_code == 404:
-            raise RecordingNotFoundError("No recording exists for the passed RECORDING_ID")
-        if response.status_code == 409:
-            raise RecordingNotCompletedError("The recording has started status. Stop it before deletion")
-        if response.status_code == 501:
-            raise RecordingDisabledOnServerError(
-                "OpenVidu Server recording module is disabled: "
-                "OPENVIDU_RECORDING configuration property is set to false"
+    async def download_recording(
+        self: AsyncOpenViduClient,
+        recording_id: str,
+        dest: str,
+        chunk_size: int = CHUNK_SIZE,
+        segments: int = 1,
+        progress: Optional[ProgressCallback] = None,
+    ) -> str:
+        """
+        Stream the file of a ready recording to `dest`, a file or a directory, in chunks of `chunk_size` bytes.
+        A download interrupted in this call or an earlier one resumes with a Range request from its .part file.
+        With segments > 1 large files are fetched as that many byte ranges concurrently. Returns the file path.
+        """
+
+        if self.cache is not None:
+            self.cache.invalidate("get_recording", recording_id)
+        url = recording_url(await self.get_recording(recording_id))
+        path = destination(dest, url)
+        part = path + PART
+
+        head = None
+        if segments > 1 or os.path.exists(part + SEGMENTS):
+            head = await self._send("HEAD", url, credentials=same_origin(url, self._host))
+        segment_plan = plan(part, head, segments, chunk_size)
+        if segment_plan is None:
+            done = os.path.getsize(part) if os.path.exists(part) else 0
+            await self._download_segment(url, part, Segment(0, None, done), chunk_size, Progress(progress, done=done))
+            return finish(part, path)
+
+        tracker = Progress(progress, segment_plan.size, segment_plan.done)
+        tasks = [
+            ensure_future(self._download_segment(url, part, segment, chunk_size, tracker))
+            for segment in segment_plan.segments
+            if not segment.complete
+        ]
+        try:
+            await gather(*tasks)
+        except BaseException:
+            # Stop the other segments before saving the resume state, none of them may write after it
+            for task in tasks:
+                task.cancel()
+            await gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            segment_plan.save()
+        return finish(part, path)
+
+    async def _download_segment(
+        self: AsyncOpenViduClient, url: str, part: str, segment: Segment, chunk_size: int, progress: Progress
+    ) -> None:
+        """Write the bytes left of the segment at their offset, resuming when the stream breaks off."""
+
+        loop = get_event_loop()
+        attempt = 0
+        while True:
+            response: Response = await self._send(
+                "GET", url, stream=True, headers=segment.headers(), credentials=same_origin(url, self._host)
             )
-
-        return response.json()
+            try:
+                mode = open_mode(response, segment, progress)
+                if mode is None:
+                    return
+                with open(part, mode) as file:
+                    file.seek(segment.offset)
+                    async for chunk in response.aiter_bytes(chunk_size):
+                        check()
+                        # Disk writes run on the default executor to keep the event loop responsive
+                        await loop.run_in_executor(None, file.write, chunk)
+                        segment.done += len(chunk)
+                        progress.add(len(chunk))
+                if segment.end is None or segment.complete:
+                    return
+            except TransportError:
+                if attempt + 1 >= self.retry.attempts:
+                    raise
+            finally:
+                await response.aclose()
+            attempt += 1
+            if attempt >= self.retry.attempts:
+                raise Error("Download of %s broke off at byte %d" % (url, segment.offset))
+
+    async def iter_sessions(self: AsyncOpenViduClient, projection: Any = None) -> AsyncIterator[dict]:
+        """Sessions of the server, yielded one at a time while the response streams in, optionally projected."""
+
+        async for session in self._iter_page(ENDPOINTS_BY_NAME["get_sessions"], projection):
+            yield session
+
+    async def iter_recordings(self: AsyncOpenViduClient, projection: Any = None) -> AsyncIterator[dict]:
+        """Recordings of the server, yielded one at a time while the response streams in, optionally projected."""
+
+        async for recording in self._iter_page(ENDPOINTS_BY_NAME["get_recordings"], projection):
+            yield recording
+
+    async def _iter_page(
+        self: AsyncOpenViduClient, endpoint: Endpoint, projection: Any = None
+    ) -> AsyncIterator[dict]:
+        """Parse the content array of a paged response incrementally, holding one element at a time."""
+
+        priority = resolve_priority(None, endpoint.priority)
+        response: Response = await self._send("GET", self._urls[endpoint.name], stream=True, priority=priority)
+        try:
+            self._raise_for_status(endpoint, response)
+            self._raise_for_error(endpoint, response)
+
+            fields = as_projection(projection)
+            parser = ContentParser()
+            async for chunk in response.aiter_bytes():
+                for element in parser.feed(chunk):
+                    data = self.codec.loads(element) if fields is None else fields.project(element, self.codec)
+                    yield self._parse(data, endpoint.model)
+        finally:
+            await response.aclose()
+
+
+def _method(endpoint: Endpoint) -> Callable:
+    """API coroutine of AsyncOpenViduClient for the endpoint."""
+
+    async def method(self: AsyncOpenViduClient, *args: str, **kwargs: Any) -> Any:
+        return await self._call(endpoint, args, kwargs)
+
+    return method
+
+
+bind(AsyncOpenViduClient, _method)
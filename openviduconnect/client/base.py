@@ -1,7 +1,22 @@
 from __future__ import annotations
 
 from base64 import b64encode
-from urllib.parse import urljoin
+from time import perf_counter
+from typing import Any, Dict, Hashable, Optional, Tuple, Type, Union
+from urllib.parse import urlencode
+
+from httpx import AsyncBaseTransport, BaseTransport, Limits, Response, Timeout, TransportError
+
+from .cache import MISSING, ResponseCache
+from .codec import JSONCodec, get_codec
+from .endpoints import ENDPOINTS, Endpoint
+from .limiter import AdaptiveLimiter
+from .metrics import CallTimer, Instrumentation
+from .projection import Projection, as_projection
+from .retry import CircuitBreaker, RetryPolicy, retried
+from .scheduler import validate as validate_priority
+from ..exceptions.base import Error
+from ..models import Model
 
 
 class BaseClient(object):
@@ -11,31 +26,291 @@ class BaseClient(object):
     Params: Host and the Secret Key
     """
 
-    def __init__(self: BaseClient, host: str, secret: str, verify: bool = False, timeout: int = None) -> None:
+    def __init__(
+        self: BaseClient,
+        host: str,
+        secret: str,
+        verify: bool = False,
+        timeout: Union[float, Timeout] = None,
+        connect_timeout: float = None,
+        read_timeout: float = None,
+        write_timeout: float = None,
+        pool_timeout: float = None,
+        deadline: float = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0,
+        http2: bool = False,
+        cache: ResponseCache = None,
+        retry: RetryPolicy = None,
+        circuit_breaker: CircuitBreaker = None,
+        models: bool = False,
+        codec: Union[str, JSONCodec] = None,
+        transport: Union[BaseTransport, AsyncBaseTransport] = None,
+        instrumentation: Instrumentation = None,
+        limiter: AdaptiveLimiter = None,
+    ) -> None:
         """
         @:param host: Host of the platform https://<host.com>
         @:param secret: Secret Key of the platform
         @:param verify: Verify URL (Default: False)
-        @:param timeout: Time Out of the API call (Default: None)
+        @:param timeout: Time Out of each attempt of the API call, seconds or an httpx.Timeout (Default: None)
+        @:param connect_timeout: Seconds to connect, overriding timeout (Default: None)
+        @:param read_timeout: Seconds between two chunks of the response, overriding timeout (Default: None)
+        @:param write_timeout: Seconds between two chunks of the request, overriding timeout (Default: None)
+        @:param pool_timeout: Seconds waiting for a connection of the pool, overriding timeout (Default: None)
+        @:param deadline: Seconds for each call, retries, backoffs and waits for a slot included (Default: None)
+        @:param max_connections: Maximum connections kept by the pool (Default: 100)
+        @:param max_keepalive_connections: Maximum idle connections kept alive by the pool (Default: 20)
+        @:param keepalive_expiry: Seconds an idle connection is kept alive (Default: 5.0)
+        @:param http2: Negotiate HTTP/2 with the server, requires httpx[http2] (Default: False)
+        @:param cache: Read cache for sessions and recordings, invalidated by this client's writes (Default: None)
+        @:param retry: Retry policy of transient failures, RetryPolicy(attempts=1) disables it (Default: RetryPolicy())
+        @:param circuit_breaker: Breaker failing fast while the host is unhealthy (Default: shared breaker of the host)
+        @:param models: Return Session, Connection and Recording models instead of dicts (Default: False)
+        @:param codec: JSON codec, "orjson", "ujson", "json" or a JSONCodec (Default: fastest installed)
+        @:param transport: httpx transport replacing the network one, e.g. testing.FakeOpenViduServer (Default: None)
+        @:param instrumentation: Per-call phase timings aggregated per endpoint and outcome (Default: None)
+        @:param limiter: Request pacing and AIMD concurrency limit, e.g. AdaptiveLimiter.for_host(host) (Default: None)
         """
 
         self._host = host
         self._verify = verify
-        self._timeout = timeout
+        phases = {"connect": connect_timeout, "read": read_timeout, "write": write_timeout, "pool": pool_timeout}
+        split = timeout.as_dict() if isinstance(timeout, Timeout) else dict.fromkeys(phases, timeout)
+        split.update((phase, value) for phase, value in phases.items() if value is not None)
+        self._timeout = Timeout(**split)
+        self.deadline = deadline
+        self._limits = Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http2 = http2
+        self._transport = transport
+        self._client = None
+        self.cache = cache
+        self.retry = RetryPolicy() if retry is None else retry
+        self.circuit_breaker = CircuitBreaker.for_host(host) if circuit_breaker is None else circuit_breaker
+        self._models = models
+        self.codec = get_codec(codec)
+        self.instrumentation = instrumentation
+        self.limiter = limiter
 
-        secret = b64encode(secret.encode()).decode()
+        credentials = b64encode(("OPENVIDUAPP:%s" % (secret,)).encode()).decode()
         self._headers = {
             "Content-Type": "application/json",
-            "Authorization": "Basic OPENVIDUAPP:%s" % (secret,)
+            "Authorization": "Basic %s" % (credentials,)
         }
 
-        api_root = urljoin(self._host, "openvidu/api")
-        self._apis = {
-            "sessions": urljoin(api_root, "sessions"),
-            "recordings": urljoin(api_root, "recordings")
-        }
+        self._api_root = "%s/openvidu/api/" % (self._host.rstrip("/"),)
+        self._urls = {endpoint.name: self._api_root + endpoint.path for endpoint in ENDPOINTS}
 
     def __repr__(self):
         """."""
 
         return "<%s %r>" % (self.__class__.__name__, self._host)
+
+    def _client_options(self: BaseClient) -> dict:
+        """Keyword arguments shared by the pooled sync and async transports."""
+
+        return {
+            "verify": self._verify,
+            "timeout": self._timeout,
+            "limits": self._limits,
+            "http2": self._http2,
+            "headers": self._headers,
+            "transport": self._transport,
+        }
+
+    def _retry_delay(
+        self: BaseClient,
+        idempotent: bool,
+        attempt: int,
+        response: Response = None,
+        error: TransportError = None,
+    ) -> Optional[float]:
+        """Seconds to wait before retrying the outcome of an attempt, None to hand it to the caller."""
+
+        if error is None and not self.retry.retries_status(response.status_code):
+            self.circuit_breaker.success()
+            return None
+
+        self.circuit_breaker.failure()
+        if attempt + 1 >= self.retry.attempts:
+            return None
+        if error is None and not idempotent:
+            return None
+        if error is not None and not self.retry.retries_error(error, idempotent):
+            return None
+        return self.retry.delay(attempt)
+
+    def _prepare(
+        self: BaseClient, endpoint: Endpoint, args: tuple, kwargs: Dict[str, Any]
+    ) -> Tuple[str, tuple, dict, Dict[str, Any]]:
+        """URL, path parameters, JSON body and per-call options of a call of the endpoint."""
+
+        options = {}
+        query = {}
+        for keyword, name in endpoint.query.items():
+            value = kwargs.pop(keyword, None)
+            if value is not None:
+                query[name] = ("true" if value else "false") if isinstance(value, bool) else str(value)
+        if endpoint.projection:
+            fields = as_projection(kwargs.pop("projection", None))
+            if fields is not None:
+                options["projection"] = fields
+        priority = kwargs.pop("priority", None)
+        if priority is not None:
+            options["priority"] = validate_priority(priority)
+        seconds = kwargs.pop("deadline", None)
+        if seconds is not None:
+            options["deadline"] = seconds
+
+        if len(args) != len(endpoint.params):
+            missing = endpoint.params[len(args):]
+            if len(args) > len(endpoint.params) or not all(name in kwargs for name in missing):
+                raise TypeError("%s() takes the path parameters %s" % (endpoint.name, ", ".join(endpoint.params)))
+            args += tuple(kwargs.pop(name) for name in missing)
+        if kwargs and not endpoint.body:
+            raise TypeError("%s() got unexpected keyword arguments %s" % (endpoint.name, ", ".join(kwargs)))
+
+        url = self._urls[endpoint.name].format(*args)
+        if query:
+            url += "?" + urlencode(query)
+        if query or "projection" in options:
+            options["cache"] = False  # Only the default representation is cached
+        elif endpoint.method == "GET" and self.cache is not None and self.cache.caches(endpoint.name):
+            options["generation"] = self.cache.generation  # A write landing before the response makes it stale
+        return url, args, kwargs if endpoint.body else None, options
+
+    def _raise_for_status(self: BaseClient, endpoint: Endpoint, response: Response) -> None:
+        """Raise the typed error the endpoint declares for the status code, if any."""
+
+        error = endpoint.errors.get(response.status_code)
+        if error is not None:
+            raise error[0](error[1])
+
+    def _raise_for_error(self: BaseClient, endpoint: Endpoint, response: Response) -> None:
+        """Raise Error for a non-2xx status the endpoint declares no typed error for, e.g. a 401 or a proxy error."""
+
+        if not response.is_success:
+            raise Error("%s answered %d" % (endpoint.name, response.status_code))
+
+    def _replayed(self: BaseClient, endpoint: Endpoint, response: Response) -> bool:
+        """
+        Whether the response is the 409 of a retried create_session: its customSessionId exists, most likely created
+        by the first attempt, which reached the server before failing, rather than by someone else meanwhile.
+        """
+
+        return endpoint.name == "create_session" and response.status_code == 409 and retried(response)
+
+    def _finish(
+        self: BaseClient,
+        endpoint: Endpoint,
+        args: tuple,
+        response: Response,
+        timer: CallTimer = None,
+        options: Dict[str, Any] = None,
+    ) -> Any:
+        """Invalidate what the call made stale, raise its typed error or parse its response."""
+
+        if endpoint.invalidates == "session":
+            self._invalidate_session(args[0])
+        elif endpoint.invalidates == "recording":
+            self._invalidate_recording(args[0])
+        elif endpoint.invalidates is not None:
+            self._invalidate_listings(endpoint.invalidates)
+
+        self._raise_for_status(endpoint, response)
+        self._raise_for_error(endpoint, response)  # Empty or not, an error body is never a result
+
+        if not response.content:
+            return None  # 204 No Content of the deletions
+        options = options or {}
+        data = self._load(endpoint, response.content, options.get("projection"), timer)
+        if endpoint.method == "GET" and options.get("cache", True):
+            # The body rather than the result: every hit decodes its own copy, free for the caller to change
+            self._store(response.content, options.get("generation"), endpoint.name, *args)
+        return data
+
+    def _load(
+        self: BaseClient, endpoint: Endpoint, content: bytes, fields: Projection = None, timer: CallTimer = None
+    ) -> Any:
+        """Decoded response body, parsed into models when they are enabled."""
+
+        if timer is None:
+            data = self._decode(endpoint, content, fields)
+        else:
+            started = perf_counter()
+            data = self._decode(endpoint, content, fields)
+            timer.add("decode", perf_counter() - started)
+        if endpoint.model is not None:
+            data = self._parse_page(data, endpoint.model) if endpoint.page else self._parse(data, endpoint.model)
+        return data
+
+    def _decode(self: BaseClient, endpoint: Endpoint, content: bytes, fields: Optional[Projection]) -> Any:
+        """JSON of a response body, only the projected fields of it when the call asked for a projection."""
+
+        if fields is None:
+            return self.codec.loads(content)
+        if endpoint.page:
+            return fields.project_page(content, self.codec)
+        return fields.project(content, self.codec)
+
+    def _parse(self: BaseClient, data: dict, model: Type[Model]) -> Any:
+        """Model of the object when models are enabled, the dict itself otherwise."""
+
+        if not self._models:
+            return data
+        return model(data)
+
+    def _parse_page(self: BaseClient, data: dict, model: Type[Model]) -> Any:
+        """List of models of the page content when models are enabled, the dict itself otherwise."""
+
+        if not self._models:
+            return data
+        return [model(item) for item in data["content"]]
+
+    def _cached(self: BaseClient, endpoint: Endpoint, *args: Hashable) -> Any:
+        """Response of the endpoint for the ids decoded from the cached body, MISSING when not cached."""
+
+        if self.cache is None or not self.cache.caches(endpoint.name):
+            return MISSING  # Not counted as a miss, the cache never keeps the endpoint
+        content = self.cache.get(endpoint.name, *args)
+        return content if content is MISSING else self._load(endpoint, content)
+
+    def _store(self: BaseClient, content: bytes, generation: Optional[int], endpoint: str, *args: Hashable) -> None:
+        """Cache the response body of the endpoint for the ids, unless a write invalidated the cache meanwhile."""
+
+        if self.cache is not None:
+            self.cache.set(content, endpoint, *args, generation=generation)
+
+    def _forget(self: BaseClient, endpoint: str, *args: Hashable) -> None:
+        """Forget the reads of the endpoint for the ids a write made stale, every read of the endpoint without ids."""
+
+        if self.cache is not None:
+            self.cache.invalidate(endpoint, *args)
+
+    def _invalidate_session(self: BaseClient, session_id: str) -> None:
+        """Forget cached reads that a write to the session made stale."""
+
+        self._forget("get_session", session_id)
+        self._forget("get_sessions")
+
+    def _invalidate_recording(self: BaseClient, recording_id: str) -> None:
+        """Forget cached reads that a write to the recording made stale."""
+
+        self._forget("get_recording", recording_id)
+        self._forget("get_recordings")
+        # Recording ids are "<SESSION_ID>" or "<SESSION_ID>~<N>", the session carries a recording flag
+        self._invalidate_session(recording_id.split("~", 1)[0])
+
+    def _invalidate_listings(self: BaseClient, kind: str) -> None:
+        """Forget the cached listings a new session or recording made stale."""
+
+        self._forget("get_sessions")
+        if kind == "recordings":
+            # The session of a started recording is in the body only, every session may carry its recording flag
+            self._forget("get_recordings")
+            self._forget("get_session")
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import threading
+from concurrent.futures import Future
+from contextvars import Context, copy_context
+from functools import wraps
+from typing import Any, Awaitable, Callable, Coroutine, Iterator, Optional
+from weakref import WeakSet
+
+from .asyncclient import AsyncOpenViduClient
+from .endpoints import Endpoint, bind
+
+# Coroutines of AsyncOpenViduClient beside the generated API ones, forwarded by the facades
+FORWARDED = (
+    "create_sessions",
+    "create_connections",
+    "delete_connections",
+    "get_sessions_by_id",
+    "delete_sessions",
+    "wait_for_recording",
+    "download_recording",
+)
+
+
+async def _in_context(context: Context, coroutine: Awaitable) -> Any:
+    """Await the coroutine with the context variables of the calling thread, e.g. the call priority."""
+
+    for variable, value in context.items():
+        variable.set(value)
+    return await coroutine
+
+
+class EventLoopThread(object):
+    """
+    Introduction: Event loop running forever on a daemon thread, started on first use.
+    Objective: Run the coroutines submitted from any thread on one loop, so they share its connection pools.
+    Params: Name of the thread
+    """
+
+    _default: Optional[EventLoopThread] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self: EventLoopThread, name: str = "openviduconnect-loop") -> None:
+        """
+        @:param name: Name of the thread (Default: "openviduconnect-loop")
+        """
+
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.clients: WeakSet = WeakSet()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._registered = False
+
+    def __repr__(self):
+        """."""
+
+        return "<%s %s %s>" % (self.__class__.__name__, self.name, "running" if self.running else "stopped")
+
+    @classmethod
+    def default(cls) -> EventLoopThread:
+        """Loop thread shared by every facade of the process."""
+
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    @property
+    def running(self: EventLoopThread) -> bool:
+        """."""
+
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self: EventLoopThread) -> asyncio.AbstractEventLoop:
+        """Start the thread unless it runs already, return its loop."""
+
+        if self.running:
+            return self.loop
+        with self._lock:
+            if not self.running:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(loop, ready), name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+                self.loop = loop
+                if not self._registered:
+                    atexit.register(self.stop)
+                    self._registered = True
+        return self.loop
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop, ready: threading.Event) -> None:
+        """."""
+
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def submit(self: EventLoopThread, coroutine: Coroutine) -> Future:
+        """Schedule the coroutine on the loop, from any thread but the loop's own."""
+
+        loop = self.start()
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError("Blocking on the loop thread from the loop thread itself would never return")
+        return asyncio.run_coroutine_threadsafe(_in_context(copy_context(), coroutine), loop)
+
+    def run(self: EventLoopThread, coroutine: Coroutine) -> Any:
+        """Run the coroutine on the loop and block the calling thread until its result."""
+
+        future = self.submit(coroutine)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()  # E.g. KeyboardInterrupt in the waiting thread, no-op once the coroutine finished
+            raise
+
+    async def arun(self: EventLoopThread, coroutine: Coroutine) -> Any:
+        """Await the coroutine run on the loop, from a coroutine of any event loop."""
+
+        if self.running and asyncio.get_event_loop() is self.loop:
+            return await coroutine
+        return await asyncio.wrap_future(self.submit(coroutine))
+
+    def stop(self: EventLoopThread, timeout: float = 5.0) -> None:
+        """Close the clients running on the loop, then stop it, called at interpreter exit too."""
+
+        if not self.running:
+            return
+        for client in list(self.clients):
+            try:
+                self.submit(client.aclose()).result(timeout)
+            except Exception:
+                pass  # Exiting anyway, the connections go with the process
+        thread = self._thread
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        thread.join(timeout)
+
+
+class _AsyncFacade(object):
+    """API coroutines of a bridged client awaitable from any event loop, run on the loop thread of the bridge."""
+
+    def __init__(self: _AsyncFacade, bridge: EventLoopThread, client: AsyncOpenViduClient) -> None:
+        """."""
+
+        self._bridge = bridge
+        self._client = client
+
+    def __repr__(self):
+        """."""
+
+        return "<%s %r>" % (self.__class__.__name__, self._client)
+
+
+class BridgedOpenViduClient(object):
+    """
+    Introduction: Blocking client of the REST APIs running an AsyncOpenViduClient on a background event loop.
+    Objective: Let threads and coroutines of one process share one connection pool, cache and limiter.
+    Params: Same as BaseClient, or the AsyncOpenViduClient to run, and the loop thread
+    """
+
+    def __init__(
+        self: BridgedOpenViduClient,
+        *args: Any,
+        client: AsyncOpenViduClient = None,
+        bridge: EventLoopThread = None,
+        **kwargs: Any
+    ) -> None:
+        """
+        Same parameters as BaseClient.
+        @:param client: AsyncOpenViduClient to run instead of one built from the parameters (Default: None)
+        @:param bridge: Loop thread running the client (Default: EventLoopThread.default())
+        """
+
+        self.async_client = AsyncOpenViduClient(*args, **kwargs) if client is None else client
+        self.bridge = EventLoopThread.default() if bridge is None else bridge
+        self.bridge.clients.add(self.async_client)
+        # Same client for the coroutines of the process, whichever loop they run on
+        self.aio = _AsyncFacade(self.bridge, self.async_client)
+
+    def __repr__(self):
+        """."""
+
+        return "<%s %r>" % (self.__class__.__name__, self.async_client)
+
+    def __enter__(self):
+        """."""
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """."""
+
+        self.close()
+
+    def close(self: BridgedOpenViduClient) -> None:
+        """Close the pooled HTTP client on the loop, a later call opens a fresh one."""
+
+        if self.bridge.running:
+            self.bridge.run(self.async_client.aclose())
+
+    def iter_sessions(self: BridgedOpenViduClient, projection: Any = None) -> Iterator[Any]:
+        """Sessions of the server, each one handed over from the loop as the response streams in."""
+
+        return self._iterate(self.async_client.iter_sessions(projection))
+
+    def iter_recordings(self: BridgedOpenViduClient, projection: Any = None) -> Iterator[Any]:
+        """Recordings of the server, each one handed over from the loop as the response streams in."""
+
+        return self._iterate(self.async_client.iter_recordings(projection))
+
+    def _iterate(self: BridgedOpenViduClient, iterator: Any) -> Iterator[Any]:
+        """."""
+
+        try:
+            while True:
+                try:
+                    yield self.bridge.run(iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.bridge.run(iterator.aclose())
+
+
+def _method(endpoint: Endpoint) -> Callable:
+    """API method of BridgedOpenViduClient for the endpoint."""
+
+    def method(self: BridgedOpenViduClient, *args: str, **kwargs: Any) -> Any:
+        return self.bridge.run(getattr(self.async_client, endpoint.name)(*args, **kwargs))
+
+    return method
+
+
+def _coroutine(endpoint: Endpoint) -> Callable:
+    """API coroutine of the async facade of BridgedOpenViduClient for the endpoint."""
+
+    async def method(self: _AsyncFacade, *args: str, **kwargs: Any) -> Any:
+        return await self._bridge.arun(getattr(self._client, endpoint.name)(*args, **kwargs))
+
+    return method
+
+
+def _forward(name: str) -> Callable:
+    """Blocking method running the AsyncOpenViduClient coroutine of that name."""
+
+    @wraps(getattr(AsyncOpenViduClient, name))
+    def method(self: BridgedOpenViduClient, *args: Any, **kwargs: Any) -> Any:
+        return self.bridge.run(getattr(self.async_client, name)(*args, **kwargs))
+
+    return method
+
+
+def _aforward(name: str) -> Callable:
+    """Coroutine of the async facade running the AsyncOpenViduClient coroutine of that name."""
+
+    @wraps(getattr(AsyncOpenViduClient, name))
+    async def method(self: _AsyncFacade, *args: Any, **kwargs: Any) -> Any:
+        return await self._bridge.arun(getattr(self._client, name)(*args, **kwargs))
+
+    return method
+
+
+bind(BridgedOpenViduClient, _method)
+bind(_AsyncFacade, _coroutine)
+for _name in FORWARDED:
+    setattr(BridgedOpenViduClient, _name, _forward(_name))
+    setattr(_AsyncFacade, _name, _aforward(_name))
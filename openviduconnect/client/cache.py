@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Dict, Hashable, Tuple
+
+MISSING = object()
+
+
+class ResponseCache(object):
+    """
+    Introduction: In-process read cache for the lookup endpoints of the clients.
+    Objective: Serve repeated reads of the same ids without a REST round trip.
+    Params: Size bound of the LRU and the per-endpoint time to live in seconds
+    """
+
+    DEFAULT_TTL = {
+        "get_session": 1.0,
+        "get_sessions": 1.0,
+        "get_recording": 5.0,
+    }
+
+    def __init__(self: ResponseCache, maxsize: int = 1024, ttl: Dict[str, float] = None) -> None:
+        """
+        @:param maxsize: Maximum number of entries, least recently used are evicted first (Default: 1024)
+        @:param ttl: Seconds to keep the responses of each endpoint, overrides DEFAULT_TTL (Default: None)
+        """
+
+        self._maxsize = maxsize
+        self._ttl = dict(self.DEFAULT_TTL, **(ttl or {}))
+        self._entries: OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped by every invalidation, read before a request so that set() can tell whether one overlapped it
+        self.generation = 0
+        # Generation of the last invalidation of each key, the oldest forgotten past maxsize raise the floor
+        self._invalidated: OrderedDict[Tuple[Hashable, ...], int] = OrderedDict()
+        self._floor = 0
+
+    def __len__(self: ResponseCache) -> int:
+        """."""
+
+        return len(self._entries)
+
+    def __repr__(self):
+        """."""
+
+        return "<%s hits=%d misses=%d evictions=%d size=%d>" % (
+            self.__class__.__name__, self.hits, self.misses, self.evictions, len(self._entries)
+        )
+
+    @property
+    def stats(self: ResponseCache) -> dict:
+        """Counters of the cache since creation or the last clear."""
+
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._entries)}
+
+    def caches(self: ResponseCache, endpoint: str) -> bool:
+        """Whether the responses of the endpoint are kept, i.e. it has a TTL."""
+
+        return bool(self._ttl.get(endpoint))
+
+    def get(self: ResponseCache, endpoint: str, *args: Hashable) -> Any:
+        """Fresh cached response for the endpoint and ids, MISSING otherwise."""
+
+        key = (endpoint,) + args
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            if entry[0] <= monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self: ResponseCache, value: Any, endpoint: str, *args: Hashable, generation: int = None) -> Any:
+        """
+        Keep the response for the TTL of the endpoint and hand it back.
+        With the generation read before the request, a response an invalidation of its key raced with is not kept.
+        """
+
+        ttl = self._ttl.get(endpoint)
+        if not ttl:
+            return value
+
+        key = (endpoint,) + args
+        with self._lock:
+            if generation is not None and self._stale(key, generation):
+                return value
+            self._entries[key] = (monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def _stale(self: ResponseCache, key: Tuple[Hashable, ...], generation: int) -> bool:
+        """Whether the key, or its whole endpoint, was invalidated after the generation."""
+
+        if generation < self._floor:
+            return True
+        return max(self._invalidated.get(key, 0), self._invalidated.get(key[:1], 0)) > generation
+
+    def invalidate(self: ResponseCache, endpoint: str, *args: Hashable) -> None:
+        """Drop the entry of the endpoint and ids, or every entry of the endpoint when no ids are given."""
+
+        with self._lock:
+            self.generation += 1
+            key = (endpoint,) + args
+            self._invalidated[key] = self.generation
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self._maxsize:
+                self._floor = max(self._floor, self._invalidated.popitem(last=False)[1])
+            if args:
+                self._entries.pop((endpoint,) + args, None)
+                return
+            for key in [key for key in self._entries if key[0] == endpoint]:
+                del self._entries[key]
+
+    def clone(self: ResponseCache) -> ResponseCache:
+        """Empty cache with the same size bound and TTLs, for a client that must not share these entries."""
+
+        return self.__class__(self._maxsize, self._ttl)
+
+    def clear(self: ResponseCache) -> None:
+        """Drop every entry and reset the counters."""
+
+        with self._lock:
+            self.generation += 1
+            self._floor = self.generation
+            self._invalidated.clear()
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover - optional dependency
+    ujson = None
+
+
+class JSONCodec(object):
+    """Standard library codec, always available"""
+
+    name = "json"
+
+    @staticmethod
+    def dumps(data: Any) -> bytes:
+        """."""
+
+        return json.dumps(data, separators=(",", ":")).encode()
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        """."""
+
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """orjson codec, encodes to and decodes from bytes natively (pip install orjson)"""
+
+    name = "orjson"
+
+    @staticmethod
+    def dumps(data: Any) -> bytes:
+        """."""
+
+        return orjson.dumps(data)
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        """."""
+
+        return orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    """ujson codec, decodes bytes natively (pip install ujson)"""
+
+    name = "ujson"
+
+    @staticmethod
+    def dumps(data: Any) -> bytes:
+        """."""
+
+        return ujson.dumps(data, ensure_ascii=False).encode()
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        """."""
+
+        return ujson.loads(data)
+
+
+CODECS: Dict[str, JSONCodec] = {"json": JSONCodec()}
+if ujson is not None:
+    CODECS["ujson"] = UjsonCodec()
+if orjson is not None:
+    CODECS["orjson"] = OrjsonCodec()
+
+
+def get_codec(codec: Union[str, JSONCodec] = None) -> JSONCodec:
+    """Codec by name, or the fastest installed one (orjson, ujson, then json) when no codec is given."""
+
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec is None:
+        for name in ("orjson", "ujson", "json"):
+            if name in CODECS:
+                return CODECS[name]
+    if codec not in CODECS:
+        raise ValueError("JSON codec %r is not installed, available: %s" % (codec, ", ".join(sorted(CODECS))))
+    return CODECS[codec]
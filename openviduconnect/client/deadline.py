@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import Any, Awaitable, Iterator, Optional, Union
+
+from httpx import USE_CLIENT_DEFAULT, ConnectTimeout, PoolTimeout, ReadTimeout, Timeout, TransportError, WriteTimeout
+
+from ..exceptions import DeadlineExceededError
+
+# Monotonic time by which the calls of the current context must be done, set with deadline()
+current_deadline: ContextVar[Optional[float]] = ContextVar("openviduconnect_deadline", default=None)
+
+# Phase of the httpx.Timeout each timeout error ran out of
+_PHASES = ((ConnectTimeout, "connect"), (ReadTimeout, "read"), (WriteTimeout, "write"), (PoolTimeout, "pool"))
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    Bound every call of the block, and of the tasks it starts, to `seconds` from now, retries and waits included.
+    A deadline inside another one can only shorten it, None keeps the current one.
+    """
+
+    if seconds is None:
+        yield current_deadline.get()
+        return
+    at = monotonic() + seconds
+    outer = current_deadline.get()
+    if outer is not None and outer < at:
+        at = outer
+    token = current_deadline.set(at)
+    try:
+        yield at
+    finally:
+        current_deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, None without one."""
+
+    at = current_deadline.get()
+    return None if at is None else at - monotonic()
+
+
+def check() -> Optional[float]:
+    """Seconds left before the current deadline, raise DeadlineExceededError once it passed."""
+
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError("Deadline exceeded by %.3f seconds" % (-left,))
+    return left
+
+
+def cap(timeout: Optional[float]) -> Optional[float]:
+    """The shorter of `timeout` and the time left before the current deadline."""
+
+    left = remaining()
+    if left is None:
+        return timeout
+    return max(0.0, left if timeout is None else min(timeout, left))
+
+
+def attempt_timeout(timeout: Timeout, left: Optional[float]) -> Union[Timeout, Any]:
+    """Timeout of one attempt: each phase of `timeout` shortened to the time left, the client's own without deadline."""
+
+    if left is None:
+        return USE_CLIENT_DEFAULT
+    return Timeout(
+        connect=_shorter(timeout.connect, left),
+        read=_shorter(timeout.read, left),
+        write=_shorter(timeout.write, left),
+        pool=_shorter(timeout.pool, left),
+    )
+
+
+def exceeded(error: TransportError, timeout: Timeout, left: Optional[float]) -> bool:
+    """Whether a timeout error of an attempt comes from the deadline rather than the timeout of the client."""
+
+    if left is None:
+        return False
+    for error_class, phase in _PHASES:
+        if isinstance(error, error_class):
+            configured = getattr(timeout, phase)
+            return configured is None or left < configured
+    return remaining() <= 0
+
+
+async def within(awaitable: Awaitable, waiting: str = "a request slot") -> Any:
+    """Await a wait of the call, e.g. for a slot of the scheduler, no longer than the current deadline."""
+
+    left = check()
+    if left is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except asyncio.TimeoutError:
+        raise DeadlineExceededError("Deadline exceeded while waiting for %s" % (waiting,))
+
+
+def _shorter(configured: Optional[float], left: float) -> float:
+    """."""
+
+    return left if configured is None else min(configured, left)
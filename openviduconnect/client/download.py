@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import json
+import os
+from threading import Lock
+from typing import Any, Callable, List, Optional
+from urllib.parse import urlsplit
+
+from httpx import Response
+
+from .waiter import field
+from ..exceptions import RecordingNotCompletedError
+from ..exceptions.base import Error
+
+CHUNK_SIZE = 1 << 20
+PART = ".part"
+SEGMENTS = ".segments"
+
+# Called with (bytes written, total bytes or None when the server does not tell)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+def recording_url(recording: Any) -> str:
+    """URL of the media file of a recording, only set once it is ready."""
+
+    url = field(recording, "url")
+    if not url:
+        raise RecordingNotCompletedError("Recording %s is %s, its file is not available yet" % (
+            field(recording, "id"), field(recording, "status")
+        ))
+    return url
+
+
+def destination(dest: str, url: str) -> str:
+    """File path to write to, named after the URL when `dest` is a directory."""
+
+    if os.path.isdir(dest):
+        return os.path.join(dest, os.path.basename(urlsplit(url).path))
+    return dest
+
+
+def same_origin(url: str, host: str) -> bool:
+    """Whether the URL is on the OpenVidu host, the only one the Basic credentials of the client are sent to."""
+
+    ports = {"http": 80, "https": 443}
+    target, origin = urlsplit(url), urlsplit(host)
+    return (target.scheme, target.hostname, target.port or ports.get(target.scheme)) == (
+        origin.scheme, origin.hostname, origin.port or ports.get(origin.scheme)
+    )
+
+
+def range_header(start: int, end: int = None) -> str:
+    """Value of the Range header of the bytes start to end, both included."""
+
+    return "bytes=%d-%s" % (start, "" if end is None else end)
+
+
+def content_length(response: Response) -> Optional[int]:
+    """Size of the whole file answered by a HEAD, 200 or 206 response."""
+
+    content_range = response.headers.get("Content-Range", "")
+    if "/" in content_range and not content_range.endswith("/*"):
+        return int(content_range.rsplit("/", 1)[1])
+    length = response.headers.get("Content-Length")
+    return None if length is None or response.status_code == 206 else int(length)
+
+
+def accepts_ranges(response: Response) -> bool:
+    """."""
+
+    return response.headers.get("Accept-Ranges", "").lower() == "bytes"
+
+
+def finish(part: str, path: str) -> str:
+    """Move the complete download in place and drop its resume state."""
+
+    os.replace(part, path)
+    if os.path.exists(part + SEGMENTS):
+        os.remove(part + SEGMENTS)
+    return path
+
+
+class Progress(object):
+    """Bytes written over every segment of a download, reported to the callback."""
+
+    __slots__ = ("callback", "total", "done", "_lock")
+
+    def __init__(self: Progress, callback: Optional[ProgressCallback], total: int = None, done: int = 0) -> None:
+        """."""
+
+        self.callback = callback
+        self.total = total
+        self.done = done
+        self._lock = Lock()
+
+    def add(self: Progress, count: int) -> None:
+        """."""
+
+        with self._lock:
+            self.done += count
+            if self.callback is not None:
+                self.callback(self.done, self.total)
+
+
+class Segment(object):
+    """Byte range start to end (included, None for until the end) of a download, `done` bytes of it are written."""
+
+    __slots__ = ("start", "end", "done")
+
+    def __init__(self: Segment, start: int, end: Optional[int], done: int = 0) -> None:
+        """."""
+
+        self.start = start
+        self.end = end
+        self.done = done
+
+    @property
+    def offset(self: Segment) -> int:
+        """Next byte to write."""
+
+        return self.start + self.done
+
+    @property
+    def complete(self: Segment) -> bool:
+        """."""
+
+        return self.end is not None and self.offset > self.end
+
+    def headers(self: Segment) -> Optional[dict]:
+        """Range request of the bytes left, None for the whole file."""
+
+        if not self.offset and self.end is None:
+            return None
+        return {"Range": range_header(self.offset, self.end)}
+
+
+class SegmentPlan(object):
+    """
+    Byte ranges of a parallel download written in place into one preallocated part file.
+    Their progress is kept next to it, so an interrupted download resumes every range where it stopped.
+    """
+
+    def __init__(self: SegmentPlan, part: str, size: int, count: int) -> None:
+        """Resume the plan left by an interrupted download of the same size, plan `count` ranges otherwise."""
+
+        self.part = part
+        self.size = size
+        self.segments = self._load() or self._plan(count)
+        if not os.path.exists(part):
+            with open(part, "wb") as file:
+                file.truncate(size)
+
+    @property
+    def done(self: SegmentPlan) -> int:
+        """."""
+
+        return sum(segment.done for segment in self.segments)
+
+    def _plan(self: SegmentPlan, count: int) -> List[Segment]:
+        """."""
+
+        step = -(-self.size // count)
+        if os.path.exists(self.part):
+            os.remove(self.part)  # Left by a download without this plan, its content cannot be trusted
+        return [Segment(start, min(start + step, self.size) - 1) for start in range(0, self.size, step)]
+
+    def _load(self: SegmentPlan) -> Optional[List[Segment]]:
+        """."""
+
+        try:
+            with open(self.part + SEGMENTS) as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if state.get("size") != self.size or not os.path.exists(self.part):
+            return None
+        return [Segment(*segment) for segment in state["segments"]]
+
+    def save(self: SegmentPlan) -> None:
+        """."""
+
+        with open(self.part + SEGMENTS, "w") as file:
+            json.dump({
+                "size": self.size,
+                "segments": [[segment.start, segment.end, segment.done] for segment in self.segments],
+            }, file)
+
+
+def plan(part: str, head: Optional[Response], segments: int, chunk_size: int) -> Optional[SegmentPlan]:
+    """Plan of a parallel download from the HEAD response of the file, None when a single stream fits better."""
+
+    if head is not None and head.status_code == 200 and accepts_ranges(head):
+        size = content_length(head)
+        if size is not None and size >= 2 * chunk_size:
+            return SegmentPlan(part, size, max(1, min(segments, size // chunk_size)))
+    if os.path.exists(part + SEGMENTS):
+        # A parallel download of a file that changed or lost its range support, start over
+        os.remove(part + SEGMENTS)
+        if os.path.exists(part):
+            os.remove(part)
+    return None
+
+
+def open_mode(response: Response, segment: Segment, progress: Progress) -> Optional[str]:
+    """File mode to write the response of the segment with, None when nothing is left to write."""
+
+    if response.status_code == 416 and segment.end is None:
+        return None  # The part file already holds every byte
+    response.raise_for_status()
+    if progress.total is None:
+        progress.total = content_length(response)
+    if response.status_code == 206:
+        return "r+b"
+    if segment.end is not None:
+        raise Error("The server ignored the Range header of a segmented download")
+    # The server ignored the Range header, the whole file comes again
+    progress.add(-segment.done)
+    segment.done = 0
+    return "wb"
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+from inspect import Parameter, Signature
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from .scheduler import BACKGROUND, INTERACTIVE, NORMAL
+from ..exceptions import (
+    SessionBodyParameterError,
+    SessionExistsError,
+    SessionNotFoundError,
+    ConnectionBodyParameterError,
+    ConnectionIPCAMError,
+    SessionDoesNotExistError,
+    ConnectionNotFound,
+    SessionOrConnectionDoesNotExist,
+    RecordingBodyParameterError,
+    RecordingResolutionOrBrowserSettingsError,
+    RecordingNoConnectedParticipantsError,
+    RecordingNotConfiguredForMediaNodeError,
+    RecordingDisabledOnServerError,
+    RecordingNotFoundError,
+    RecordingStartingProgressError,
+    RecordingNotCompletedError,
+)
+from ..exceptions.base import OpenViduError
+from ..models import Connection, Model, Recording, Session
+
+ErrorMap = Dict[int, Tuple[Type[OpenViduError], str]]
+
+RECORDING_DISABLED = (
+    RecordingDisabledOnServerError,
+    "OpenVidu Server recording module is disabled: OPENVIDU_RECORDING configuration property is set to false",
+)
+
+
+class Endpoint(object):
+    """
+    Introduction: Declaration of one REST API of the OpenVidu Server.
+    Objective: Both clients build their methods, URLs and error dispatch from these declarations.
+    Params: Method name, HTTP method, path template relative to /openvidu/api/ and the status to error map
+    """
+
+    __slots__ = (
+        "name", "method", "path", "params", "body", "errors", "model", "page", "invalidates", "query", "projection",
+        "priority", "doc",
+    )
+
+    def __init__(
+        self: Endpoint,
+        name: str,
+        method: str,
+        path: str,
+        params: Tuple[str, ...] = (),
+        body: bool = False,
+        errors: ErrorMap = None,
+        model: Type[Model] = None,
+        page: bool = False,
+        invalidates: str = None,
+        query: Dict[str, str] = None,
+        projection: bool = False,
+        priority: str = NORMAL,
+        doc: str = ".",
+    ) -> None:
+        """
+        @:param name: Name of the client method
+        @:param method: HTTP method
+        @:param path: Path relative to the API root, "{0}", "{1}" are replaced by the path parameters
+        @:param params: Names of the path parameters, in order
+        @:param body: Whether the keyword arguments of the method are sent as the JSON body (Default: False)
+        @:param errors: Status code to (error class, message) raised for it (Default: None)
+        @:param model: Model of the response when models are enabled (Default: None)
+        @:param page: Whether the response is a page of `model` objects (Default: False)
+        @:param invalidates: "session" or "recording", cached reads of the first path parameter made stale,
+            "sessions" or "recordings", cached listings a new object made stale (Default: None)
+        @:param query: Keyword argument to query parameter of the flags the endpoint accepts (Default: None)
+        @:param projection: Whether the method takes a projection= of the response fields (Default: False)
+        @:param priority: Class of the calls in the scheduler of the async client (Default: NORMAL)
+        @:param doc: Docstring of the generated method (Default: ".")
+        """
+
+        self.name = name
+        self.method = method
+        self.path = path
+        self.params = params
+        self.body = body
+        self.errors: ErrorMap = errors or {}
+        self.model = model
+        self.page = page
+        self.invalidates = invalidates
+        self.query: Dict[str, str] = query or {}
+        self.projection = projection
+        self.priority = priority
+        self.doc = doc
+
+    def __repr__(self):
+        """."""
+
+        return "<%s %s %s /%s>" % (self.__class__.__name__, self.name, self.method, self.path)
+
+    def signature(self: Endpoint) -> Signature:
+        """Signature of the generated method, for help() and IDEs."""
+
+        parameters = [Parameter("self", Parameter.POSITIONAL_OR_KEYWORD)]
+        parameters += [Parameter(name, Parameter.POSITIONAL_OR_KEYWORD, annotation=str) for name in self.params]
+        parameters += [
+            Parameter(name, Parameter.KEYWORD_ONLY, default=None, annotation=Optional[bool]) for name in self.query
+        ]
+        if self.projection:
+            parameters.append(Parameter("projection", Parameter.KEYWORD_ONLY, default=None, annotation=Any))
+        parameters.append(Parameter("priority", Parameter.KEYWORD_ONLY, default=None, annotation=Optional[str]))
+        parameters.append(Parameter("deadline", Parameter.KEYWORD_ONLY, default=None, annotation=Optional[float]))
+        if self.body:
+            parameters.append(Parameter("kwargs", Parameter.VAR_KEYWORD, annotation=Any))
+        return Signature(parameters, return_annotation=Optional[dict])
+
+
+# Flags of the session reads, left out of the query unless given
+SESSION_QUERY = {"pending_connections": "pendingConnections", "web_rtc_stats": "webRtcStats"}
+
+ENDPOINTS: Tuple[Endpoint, ...] = (
+    Endpoint(
+        "create_session", "POST", "sessions", body=True, model=Session, invalidates="sessions", priority=INTERACTIVE,
+        errors={
+            400: (SessionBodyParameterError, "Problem with some body parameter"),
+            409: (SessionExistsError, "Parameter customSessionId corresponds to an existing Session"),
+        },
+        doc="Initialize a Session, the keyword arguments are the body parameters.",
+    ),
+    Endpoint(
+        "get_session", "GET", "sessions/{0}", params=("session_id",), model=Session, query=SESSION_QUERY,
+        projection=True,
+        errors={404: (SessionNotFoundError, "No Session exists for the passed SESSION_ID")},
+        doc="Retrieve a Session.",
+    ),
+    Endpoint(
+        "get_sessions", "GET", "sessions", model=Session, page=True, query=SESSION_QUERY, projection=True,
+        priority=BACKGROUND,
+        doc="Retrieve all Sessions.",
+    ),
+    Endpoint(
+        "delete_session", "DELETE", "sessions/{0}", params=("session_id",), invalidates="session",
+        errors={404: (SessionNotFoundError, "No Session exists for the passed SESSION_ID")},
+        doc="Close a Session.",
+    ),
+    Endpoint(
+        "create_connection", "POST", "sessions/{0}/connection", params=("session_id",), body=True,
+        model=Connection, invalidates="session", priority=INTERACTIVE,
+        errors={
+            400: (ConnectionBodyParameterError, "Problem with some body parameter"),
+            404: (SessionNotFoundError, "No session exists for the passed SESSION_ID"),
+            500: (ConnectionIPCAMError, "Unexpected error when creating the Connection object"),
+        },
+        doc="Create a Connection in the Session, the keyword arguments are the body parameters.",
+    ),
+    Endpoint(
+        "get_connection", "GET", "sessions/{0}/connection/{1}", params=("session_id", "connection_id"),
+        model=Connection,
+        errors={
+            400: (SessionDoesNotExistError, "No Session exists for the passed SESSION_ID"),
+            404: (ConnectionNotFound, "No Connection exists for the passed CONNECTION_ID"),
+        },
+        doc="Retrieve a Connection of the Session.",
+    ),
+    Endpoint(
+        "get_connections", "GET", "sessions/{0}/connection", params=("session_id",), model=Connection, page=True,
+        projection=True,
+        errors={404: (SessionNotFoundError, "No Session exists for the passed SESSION_ID")},
+        doc="Retrieve all Connections of the Session.",
+    ),
+    Endpoint(
+        "update_connection", "PATCH", "sessions/{0}/connection/{1}", params=("session_id", "connection_id"),
+        body=True, model=Connection, invalidates="session",
+        errors={
+            400: (ConnectionBodyParameterError, "Problem with some body parameter"),
+            404: (
+                SessionOrConnectionDoesNotExist,
+                "No Session exists for the passed SESSION_ID, or no Connection exists for the passed CONNECTION_ID",
+            ),
+        },
+        doc="Modify a Connection of the Session, the keyword arguments are the body parameters.",
+    ),
+    Endpoint(
+        "delete_connection", "DELETE", "sessions/{0}/connection/{1}", params=("session_id", "connection_id"),
+        invalidates="session",
+        errors={
+            400: (SessionDoesNotExistError, "No Session exists for the passed SESSION_ID"),
+            404: (ConnectionNotFound, "No Connection for the passed CONNECTION_ID"),
+        },
+        doc="Force the disconnection of a Connection of the Session.",
+    ),
+    Endpoint(
+        "start_recording", "POST", "recordings/start", body=True, model=Recording, invalidates="recordings",
+        errors={
+            400: (RecordingBodyParameterError, "Problem with some body parameter"),
+            404: (SessionNotFoundError, "No session exists for the passed session body parameter"),
+            406: (RecordingNoConnectedParticipantsError, "The session has no connected participants"),
+            409: (
+                RecordingNotConfiguredForMediaNodeError,
+                "The session is not configured for using MediaMode ROUTED or it is already being recorded",
+            ),
+            422: (
+                RecordingResolutionOrBrowserSettingsError,
+                "resolution parameter exceeds acceptable values (for both width and height, min 100px and max "
+                "1999px) or trying to start a recording with both hasAudio and hasVideo to false",
+            ),
+            501: RECORDING_DISABLED,
+        },
+        doc="Start the recording of a Session, the keyword arguments are the body parameters.",
+    ),
+    Endpoint(
+        "stop_recording", "POST", "recordings/stop/{0}", params=("recording_id",), model=Recording,
+        invalidates="recording",
+        errors={
+            404: (RecordingNotFoundError, "No recording exists for the passed RECORDING_ID"),
+            406: (
+                RecordingStartingProgressError,
+                "Recording has starting status. Wait until started status before stopping the recording",
+            ),
+            501: RECORDING_DISABLED,
+        },
+        doc="Stop the recording.",
+    ),
+    Endpoint(
+        "get_recording", "GET", "recordings/{0}", params=("recording_id",), model=Recording,
+        errors={
+            404: (RecordingNotFoundError, "No recording exists for the passed RECORDING_ID"),
+            501: RECORDING_DISABLED,
+        },
+        doc="Retrieve a recording.",
+    ),
+    Endpoint(
+        "get_recordings", "GET", "recordings", model=Recording, page=True, projection=True, priority=BACKGROUND,
+        errors={501: RECORDING_DISABLED},
+        doc="Retrieve all recordings.",
+    ),
+    Endpoint(
+        "delete_recording", "DELETE", "recordings/{0}", params=("recording_id",), invalidates="recording",
+        errors={
+            404: (RecordingNotFoundError, "No recording exists for the passed RECORDING_ID"),
+            409: (RecordingNotCompletedError, "The recording has started status. Stop it before deletion"),
+            501: RECORDING_DISABLED,
+        },
+        doc="Delete a recording.",
+    ),
+)
+
+ENDPOINTS_BY_NAME: Dict[str, Endpoint] = {endpoint.name: endpoint for endpoint in ENDPOINTS}
+
+
+def bind(cls: type, factory: Callable[[Endpoint], Callable]) -> type:
+    """Add the method built by `factory` for every endpoint to the client class."""
+
+    for endpoint in ENDPOINTS:
+        method = factory(endpoint)
+        method.__name__ = endpoint.name
+        method.__qualname__ = "%s.%s" % (cls.__name__, endpoint.name)
+        method.__doc__ = endpoint.doc
+        method.__signature__ = endpoint.signature()
+        setattr(cls, endpoint.name, method)
+    return cls
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from threading import Event, Lock
+from time import monotonic, sleep
+from typing import Deque, Dict, List, Optional
+
+# Answers telling the server is overloaded, on top of the transport errors and timeouts
+CONGESTION_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class _Waiter(object):
+    """Caller queued for a concurrency slot, a blocked thread or a pending coroutine of any event loop."""
+
+    __slots__ = ("event", "loop", "future", "granted")
+
+    def __init__(self: _Waiter, loop: asyncio.AbstractEventLoop = None) -> None:
+        """."""
+
+        self.loop = loop
+        self.event = Event() if loop is None else None
+        self.future = None if loop is None else loop.create_future()
+        self.granted = False
+
+    def wake(self: _Waiter) -> None:
+        """Hand the slot over, from whichever thread released it."""
+
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self: _Waiter) -> None:
+        """."""
+
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdaptiveLimiter(object):
+    """
+    Introduction: Limiter of the outbound requests to one OpenVidu host, usable from threads and event loops alike.
+    Objective: Pace requests with a token bucket and bound them in flight with a limit following the server health,
+    cut multiplicatively on 5xx, transport errors or slow answers and grown back additively while healthy (AIMD).
+    Params: Requests per second, burst, bounds of the concurrency limit and the latency counted as congestion
+    """
+
+    _hosts: Dict[str, AdaptiveLimiter] = {}
+    _hosts_lock = Lock()
+
+    def __init__(
+        self: AdaptiveLimiter,
+        rate: float = None,
+        burst: int = None,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        latency_target: float = 1.0,
+        backoff: float = 0.7,
+    ) -> None:
+        """
+        @:param rate: Requests per second let through, None for no pacing (Default: None)
+        @:param burst: Requests let through at once after an idle period (Default: rate, at least 1)
+        @:param initial_limit: Requests in flight allowed at start (Default: 10)
+        @:param min_limit: Floor of the concurrency limit (Default: 1)
+        @:param max_limit: Ceiling of the concurrency limit (Default: 100)
+        @:param latency_target: Seconds above which an answer counts as congestion (Default: 1.0)
+        @:param backoff: Factor applied to the limit on congestion, at most once per latency_target (Default: 0.7)
+        """
+
+        self.rate = rate
+        self.burst = max(1, rate or 1) if burst is None else burst
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.in_flight = 0
+        self.decreases = 0
+        self._limit = float(initial_limit)
+        self._tokens = float(self.burst)
+        self._updated = monotonic()
+        self._decreased_at = 0.0
+        self._pacing = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = Lock()
+
+    def __repr__(self):
+        """."""
+
+        return "<%s limit=%d in_flight=%d queued=%d>" % (
+            self.__class__.__name__, self.limit, self.in_flight, self.queue_depth
+        )
+
+    @classmethod
+    def for_host(cls, host: str, **kwargs) -> AdaptiveLimiter:
+        """Limiter shared by every client of the host, created with `kwargs` by the first caller."""
+
+        with cls._hosts_lock:
+            limiter = cls._hosts.get(host)
+            if limiter is None:
+                limiter = cls._hosts[host] = cls(**kwargs)
+            return limiter
+
+    @property
+    def limit(self: AdaptiveLimiter) -> int:
+        """Requests currently allowed in flight."""
+
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def queue_depth(self: AdaptiveLimiter) -> int:
+        """Callers waiting for a token or a concurrency slot."""
+
+        return self._pacing + len(self._waiters)
+
+    @property
+    def stats(self: AdaptiveLimiter) -> dict:
+        """."""
+
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "rate": self.rate,
+            "decreases": self.decreases,
+        }
+
+    def acquire(self: AdaptiveLimiter, timeout: float = None) -> bool:
+        """Block the thread until a token and a concurrency slot are free, False when `timeout` seconds pass first."""
+
+        delay = self._reserve()
+        if delay:
+            if timeout is not None and delay > timeout:
+                with self._lock:
+                    self._tokens += 1  # Hand the reserved token back
+                self._paced()
+                return False
+            try:
+                sleep(delay)
+            finally:
+                self._paced()
+            if timeout is not None:
+                timeout -= delay
+        with self._lock:
+            if self._free():
+                self.in_flight += 1
+                return True
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+        if waiter.event.wait(timeout):
+            return True
+        with self._lock:
+            if not waiter.granted:
+                self._waiters.remove(waiter)
+                return False
+        return True  # Granted while timing out
+
+    async def aacquire(self: AdaptiveLimiter) -> None:
+        """Wait without blocking the event loop until a token and a concurrency slot are free."""
+
+        delay = self._reserve()
+        if delay:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                with self._lock:
+                    self._tokens += 1  # Hand the reserved token back
+                raise
+            finally:
+                self._paced()
+        with self._lock:
+            if self._free():
+                self.in_flight += 1
+                return
+            waiter = _Waiter(asyncio.get_event_loop())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                self.release()  # The slot came in with the cancellation, pass it on
+            raise
+
+    def release(self: AdaptiveLimiter, latency: float = None, ok: Optional[bool] = None) -> None:
+        """
+        Free the slot of a finished request and adapt the limit to its outcome:
+        `ok` False for a 5xx or a transport error, None for a request that never got an answer to judge.
+        """
+
+        with self._lock:
+            if ok is not None:
+                self._adapt(latency, ok)
+            self.in_flight -= 1
+            woken = self._grant()
+        for waiter in woken:
+            waiter.wake()
+
+    def _free(self: AdaptiveLimiter) -> bool:
+        """Whether a caller may go ahead right now, queued callers go first."""
+
+        return not self._waiters and self.in_flight < self.limit
+
+    def _grant(self: AdaptiveLimiter) -> List[_Waiter]:
+        """Hand the free slots to the longest waiting callers."""
+
+        woken = []
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+            self.in_flight += 1
+            woken.append(waiter)
+        return woken
+
+    def _adapt(self: AdaptiveLimiter, latency: float, ok: bool) -> None:
+        """."""
+
+        if ok and (latency is None or latency <= self.latency_target):
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            return
+        # Answers of one congested window all come back slow, the limit is cut once for them
+        now = monotonic()
+        if now - self._decreased_at >= self.latency_target:
+            self._limit = max(float(self.min_limit), self._limit * self.backoff)
+            self._decreased_at = now
+            self.decreases += 1
+
+    def _reserve(self: AdaptiveLimiter) -> float:
+        """Take a token, return the seconds to wait until it is due."""
+
+        if self.rate is None:
+            return 0.0
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            self._pacing += 1
+            return -self._tokens / self.rate
+
+    def _paced(self: AdaptiveLimiter) -> None:
+        """."""
+
+        with self._lock:
+            self._pacing -= 1
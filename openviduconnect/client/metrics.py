@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter, time_ns
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# httpcore trace events "<prefix>.started" / "<prefix>.complete" and the phase they time
+_TRACED_PHASES = {
+    "connection.connect_tcp": "connect",
+    "connection.connect_unix_socket": "connect",
+    "connection.start_tls": "tls",
+    "http11.receive_response_body": "body_read",
+    "http2.receive_response_body": "body_read",
+}
+_REQUEST_STARTS = ("http11.send_request_headers", "http2.send_request_headers")
+_RESPONSE_STARTS = ("http11.receive_response_headers", "http2.receive_response_headers")
+
+
+class CallTimer(object):
+    """
+    Timings of one call, fed by the httpcore trace extension of every attempt.
+    Phases: pool_wait, connect, tls, ttfb, body_read, decode, summed over the retries of the call.
+    """
+
+    __slots__ = ("started", "started_ns", "phases", "_attempt", "_marks", "_waiting")
+
+    def __init__(self: CallTimer) -> None:
+        """."""
+
+        self.started = perf_counter()
+        self.started_ns = time_ns()
+        self.phases: Dict[str, float] = {}
+        self._attempt = self.started
+        self._marks: Dict[str, float] = {}
+        self._waiting = True
+
+    def attempt(self: CallTimer) -> None:
+        """Mark the start of an attempt, the pool wait runs until its first connection event."""
+
+        self._attempt = perf_counter()
+        self._waiting = True
+
+    def add(self: CallTimer, phase: str, seconds: float) -> None:
+        """."""
+
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def trace(self: CallTimer, event: str, info: Dict[str, Any]) -> None:
+        """Trace extension of the sync transport."""
+
+        now = perf_counter()
+        if self._waiting:
+            self._waiting = False
+            self.add("pool_wait", now - self._attempt)
+
+        prefix, _, stage = event.rpartition(".")
+        if stage == "started":
+            self._marks[prefix] = now
+            return
+        if stage not in ("complete", "failed"):
+            return
+
+        phase = _TRACED_PHASES.get(prefix)
+        if phase is not None and prefix in self._marks:
+            self.add(phase, now - self._marks.pop(prefix))
+        elif prefix in _RESPONSE_STARTS:
+            for start in _REQUEST_STARTS:
+                if start in self._marks:
+                    self.add("ttfb", now - self._marks.pop(start))
+
+    async def atrace(self: CallTimer, event: str, info: Dict[str, Any]) -> None:
+        """Trace extension of the async transport."""
+
+        self.trace(event, info)
+
+    def elapsed(self: CallTimer) -> float:
+        """Seconds since the call started."""
+
+        return perf_counter() - self.started
+
+
+class Histogram(object):
+    """Cumulative histogram in the Prometheus layout."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self: Histogram, buckets: Tuple[float, ...]) -> None:
+        """."""
+
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self: Histogram, value: float) -> None:
+        """."""
+
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self: Histogram) -> Iterable[Tuple[str, int]]:
+        """(le, cumulative count) pairs, ending with +Inf."""
+
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield ("+Inf" if bound == float("inf") else repr(bound)), total
+
+
+SpanHook = Callable[[str, str, CallTimer], None]
+
+
+class Instrumentation(object):
+    """
+    Introduction: Per-call timing instrumentation of the clients.
+    Objective: Aggregate phase timings per endpoint and outcome into histograms exported in the Prometheus format.
+    Params: Histogram buckets in seconds and an optional span hook called after every call
+    """
+
+    PHASES = ("pool_wait", "connect", "tls", "ttfb", "body_read", "decode", "total")
+
+    def __init__(
+        self: Instrumentation,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        span_hook: SpanHook = None,
+        namespace: str = "openvidu_client",
+    ) -> None:
+        """
+        @:param buckets: Upper bounds in seconds of the histogram buckets (Default: DEFAULT_BUCKETS)
+        @:param span_hook: Called with (endpoint, outcome, timer) after every call, see opentelemetry_hook
+        @:param namespace: Prefix of the exported metric names (Default: "openvidu_client")
+        """
+
+        self.buckets = tuple(sorted(buckets))
+        self.span_hook = span_hook
+        self.namespace = namespace
+        self._histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        self._lock = Lock()
+
+    def __repr__(self):
+        """."""
+
+        return "<%s series=%d>" % (self.__class__.__name__, len(self._histograms))
+
+    def record(self: Instrumentation, endpoint: str, outcome: str, timer: CallTimer) -> None:
+        """Fold the timings of a finished call into the histograms."""
+
+        total = timer.elapsed()
+        with self._lock:
+            for phase, seconds in list(timer.phases.items()) + [("total", total)]:
+                key = (endpoint, outcome, phase)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(self.buckets)
+                histogram.observe(seconds)
+        if self.span_hook is not None:
+            self.span_hook(endpoint, outcome, timer)
+
+    def snapshot(self: Instrumentation) -> Dict[Tuple[str, str, str], Dict[str, float]]:
+        """Count, sum and mean of every (endpoint, outcome, phase) series."""
+
+        with self._lock:
+            return {
+                key: {"count": histogram.count, "sum": histogram.sum, "mean": histogram.sum / histogram.count}
+                for key, histogram in self._histograms.items()
+            }
+
+    def prometheus(self: Instrumentation) -> str:
+        """Histograms in the Prometheus text exposition format."""
+
+        name = "%s_phase_seconds" % (self.namespace,)
+        lines: List[str] = [
+            "# HELP %s Time spent per phase of the OpenVidu REST API calls." % (name,),
+            "# TYPE %s histogram" % (name,),
+        ]
+        with self._lock:
+            for (endpoint, outcome, phase), histogram in sorted(self._histograms.items()):
+                labels = 'endpoint="%s",outcome="%s",phase="%s"' % (endpoint, outcome, phase)
+                for bound, count in histogram.cumulative():
+                    lines.append('%s_bucket{%s,le="%s"} %d' % (name, labels, bound, count))
+                lines.append("%s_sum{%s} %r" % (name, labels, histogram.sum))
+                lines.append("%s_count{%s} %d" % (name, labels, histogram.count))
+        return "\n".join(lines) + "\n"
+
+    def reset(self: Instrumentation) -> None:
+        """."""
+
+        with self._lock:
+            self._histograms.clear()
+
+
+def opentelemetry_hook(tracer: Any = None) -> SpanHook:
+    """Span hook emitting one OpenTelemetry span per call, requires opentelemetry-api."""
+
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        raise ImportError("opentelemetry_hook requires opentelemetry-api: pip install opentelemetry-api")
+
+    tracer = tracer or trace.get_tracer("openviduconnect")
+
+    def hook(endpoint: str, outcome: str, timer: CallTimer) -> None:
+        span = tracer.start_span("openvidu.%s" % (endpoint,), start_time=timer.started_ns)
+        span.set_attribute("openvidu.endpoint", endpoint)
+        span.set_attribute("openvidu.outcome", outcome)
+        for phase, seconds in timer.phases.items():
+            span.set_attribute("openvidu.%s_ms" % (phase,), seconds * 1000)
+        span.end(end_time=timer.started_ns + int(timer.elapsed() * 1e9))
+
+    return hook
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+
+# Scanner of the C accelerated stdlib decoder: (value, end) of the JSON value starting at an index
+_scan = json.JSONDecoder().scan_once
+_SKIP = object()
+
+# Field name to None for a kept value, or to the tree of the kept fields of a nested object or array of objects
+Tree = Dict[str, Optional["Tree"]]
+
+
+class Projection(object):
+    """
+    Introduction: Subset of the fields of the objects returned by the REST APIs, e.g. ("id", "recording").
+    Objective: Walk only the levels holding kept fields, every other value is scanned past and dropped at once.
+    Params: Field paths, nested fields are joined with dots
+    """
+
+    def __init__(self: Projection, fields: Iterable[str]) -> None:
+        """
+        @:param fields: Paths of the kept fields, "connections.numberOfElements" keeps one field of "connections"
+        """
+
+        self.fields = tuple(fields)
+        self._tree: Tree = {}
+        for path in self.fields:
+            tree = self._tree
+            names = path.split(".")
+            for name in names[:-1]:
+                if tree.get(name, {}) is None:
+                    break  # The whole parent is kept already
+                tree = tree.setdefault(name, {})
+            else:
+                tree[names[-1]] = None
+        self._page: Tree = {"numberOfElements": None, "content": self._tree}
+
+    def __repr__(self):
+        """."""
+
+        return "<%s %s>" % (self.__class__.__name__, ", ".join(self.fields))
+
+    def project(self: Projection, data: Union[bytes, str], codec: Any = None) -> Any:
+        """Kept fields of the JSON object in `data`, picked from a full decode when `codec` is a native one."""
+
+        if _native(codec):
+            return _select(codec.loads(data), self._tree)
+        return self._project(data, self._tree)
+
+    def project_page(self: Projection, data: Union[bytes, str], codec: Any = None) -> dict:
+        """Page of a listing with the kept fields of every element of its content."""
+
+        if _native(codec):
+            return _select(codec.loads(data), self._page)
+        return self._project(data, self._page)
+
+    def _project(self: Projection, data: Union[bytes, str], tree: Tree) -> Any:
+        """."""
+
+        text = data.decode() if isinstance(data, bytes) else data
+        try:
+            pos = _WHITESPACE.match(text).end()
+            if text[pos] != "{":
+                return _scan(text, pos)[0]
+            return self._object(text, pos, tree, top=True)[0]
+        except (StopIteration, IndexError):
+            raise ValueError("Malformed JSON in the projected response")
+
+    def _value(self: Projection, text: str, pos: int, subtree: Optional[Tree]) -> Tuple[Any, int]:
+        """Kept part of the value at pos and the index after it."""
+
+        if subtree is not None:
+            if text[pos] == "{":
+                return self._object(text, pos, subtree)
+            if text[pos] == "[":
+                return self._array(text, pos, subtree)
+        return _scan(text, pos)
+
+    def _object(self: Projection, text: str, pos: int, tree: Tree, top: bool = False) -> Tuple[dict, int]:
+        """Kept fields of the object opening at pos and the index after it."""
+
+        whitespace = _WHITESPACE.match
+        result = {}
+        left = len(tree)
+        pos += 1
+        while True:
+            pos = whitespace(text, pos).end()
+            if text[pos] == "}":
+                return result, pos + 1
+            name, pos = _scan(text, pos)
+            pos = whitespace(text, whitespace(text, pos).end() + 1).end()  # Past the colon
+
+            subtree = tree.get(name, _SKIP)
+            if subtree is _SKIP:
+                pos = _scan(text, pos)[1]
+            else:
+                result[name], pos = self._value(text, pos, subtree)
+                left -= 1
+                if top and not left:
+                    return result, len(text)  # Nothing else to keep, the rest is not scanned
+
+            pos = whitespace(text, pos).end()
+            if text[pos] == ",":
+                pos += 1
+
+    def _array(self: Projection, text: str, pos: int, tree: Tree) -> Tuple[list, int]:
+        """Kept fields of every object of the array opening at pos and the index after it."""
+
+        whitespace = _WHITESPACE.match
+        result = []
+        pos += 1
+        while True:
+            pos = whitespace(text, pos).end()
+            if text[pos] == "]":
+                return result, pos + 1
+            value, pos = self._value(text, pos, tree)
+            result.append(value)
+            pos = whitespace(text, pos).end()
+            if text[pos] == ",":
+                pos += 1
+
+
+def _native(codec: Any) -> bool:
+    """
+    Whether the codec decodes natively, orjson or ujson: decoding the whole body then beats scanning past the
+    dropped values in Python, only the stdlib codec is worth skipping them for.
+    """
+
+    return codec is not None and codec.name != "json"
+
+
+def _select(value: Any, tree: Tree) -> Any:
+    """Kept fields of a decoded value, the same shape _project gives."""
+
+    if isinstance(value, dict):
+        return {
+            name: value[name] if subtree is None else _select(value[name], subtree)
+            for name, subtree in tree.items()
+            if name in value
+        }
+    if isinstance(value, list):
+        return [_select(item, tree) for item in value]
+    return value
+
+
+def as_projection(fields: Union[Projection, Iterable[str], None]) -> Optional[Projection]:
+    """Projection of the `projection=` option of a call, given as a Projection or field paths."""
+
+    if fields is None or isinstance(fields, Projection):
+        return fields
+    if isinstance(fields, str):
+        fields = (fields,)
+    return Projection(fields)
+
+
+SESSION_SUMMARY = Projection(("id", "customSessionId", "createdAt", "recording", "connections.numberOfElements"))
+RECORDING_SUMMARY = Projection(("id", "sessionId", "status", "duration", "size", "url"))
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from random import uniform
+from threading import Lock
+from time import monotonic
+from typing import Dict, Iterable, Optional
+
+from httpx import ConnectError, ConnectTimeout, PoolTimeout, Response, TransportError
+
+from ..exceptions import CircuitOpenError
+from ..exceptions.base import OpenViduError
+from ..exceptions import errors
+
+# Response extension the clients set to the number of attempts a retried call took
+ATTEMPTS = "openviduconnect.attempts"
+
+
+def _typed_statuses() -> frozenset:
+    """Status codes that already map to a typed error of the REST APIs."""
+
+    return frozenset(
+        value.status
+        for value in vars(errors).values()
+        if isinstance(value, type) and issubclass(value, OpenViduError) and value.status is not None
+    )
+
+
+class RetryPolicy(object):
+    """
+    Introduction: Retry policy of the clients for transient failures of the server.
+    Objective: Retry only safe operations, with exponential backoff and full jitter.
+    Params: Attempts, backoff base and cap, and the retryable status codes
+    """
+
+    TYPED_STATUSES = _typed_statuses()
+    RETRY_STATUSES = frozenset({502, 503, 504})
+    # Requests that never reached the server can be sent again whatever the method
+    UNSENT_ERRORS = (ConnectError, ConnectTimeout, PoolTimeout)
+
+    def __init__(
+        self: RetryPolicy,
+        attempts: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 2.0,
+        statuses: Iterable[int] = None,
+    ) -> None:
+        """
+        @:param attempts: Total attempts per call including the first one, 1 disables retries (Default: 3)
+        @:param backoff: Base delay in seconds, doubled on every attempt (Default: 0.1)
+        @:param max_backoff: Cap of the delay in seconds before jitter (Default: 2.0)
+        @:param statuses: Retryable status codes, typed error statuses are always left out (Default: 502, 503, 504)
+        """
+
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(self.RETRY_STATUSES if statuses is None else statuses) - self.TYPED_STATUSES
+
+    def __repr__(self):
+        """."""
+
+        return "<%s attempts=%d>" % (self.__class__.__name__, self.attempts)
+
+    @staticmethod
+    def idempotent(method: str, body: Optional[dict]) -> bool:
+        """
+        GET and DELETE are safe to repeat, so is a POST naming its own customSessionId: when the first attempt
+        reached the server, the 409 of the retry is answered by the clients with the session it created.
+        """
+
+        if method in ("GET", "HEAD", "DELETE"):
+            return True
+        return method == "POST" and bool(body) and bool(body.get("customSessionId"))
+
+    def delay(self: RetryPolicy, attempt: int) -> float:
+        """Full jitter delay before the attempt following `attempt` (0 based)."""
+
+        return uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def retries_status(self: RetryPolicy, status: int) -> bool:
+        """Whether the status code is a transient failure of the server."""
+
+        return status in self.statuses
+
+    def retries_error(self: RetryPolicy, error: TransportError, idempotent: bool) -> bool:
+        """Whether the transport error can be retried for the request."""
+
+        return idempotent or isinstance(error, self.UNSENT_ERRORS)
+
+
+def retried(response: Response) -> bool:
+    """Whether the response answers a retry rather than the first attempt of the call."""
+
+    return ATTEMPTS in response.extensions
+
+
+class CircuitBreaker(object):
+    """
+    Introduction: Circuit breaker guarding one OpenVidu host.
+    Objective: Fail fast with CircuitOpenError while the host keeps failing, then probe it again.
+    Params: Consecutive failures to open and seconds to wait before the probe
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    _hosts: Dict[str, CircuitBreaker] = {}
+    _hosts_lock = Lock()
+
+    def __init__(self: CircuitBreaker, failure_threshold: int = 5, recovery_timeout: float = 30.0) -> None:
+        """
+        @:param failure_threshold: Consecutive failures that open the circuit (Default: 5)
+        @:param recovery_timeout: Seconds the circuit stays open before a probe is let through (Default: 30.0)
+        """
+
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = Lock()
+
+    def __repr__(self):
+        """."""
+
+        return "<%s %s failures=%d>" % (self.__class__.__name__, self.state, self.failures)
+
+    @classmethod
+    def for_host(cls, host: str) -> CircuitBreaker:
+        """Breaker shared by every client of the host."""
+
+        with cls._hosts_lock:
+            breaker = cls._hosts.get(host)
+            if breaker is None:
+                breaker = cls._hosts[host] = cls()
+            return breaker
+
+    def before(self: CircuitBreaker) -> None:
+        """Let a request through or raise CircuitOpenError."""
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            # A probe that never reported back is replaced once the recovery timeout elapses again
+            if monotonic() - self._opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                self._opened_at = monotonic()
+                return
+            raise CircuitOpenError("Circuit is %s after %d consecutive failures" % (self.state, self.failures))
+
+    def success(self: CircuitBreaker) -> None:
+        """Record a healthy answer of the host."""
+
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def failure(self: CircuitBreaker) -> None:
+        """Record a transient failure of the host."""
+
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = monotonic()
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+INTERACTIVE = "interactive"
+NORMAL = "normal"
+BACKGROUND = "background"
+
+# Priority classes, the first is admitted first
+PRIORITIES = (INTERACTIVE, NORMAL, BACKGROUND)
+
+# Priority of the calls made in the current context, set with prioritized()
+current_priority: ContextVar[Optional[str]] = ContextVar("openviduconnect_priority", default=None)
+
+
+def validate(priority: str) -> str:
+    """."""
+
+    if priority not in PRIORITIES:
+        raise ValueError("Unknown priority %r, expected one of %s" % (priority, ", ".join(PRIORITIES)))
+    return priority
+
+
+def resolve(priority: Optional[str], default: str = NORMAL) -> str:
+    """Priority of a call: its priority= keyword, else the one of the context, else the endpoint default."""
+
+    return priority or current_priority.get() or default
+
+
+@contextmanager
+def prioritized(priority: str) -> Iterator[None]:
+    """Run the calls of the block, and the tasks it starts, with the priority."""
+
+    token = current_priority.set(validate(priority))
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class PriorityScheduler(object):
+    """
+    Introduction: Admission of the requests of one AsyncOpenViduClient by priority class.
+    Objective: Bound the requests in flight per class and in total, admit the higher classes first and let a request
+    waiting longer than max_wait go ahead of them so the lower classes are never starved.
+    Params: Concurrency per class, total concurrency, slots reserved to interactive requests and the longest wait
+    """
+
+    DEFAULT_LIMITS = {INTERACTIVE: 20, NORMAL: 15, BACKGROUND: 5}
+
+    def __init__(
+        self: PriorityScheduler,
+        limits: Dict[str, int] = None,
+        total: int = 20,
+        max_wait: float = 2.0,
+        reserved: int = 4,
+    ) -> None:
+        """
+        @:param limits: Requests in flight per class, overrides DEFAULT_LIMITS (Default: None)
+        @:param total: Requests in flight over every class (Default: 20)
+        @:param reserved: Slots of the total the lower classes leave to interactive requests (Default: 4)
+        @:param max_wait: Seconds after which a waiting request is admitted ahead of the higher classes (Default: 2.0)
+        """
+
+        self.limits = dict(self.DEFAULT_LIMITS, **(limits or {}))
+        for priority in self.limits:
+            validate(priority)
+        if not 0 <= reserved < total:
+            raise ValueError("The reserved slots need 0 <= reserved < total, got %d of %d" % (reserved, total))
+        self.total = total
+        self.reserved = reserved
+        self.max_wait = max_wait
+        self.in_flight: Dict[str, int] = dict.fromkeys(PRIORITIES, 0)
+        self.promoted = 0
+        self._queues: Dict[str, Deque[Tuple[float, asyncio.Future]]] = {priority: deque() for priority in PRIORITIES}
+
+    def __repr__(self):
+        """."""
+
+        return "<%s %s>" % (
+            self.__class__.__name__,
+            " ".join(
+                "%s=%d/%d+%d" % (priority, self.in_flight[priority], self.limits[priority], len(self._queues[priority]))
+                for priority in PRIORITIES
+            ),
+        )
+
+    @property
+    def stats(self: PriorityScheduler) -> dict:
+        """In flight, waiting and limit per class, and the requests promoted by the starvation guard."""
+
+        stats = {
+            priority: {
+                "in_flight": self.in_flight[priority],
+                "waiting": len(self._queues[priority]),
+                "limit": self.limits[priority],
+            }
+            for priority in PRIORITIES
+        }
+        stats["promoted"] = self.promoted
+        return stats
+
+    async def acquire(self: PriorityScheduler, priority: str) -> None:
+        """Wait until a request of the class is admitted."""
+
+        future = asyncio.get_event_loop().create_future()
+        queue = self._queues[priority]
+        queue.append((monotonic(), future))
+        self._grant()
+        if future.done():
+            return
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(priority)  # Admitted along with the cancellation, pass the slot on
+            else:
+                entry = next((entry for entry in queue if entry[1] is future), None)
+                if entry is not None:
+                    queue.remove(entry)
+            raise
+
+    def release(self: PriorityScheduler, priority: str) -> None:
+        """Free the slot of a finished request of the class."""
+
+        self.in_flight[priority] -= 1
+        self._grant()
+
+    def _grant(self: PriorityScheduler) -> None:
+        """Admit waiting requests while the total allows."""
+
+        while sum(self.in_flight.values()) < self.total:
+            priority = self._next()
+            if priority is None:
+                return
+            future = self._queues[priority].popleft()[1]
+            if future.done():
+                continue  # Cancelled while waiting
+            future.set_result(None)
+            self.in_flight[priority] += 1
+
+    def _next(self: PriorityScheduler) -> Optional[str]:
+        """Class of the next request: the oldest one past max_wait, else the highest class with room."""
+
+        # The lower classes, promoted or not, leave the reserved slots to the interactive requests
+        shared = sum(self.in_flight.values()) < self.total - self.reserved
+        ready: List[str] = [
+            priority for priority in PRIORITIES
+            if self._queues[priority] and self.in_flight[priority] < self.limits[priority]
+            and (shared or priority == INTERACTIVE)
+        ]
+        if not ready:
+            return None
+        oldest = min(ready, key=lambda priority: self._queues[priority][0][0])
+        if oldest != ready[0] and monotonic() - self._queues[oldest][0][0] >= self.max_wait:
+            self.promoted += 1
+            return oldest
+        return ready[0]
@@ -0,0 +1,561 @@
+from __future__ import annotations
+
+from asyncio import gather
+from bisect import bisect, bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from hashlib import blake2b
+from itertools import chain
+from random import choices
+from string import ascii_letters, digits
+from threading import Lock
+from time import monotonic
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+from .asyncclient import AsyncOpenViduClient
+from .base import BaseClient
+from .deadline import deadline
+from .endpoints import Endpoint, bind
+from .projection import Projection, as_projection
+from .syncclient import OpenViduClient
+from ..exceptions import (
+    RecordingNotFoundError,
+    SessionDoesNotExistError,
+    SessionNotFoundError,
+    SessionOrConnectionDoesNotExist,
+)
+from ..exceptions.base import Error
+
+# (host, secret) or (host, secret, options of that node's client overriding the shared ones)
+Node = Union[Tuple[str, str], Tuple[str, str, Dict[str, Any]]]
+
+# Listings of the whole cluster, every node is asked and the pages are merged
+FAN_OUT = ("get_sessions", "get_recordings")
+
+# Errors of a session-scoped call sent to a node that does not hold the session
+MISPLACED = (SessionNotFoundError, SessionDoesNotExistError, SessionOrConnectionDoesNotExist, RecordingNotFoundError)
+
+# Fields of the listing the loads of the nodes are counted from
+LOAD = Projection(("id", "connections.numberOfElements"))
+
+SESSION_ID_ALPHABET = ascii_letters + digits
+
+
+def _hash(key: str) -> int:
+    """."""
+
+    return int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def _items(page: Any) -> list:
+    """Elements of a page, whether the client returns dicts or lists of models."""
+
+    return (page.get("content") or []) if isinstance(page, dict) else page
+
+
+def _get(item: Any, key: str, attribute: str = None) -> Any:
+    """."""
+
+    return item.get(key) if isinstance(item, dict) else getattr(item, attribute or key, None)
+
+
+class HashRing(object):
+    """
+    Introduction: Consistent hash ring of the nodes of a sharded client.
+    Objective: Map keys to nodes so that adding or removing a node only moves the keys of its own arcs.
+    Params: Node names and the virtual nodes of each
+    """
+
+    def __init__(self: HashRing, nodes: Iterable[str] = (), replicas: int = 160) -> None:
+        """
+        @:param nodes: Names of the initial nodes (Default: ())
+        @:param replicas: Virtual nodes per node, more spread the keys more evenly (Default: 160)
+        """
+
+        self.replicas = replicas
+        self._hashes: List[int] = []
+        self._nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self: HashRing) -> int:
+        """."""
+
+        return len(self._nodes) // self.replicas
+
+    def __contains__(self: HashRing, node: str) -> bool:
+        """."""
+
+        return node in self._nodes
+
+    def __repr__(self):
+        """."""
+
+        return "<%s nodes=%d replicas=%d>" % (self.__class__.__name__, len(self), self.replicas)
+
+    def add(self: HashRing, node: str) -> None:
+        """."""
+
+        if node in self:
+            return
+        for replica in range(self.replicas):
+            point = _hash("%s#%d" % (node, replica))
+            index = bisect_left(self._hashes, point)
+            self._hashes.insert(index, point)
+            self._nodes.insert(index, node)
+
+    def remove(self: HashRing, node: str) -> None:
+        """."""
+
+        points = [(point, name) for point, name in zip(self._hashes, self._nodes) if name != node]
+        self._hashes = [point for point, _ in points]
+        self._nodes = [name for _, name in points]
+
+    def node(self: HashRing, key: str) -> str:
+        """Node owning the key, the first virtual node clockwise of its hash."""
+
+        if not self._nodes:
+            raise LookupError("The hash ring has no nodes")
+        return self._nodes[bisect(self._hashes, _hash(key)) % len(self._nodes)]
+
+
+class _Sharded(object):
+    """
+    Routing shared by the sync and async sharded clients: the ring, the placement map and the node loads.
+    Session-scoped calls go to the node of the session id, found in the placement map or else on the ring.
+    """
+
+    client_class: Type[BaseClient] = BaseClient
+
+    def __init__(
+        self: _Sharded, nodes: Iterable[Node], replicas: int = 160, load_ttl: float = 5.0, **options: Any
+    ) -> None:
+        """
+        @:param nodes: (host, secret) pairs of the OpenVidu deployments, (host, secret, options) to tune one of them
+        @:param replicas: Virtual nodes per deployment on the hash ring (Default: 160)
+        @:param load_ttl: Seconds the session and connection counts of the nodes are trusted (Default: 5.0)
+        @:param options: Keyword arguments of every node client, a cache is cloned per node (Default: None)
+        """
+
+        self.ring = HashRing(replicas=replicas)
+        self.load_ttl = load_ttl
+        self.clients: Dict[str, BaseClient] = {}
+        # Sessions living elsewhere than the ring says, e.g. created before the nodes changed
+        self.placements: Dict[str, str] = {}
+        self._options = options
+        self._loads: Dict[str, Tuple[int, int]] = {}
+        self._loads_at: Optional[float] = None
+        self._lock = Lock()
+        for node in nodes:
+            self.add_node(*node)
+        if not self.clients:
+            raise ValueError("A sharded client needs at least one node")
+
+    def __repr__(self):
+        """."""
+
+        return "<%s %s>" % (self.__class__.__name__, ", ".join(self.clients))
+
+    @property
+    def loads(self: _Sharded) -> Dict[str, Dict[str, int]]:
+        """Last known session and connection counts per node."""
+
+        return {host: {"sessions": load[0], "connections": load[1]} for host, load in self._loads.items()}
+
+    def add_node(self: _Sharded, host: str, secret: str, options: Dict[str, Any] = None) -> BaseClient:
+        """Add a deployment, only the sessions of its arcs of the ring move to it."""
+
+        options = dict(self._options, **(options or {}))
+        if options.get("cache") is not None:
+            options["cache"] = options["cache"].clone()  # Listings of different nodes share their cache keys
+        client = self.clients[host] = self.client_class(host, secret, **options)
+        self.ring.add(host)
+        self._loads_at = None
+        return client
+
+    def _forget(self: _Sharded, host: str) -> BaseClient:
+        """Take a deployment out of the routing and hand back its client to close."""
+
+        if host not in self.clients:
+            raise KeyError(host)
+        if len(self.clients) == 1:
+            raise ValueError("A sharded client needs at least one node")
+        self.ring.remove(host)
+        self._loads.pop(host, None)
+        self._loads_at = None
+        with self._lock:
+            for session_id in [session_id for session_id, node in self.placements.items() if node == host]:
+                del self.placements[session_id]
+        return self.clients.pop(host)
+
+    def node_of(self: _Sharded, session_id: str) -> str:
+        """Host of the deployment holding the session."""
+
+        return self.placements.get(session_id) or self.ring.node(session_id)
+
+    def shard(self: _Sharded, session_id: str) -> BaseClient:
+        """Client of the deployment holding the session, or the recording of that id."""
+
+        return self.clients[self.node_of(session_id.split("~", 1)[0])]
+
+    def _session_key(self: _Sharded, endpoint: Endpoint, args: tuple, kwargs: Dict[str, Any]) -> str:
+        """Session id a call is routed by."""
+
+        if endpoint.name == "start_recording":
+            if "session" not in kwargs:
+                raise TypeError("start_recording() takes the session body parameter")
+            return kwargs["session"]
+        name = endpoint.params[0]
+        key = args[0] if args else kwargs.get(name)
+        if key is None:
+            raise TypeError("%s() takes the path parameters %s" % (endpoint.name, ", ".join(endpoint.params)))
+        # Recording ids are "<SESSION_ID>" or "<SESSION_ID>~<N>"
+        return key.split("~", 1)[0] if name == "recording_id" else key
+
+    def _loads_stale(self: _Sharded) -> bool:
+        """."""
+
+        return self._loads_at is None or monotonic() - self._loads_at > self.load_ttl
+
+    def _place(self: _Sharded, kwargs: Dict[str, Any]) -> str:
+        """
+        Node of a new session: the ring node of its customSessionId, so every process finds it again, or else the
+        least loaded node, with a generated customSessionId the ring maps to that node.
+        """
+
+        if kwargs.get("customSessionId"):
+            return self.node_of(kwargs["customSessionId"])
+        loads = {host: load for host, load in self._loads.items() if host in self.clients}
+        if not loads:
+            raise Error("No node of the cluster answered the load refresh")
+        host = min(loads, key=lambda node: (sum(loads[node]), node))
+        kwargs["customSessionId"] = self._session_id(host)
+        with self._lock:
+            sessions, connections = self._loads[host]
+            self._loads[host] = (sessions + 1, connections)  # Spread a burst of creations before the next refresh
+        return host
+
+    def _session_id(self: _Sharded, host: str) -> str:
+        """Random id in the format of the server's own, hashed onto the ring arcs of the node."""
+
+        for _ in range(64 * len(self.clients)):
+            session_id = "ses_" + "".join(choices(SESSION_ID_ALPHABET, k=10))
+            if self.ring.node(session_id) == host:
+                return session_id
+        with self._lock:
+            self.placements[session_id] = host
+        return session_id
+
+    def _observe(self: _Sharded, host: str, page: Any, projection: Optional[Projection]) -> None:
+        """Learn the placements and the load of a node from its session listing."""
+
+        fields = () if projection is None else projection.fields
+        sessions = _items(page)
+        if projection is None or "id" in fields:
+            seen = set()
+            with self._lock:
+                for session in sessions:
+                    session_id = _get(session, "id")
+                    seen.add(session_id)
+                    if self.ring.node(session_id) == host:
+                        self.placements.pop(session_id, None)
+                    else:
+                        self.placements[session_id] = host
+                for session_id in [session_id for session_id, node in self.placements.items() if node == host]:
+                    if session_id not in seen:
+                        del self.placements[session_id]
+        if projection is None or "connections" in fields or "connections.numberOfElements" in fields:
+            connections = 0
+            for session in sessions:
+                count = _get(session, "connections", "connection_count")
+                connections += count if isinstance(count, int) else (count or {}).get("numberOfElements", 0)
+            with self._lock:
+                self._loads[host] = (len(sessions), connections)
+
+    def _observe_all(
+        self: _Sharded, name: str, kwargs: Dict[str, Any], results: List[Tuple[str, Any]], tolerate: bool = False
+    ) -> List[Any]:
+        """Pages of a fan-out in node order, raising the first failure unless `tolerate`, learning from sessions."""
+
+        pages = []
+        failure = None
+        for host, result in results:
+            if isinstance(result, Exception):
+                failure = failure or result
+                self._loads.pop(host, None)
+                continue
+            if name == "get_sessions":
+                self._observe(host, result, as_projection(kwargs.get("projection")))
+            pages.append(result)
+        if failure is not None and (not tolerate or not pages):
+            raise failure
+        if name == "get_sessions" and len(pages) == len(results):
+            self._loads_at = monotonic()
+        return pages
+
+    @staticmethod
+    def _merge(pages: List[Any]) -> Any:
+        """One page of the elements of every node, or one list when the client returns models."""
+
+        if all(isinstance(page, list) for page in pages):
+            return list(chain.from_iterable(pages))
+        content = list(chain.from_iterable(_items(page) for page in pages))
+        return {"numberOfElements": len(content), "content": content}
+
+
+class ShardedOpenViduClient(_Sharded):
+    """
+    Introduction: Client of several OpenVidu deployments behind one OpenViduClient interface.
+    Objective: Route session calls by consistent hashing, place new sessions by load and merge cluster listings.
+    Params: (host, secret) pairs of the deployments and the options of their clients
+    """
+
+    client_class = OpenViduClient
+
+    def __init__(self: ShardedOpenViduClient, *args: Any, **kwargs: Any) -> None:
+        """Same parameters as _Sharded, nodes as (host, secret) pairs."""
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        super().__init__(*args, **kwargs)
+
+    def __enter__(self):
+        """."""
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """."""
+
+        self.close()
+
+    def close(self: ShardedOpenViduClient) -> None:
+        """Close the clients of every node and the fan-out threads."""
+
+        for client in self.clients.values():
+            client.close()
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def add_node(self: ShardedOpenViduClient, *args: Any, **kwargs: Any) -> OpenViduClient:
+        """."""
+
+        client = super().add_node(*args, **kwargs)
+        self._resize()
+        return client
+
+    def remove_node(self: ShardedOpenViduClient, host: str) -> None:
+        """Take a deployment out of the cluster, its sessions are no longer reachable through this client."""
+
+        self._forget(host).close()
+        self._resize()
+
+    def _resize(self: ShardedOpenViduClient) -> None:
+        """Drop the fan-out threads sized for the previous nodes, the next fan-out starts a fitting pool."""
+
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def refresh(self: ShardedOpenViduClient) -> Dict[str, Dict[str, int]]:
+        """Count the sessions and connections of every node, relearning the placements on the way."""
+
+        self._observe_all("get_sessions", {"projection": LOAD}, self._each("get_sessions", {"projection": LOAD}), True)
+        return self.loads
+
+    def _each(self: ShardedOpenViduClient, name: str, kwargs: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        """Call the method on every node concurrently, each result or error paired with its host."""
+
+        def call(host: str) -> Tuple[str, Any]:
+            try:
+                return host, getattr(self.clients[host], name)(**kwargs)
+            except Exception as error:
+                return host, error
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(len(self.clients), thread_name_prefix="openviduconnect-shard")
+        # Each node call runs in a copy of the context, keeping the deadline and priority of the caller
+        futures = [self._executor.submit(copy_context().run, call, host) for host in list(self.clients)]
+        return [future.result() for future in futures]
+
+    def _call(self: ShardedOpenViduClient, endpoint: Endpoint, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """Run one call within its deadline, which covers the nodes asked and the retry after a refresh."""
+
+        with deadline(kwargs.pop("deadline", None)):
+            return self._route(endpoint, args, kwargs)
+
+    def _route(self: ShardedOpenViduClient, endpoint: Endpoint, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """Run one call on the node it belongs to, or on every node for the listings."""
+
+        if endpoint.name in FAN_OUT:
+            return self._merge(self._observe_all(endpoint.name, kwargs, self._each(endpoint.name, kwargs)))
+        if endpoint.name == "create_session":
+            if not kwargs.get("customSessionId") and self._loads_stale():
+                self.refresh()
+            return self.clients[self._place(kwargs)].create_session(**kwargs)
+
+        session_id = self._session_key(endpoint, args, kwargs)
+        host = self.node_of(session_id)
+        try:
+            return getattr(self.clients[host], endpoint.name)(*args, **kwargs)
+        except MISPLACED:
+            if len(self.clients) == 1 or not self._loads_stale():
+                raise
+            self.refresh()
+            moved = self.node_of(session_id)
+            if moved == host:
+                raise
+            return getattr(self.clients[moved], endpoint.name)(*args, **kwargs)
+
+    def wait_for_recording(self: ShardedOpenViduClient, recording_id: str, *args: Any, **kwargs: Any) -> Any:
+        """OpenViduClient.wait_for_recording on the node of the recording."""
+
+        return self.shard(recording_id).wait_for_recording(recording_id, *args, **kwargs)
+
+    def download_recording(self: ShardedOpenViduClient, recording_id: str, *args: Any, **kwargs: Any) -> str:
+        """OpenViduClient.download_recording from the node of the recording."""
+
+        return self.shard(recording_id).download_recording(recording_id, *args, **kwargs)
+
+    def iter_sessions(self: ShardedOpenViduClient, projection: Any = None) -> Iterator[dict]:
+        """Sessions of every node, one node after the other."""
+
+        return chain.from_iterable(client.iter_sessions(projection) for client in list(self.clients.values()))
+
+    def iter_recordings(self: ShardedOpenViduClient, projection: Any = None) -> Iterator[dict]:
+        """Recordings of every node, one node after the other."""
+
+        return chain.from_iterable(client.iter_recordings(projection) for client in list(self.clients.values()))
+
+
+class AsyncShardedOpenViduClient(_Sharded):
+    """
+    Introduction: Client of several OpenVidu deployments behind one AsyncOpenViduClient interface.
+    Objective: Route session calls by consistent hashing, place new sessions by load and merge cluster listings.
+    Params: (host, secret) pairs of the deployments and the options of their clients
+    """
+
+    client_class = AsyncOpenViduClient
+
+    # The bulk calls fan out over the routed API coroutines of this client
+    bulk = AsyncOpenViduClient.bulk
+    create_sessions = AsyncOpenViduClient.create_sessions
+    create_connections = AsyncOpenViduClient.create_connections
+    delete_connections = AsyncOpenViduClient.delete_connections
+    get_sessions_by_id = AsyncOpenViduClient.get_sessions_by_id
+    delete_sessions = AsyncOpenViduClient.delete_sessions
+
+    async def __aenter__(self):
+        """."""
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """."""
+
+        await self.aclose()
+
+    async def aclose(self: AsyncShardedOpenViduClient) -> None:
+        """Close the clients of every node."""
+
+        await gather(*(client.aclose() for client in self.clients.values()))
+
+    async def remove_node(self: AsyncShardedOpenViduClient, host: str) -> None:
+        """Take a deployment out of the cluster, its sessions are no longer reachable through this client."""
+
+        await self._forget(host).aclose()
+
+    async def refresh(self: AsyncShardedOpenViduClient) -> Dict[str, Dict[str, int]]:
+        """Count the sessions and connections of every node, relearning the placements on the way."""
+
+        results = await self._each("get_sessions", {"projection": LOAD})
+        self._observe_all("get_sessions", {"projection": LOAD}, results, True)
+        return self.loads
+
+    async def _each(self: AsyncShardedOpenViduClient, name: str, kwargs: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        """Call the coroutine on every node concurrently, each result or error paired with its host."""
+
+        hosts = list(self.clients)
+        results = await gather(
+            *(getattr(self.clients[host], name)(**kwargs) for host in hosts), return_exceptions=True
+        )
+        return list(zip(hosts, results))
+
+    async def _call(self: AsyncShardedOpenViduClient, endpoint: Endpoint, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """Run one call within its deadline, which covers the nodes asked and the retry after a refresh."""
+
+        with deadline(kwargs.pop("deadline", None)):
+            return await self._route(endpoint, args, kwargs)
+
+    async def _route(
+        self: AsyncShardedOpenViduClient, endpoint: Endpoint, args: tuple, kwargs: Dict[str, Any]
+    ) -> Any:
+        """Run one call on the node it belongs to, or on every node for the listings."""
+
+        if endpoint.name in FAN_OUT:
+            return self._merge(self._observe_all(endpoint.name, kwargs, await self._each(endpoint.name, kwargs)))
+        if endpoint.name == "create_session":
+            if not kwargs.get("customSessionId") and self._loads_stale():
+                await self.refresh()
+            return await self.clients[self._place(kwargs)].create_session(**kwargs)
+
+        session_id = self._session_key(endpoint, args, kwargs)
+        host = self.node_of(session_id)
+        try:
+            return await getattr(self.clients[host], endpoint.name)(*args, **kwargs)
+        except MISPLACED:
+            if len(self.clients) == 1 or not self._loads_stale():
+                raise
+            await self.refresh()
+            moved = self.node_of(session_id)
+            if moved == host:
+                raise
+            return await getattr(self.clients[moved], endpoint.name)(*args, **kwargs)
+
+    async def wait_for_recording(self: AsyncShardedOpenViduClient, recording_id: str, *args: Any, **kwargs: Any) -> Any:
+        """AsyncOpenViduClient.wait_for_recording on the node of the recording."""
+
+        return await self.shard(recording_id).wait_for_recording(recording_id, *args, **kwargs)
+
+    async def download_recording(
+        self: AsyncShardedOpenViduClient, recording_id: str, *args: Any, **kwargs: Any
+    ) -> str:
+        """AsyncOpenViduClient.download_recording from the node of the recording."""
+
+        return await self.shard(recording_id).download_recording(recording_id, *args, **kwargs)
+
+    async def iter_sessions(self: AsyncShardedOpenViduClient, projection: Any = None) -> AsyncIterator[dict]:
+        """Sessions of every node, one node after the other."""
+
+        for client in list(self.clients.values()):
+            async for session in client.iter_sessions(projection):
+                yield session
+
+    async def iter_recordings(self: AsyncShardedOpenViduClient, projection: Any = None) -> AsyncIterator[dict]:
+        """Recordings of every node, one node after the other."""
+
+        for client in list(self.clients.values()):
+            async for recording in client.iter_recordings(projection):
+                yield recording
+
+
+def _method(endpoint: Endpoint) -> Callable:
+    """API method of ShardedOpenViduClient for the endpoint."""
+
+    def method(self: ShardedOpenViduClient, *args: str, **kwargs: Any) -> Any:
+        return self._call(endpoint, args, kwargs)
+
+    return method
+
+
+def _coroutine(endpoint: Endpoint) -> Callable:
+    """API coroutine of AsyncShardedOpenViduClient for the endpoint."""
+
+    async def method(self: AsyncShardedOpenViduClient, *args: str, **kwargs: Any) -> Any:
+        return await self._call(endpoint, args, kwargs)
+
+    return method
+
+
+bind(ShardedOpenViduClient, _method)
+bind(AsyncShardedOpenViduClient, _coroutine)
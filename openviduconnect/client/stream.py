@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import re
+from typing import List
+
+_STRUCTURE = re.compile(rb'[{}\[\]"]')
+_STRING = re.compile(rb'["\\]')
+
+_QUOTE = ord('"')
+_BACKSLASH = ord("\\")
+_OPENERS = (ord("{"), ord("["))
+_ARRAY = ord("[")
+
+
+class ContentParser(object):
+    """
+    Introduction: Incremental parser of the "content" array of the paged responses of the REST APIs.
+    Objective: Cut the object elements of the array out of the byte stream as soon as each one is complete.
+    Params: Key of the array in the top level object
+    """
+
+    def __init__(self: ContentParser, key: str = "content") -> None:
+        """
+        @:param key: Key of the array in the top level object (Default: "content")
+        """
+
+        self._key = key.encode()
+        self._buffer = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = -1
+        self._last_key = None
+        self._in_array = False
+        self._element_start = -1
+        self.done = False
+
+    def feed(self: ContentParser, chunk: bytes) -> List[bytes]:
+        """Consume the next chunk of the body and return the JSON of the elements it completed."""
+
+        if self.done:
+            return []
+
+        buffer = self._buffer
+        buffer += chunk
+        elements = []
+        pos = self._pos
+        end = len(buffer)
+        while pos < end:
+            if self._in_string:
+                match = _STRING.search(buffer, pos)
+                if match is None:
+                    pos = end
+                    break
+                index = match.start()
+                if buffer[index] == _BACKSLASH:
+                    if index + 1 >= end:
+                        pos = index  # The escaped byte is in the next chunk
+                        break
+                    pos = index + 2
+                    continue
+                self._in_string = False
+                pos = index + 1
+                if self._depth == 1:
+                    self._last_key = bytes(buffer[self._string_start:index])
+                continue
+
+            match = _STRUCTURE.search(buffer, pos)
+            if match is None:
+                pos = end
+                break
+            index = match.start()
+            byte = buffer[index]
+            pos = index + 1
+            if byte == _QUOTE:
+                self._in_string = True
+                self._string_start = pos
+            elif byte in _OPENERS:
+                if self._in_array and self._depth == 2 and self._element_start < 0:
+                    self._element_start = index
+                self._depth += 1
+                if self._depth == 2 and byte == _ARRAY and self._last_key == self._key:
+                    self._in_array = True
+            else:
+                self._depth -= 1
+                if self._in_array and self._depth == 2:
+                    elements.append(bytes(buffer[self._element_start:pos]))
+                    self._element_start = -1
+                elif self._in_array and self._depth == 1:
+                    self._in_array = False
+                    self.done = True
+                    pos = end
+                    break
+
+        # Keep only the bytes a later chunk may still need: the open element or the open key
+        keep = pos
+        if self._element_start >= 0:
+            keep = self._element_start
+        elif self._in_string and self._depth == 1:
+            keep = self._string_start
+        if keep:
+            del buffer[:keep]
+            pos -= keep
+            if self._element_start >= 0:
+                self._element_start -= keep
+            if self._in_string:
+                self._string_start -= keep
+        self._pos = pos
+        return elements
@@ -1,32 +1,49 @@
 from __future__ import annotations
 
-from urllib.parse import urljoin
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from threading import Lock
+from time import monotonic, sleep
+from typing import Any, Callable, Dict, Iterator, Optional
 
-from httpx import Client, Response
+from httpx import Client, Response, TransportError
 
 from .base import BaseClient
-from ..exceptions import (
-    SessionBodyParameterError,
-    SessionExistsError,
-    SessionNotFoundError,
-    ConnectionBodyParameterError,
-    ConnectionIPCAMError,
-    SessionDoesNotExistError,
-    ConnectionNotFound,
-    SessionOrConnectionDoesNotExist,
-    RecordingBodyParameterError,
-    RecordingResolutionOrBrowserSettingsError,
-    RecordingNoConnectedParticipantsError,
-    RecordingNotConfiguredForMediaNodeError,
-    RecordingDisabledOnServerError,
-    RecordingNotFoundError,
-    RecordingStartingProgressError,
-    RecordingNotCompletedError,
+from .cache import MISSING
+from .deadline import attempt_timeout, cap, check, deadline, exceeded, remaining
+from .download import (
+    CHUNK_SIZE,
+    PART,
+    SEGMENTS,
+    Progress,
+    ProgressCallback,
+    Segment,
+    destination,
+    finish,
+    open_mode,
+    plan,
+    same_origin,
+    recording_url,
 )
+from .endpoints import ENDPOINTS_BY_NAME, Endpoint, bind
+from .limiter import CONGESTION_STATUSES
+from .metrics import CallTimer
+from .projection import as_projection
+from .retry import ATTEMPTS
+from .stream import ContentParser
+from .waiter import RecordingWaiter, field, poll_delay, reached, validate
+from ..exceptions import DeadlineExceededError, RecordingWaitTimeoutError
+from ..exceptions.base import Error
 
 
 class OpenViduClient(BaseClient):
-    """."""
+    """
+    Client of the REST APIs running over a pooled httpx.Client.
+    Its API methods (create_session, get_session, ...) are generated from the endpoint table.
+    """
+
+    _client_lock = Lock()
 
     def __enter__(self):
         """."""
@@ -36,231 +53,268 @@ class OpenViduClient(BaseClient):
     def __exit__(self, exc_type, exc_val, exc_tb):
         """."""
 
-        pass
-
-    def create_session(self: OpenViduClient, **kwargs: str) -> dict:
-        """."""
-
-        with Client(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = client.post(self._apis["sessions"], headers=self._headers, json=kwargs)
-
-        if response.status_code == 400:
-            raise SessionBodyParameterError("Problem with some body parameter")
-        if response.status_code == 409:
-            raise SessionExistsError("Parameter customSessionId corresponds to an existing Session")
-
-        return response.json()
-
-    def get_session(self: OpenViduClient, session_id: str) -> dict:
-        """."""
-
-        url: str = urljoin(self._apis["sessions"], session_id)
-        with Client(verify=self._verify, headers=self._timeout) as client:
-            response: Response = client.get(url, headers=self._headers)
-
-        if response.status_code == 404:
-            raise SessionNotFoundError("No Session exists for the passed SESSION_ID")
-
-        return response.json()
-
-    def get_sessions(self: OpenViduClient) -> dict:
-        """."""
-
-        with Client(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = client.get(self._apis["sessions"], headers=self._headers)
-
-        return response.json()
-
-    def delete_session(self: OpenViduClient, session_id: str) -> dict:
-        """."""
-
-        url: str = urljoin(self._apis["sessions"], session_id)
-        with Client(verify=self._verify, headers=self._timeout) as client:
-            response: Response = client.delete(url, headers=self._headers)
-
-        if response.status_code == 404:
-            raise SessionNotFoundError("No Session exists for the passed SESSION_ID")
-
-        return response.json()
-
-    def create_connection(self: OpenViduClient, session_id: str, **kwargs: str) -> dict:
-        """."""
-
-        session_url: str = urljoin(self._apis["sessions"], session_id)
-        url: str = urljoin(session_url, "connection")
-        with Client(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = client.post(url, headers=self._headers, json=kwargs)
-
-        if response.status_code == 400:
-            raise ConnectionBodyParameterError("Problem with some body parameter")
-        if response.status_code == 404:
-            raise SessionNotFoundError("No session exists for the passed SESSION_ID")
-        if response.status_code == 500:
-            raise ConnectionIPCAMError("Unexpected error when creating the Connection object")
-
-        return response.json()
-
-    def get_connection(self: OpenViduClient, session_id: str, connection_id: str) -> dict:
-        """."""
-
-        session_url: str = urljoin(self._apis["sessions"], session_id)
-        connection_url: str = urljoin(session_url, "connection")
-        url: str = urljoin(connection_url, connection_id)
-        with Client(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = client.get(url, headers=self._headers)
-
-        if response.status_code == 400:
-            raise SessionDoesNotExistError("No Session exists for the passed SESSION_ID")
-        if response.status_code == 404:
-            raise ConnectionNotFound("No Connection exists for the passed CONNECTION_ID")
-
-        return response.json()
-
-    def get_connections(self: OpenViduClient, session_id: str) -> dict:
-        """."""
-
-        session_url: str = urljoin(self._apis["session"], session_id)
-        url: str = urljoin(session_url, "connection")
-        with Client(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = client.get(url, headers=self._headers)
-
-        if response.status_code == 404:
-            raise SessionNotFoundError("No Session exists for the passed SESSION_ID")
-
-        return response.json()
-
-    def update_connection(self: OpenViduClient, session_id: str, connection_id: str, **kwargs: str) -> dict:
-        """."""
-
-        session_url: str = urljoin(self._apis["session"], session_id)
-        connection_url: str = urljoin(session_url, "connection")
-        url: str = urljoin(connection_url, connection_id)
-        with Client(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = client.patch(url, headers=self._headers, json=kwargs)
-
-        if response.status_code == 400:
-            raise ConnectionBodyParameterError("Problem with some body parameter")
-        if response.status_code == 404:
-            raise SessionOrConnectionDoesNotExist(
-                "No Session exists for the passed SESSION_ID, or no Connection exists for the passed CONNECTION_ID"
+        self.close()
+
+    @property
+    def client(self: OpenViduClient) -> Client:
+        """Pooled HTTP client, created on first use and reused by every call."""
+
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = Client(**self._client_options())
+        return self._client
+
+    def close(self: OpenViduClient) -> None:
+        """Close the pooled HTTP client, a later call opens a fresh one."""
+
+        client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def _send(
+        self: OpenViduClient,
+        method: str,
+        url: str,
+        json: dict = None,
+        stream: bool = False,
+        timer: CallTimer = None,
+        headers: Dict[str, str] = None,
+        credentials: bool = True,
+    ) -> Response:
+        """Send the request through the circuit breaker, retrying transient failures of safe operations."""
+
+        idempotent = self.retry.idempotent(method, json)
+        content = None if json is None else self.codec.dumps(json)
+        extensions = None if timer is None else {"trace": timer.trace}
+        attempt = 0
+        while True:
+            left = check()
+            self.circuit_breaker.before()
+            if self.limiter is not None and not self.limiter.acquire(left):
+                raise DeadlineExceededError("Deadline exceeded while waiting for a request slot")
+            started = monotonic()
+            healthy = None
+            try:
+                left = check()
+                if timer is not None:
+                    timer.attempt()
+                request = self.client.build_request(
+                    method, url, content=content, headers=headers, extensions=extensions,
+                    timeout=attempt_timeout(self._timeout, left),
+                )
+                if not credentials:
+                    del request.headers["Authorization"]  # Secret of the server, never sent to another host
+                response: Response = self.client.send(request, stream=stream)
+                healthy = response.status_code not in CONGESTION_STATUSES
+            except TransportError as error:
+                if exceeded(error, self._timeout, left):
+                    raise DeadlineExceededError("Deadline exceeded during %s %s" % (method, url)) from error
+                healthy = False
+                delay = self._retry_delay(idempotent, attempt, error=error)
+                if delay is None:
+                    raise
+                if left is not None and delay >= remaining():
+                    raise DeadlineExceededError("Deadline leaves no time to retry %s %s" % (method, url)) from error
+            else:
+                delay = self._retry_delay(idempotent, attempt, response=response)
+                if delay is None:
+                    if attempt:
+                        response.extensions[ATTEMPTS] = attempt + 1
+                    return response
+                response.close()
+                if left is not None and delay >= remaining():
+                    raise DeadlineExceededError(
+                        "Deadline leaves no time to retry %s %s after status %d" % (method, url, response.status_code)
+                    )
+            finally:
+                if self.limiter is not None:
+                    self.limiter.release(monotonic() - started, healthy)
+            sleep(delay)
+            attempt += 1
+
+    def _call(self: OpenViduClient, endpoint: Endpoint, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """Run one call of the endpoint."""
+
+        url, args, body, options = self._prepare(endpoint, args, kwargs)
+        if endpoint.method == "GET" and options.get("cache", True):
+            cached = self._cached(endpoint, *args)
+            if cached is not MISSING:
+                return cached
+
+        with deadline(options.get("deadline", self.deadline)):
+            if self.instrumentation is None:
+                response: Response = self._send(endpoint.method, url, json=body)
+                if self._replayed(endpoint, response):
+                    return self._recreated(body)
+                return self._finish(endpoint, args, response, options=options)
+
+            timer = CallTimer()
+            outcome = "error"
+            try:
+                response: Response = self._send(endpoint.method, url, json=body, timer=timer)
+                outcome = str(response.status_code)
+                if self._replayed(endpoint, response):
+                    return self._recreated(body)
+                return self._finish(endpoint, args, response, timer, options)
+            except Exception as error:
+                outcome = error.__class__.__name__
+                raise
+            finally:
+                self.instrumentation.record(endpoint.name, outcome, timer)
+
+    def _recreated(self: OpenViduClient, body: dict) -> Any:
+        """Session of a retried create_session answered with a 409, see _replayed."""
+
+        self._invalidate_listings("sessions")
+        return self.get_session(body["customSessionId"])
+
+    def wait_for_recording(
+        self: OpenViduClient,
+        recording_id: str,
+        status: str = "ready",
+        timeout: float = None,
+        interval: float = 0.5,
+        max_interval: float = 10.0,
+    ) -> Any:
+        """Poll the recording until it is in `status` or past it, backing off while its status does not change."""
+
+        validate(status)
+        until = None if timeout is None else monotonic() + timeout
+        backoff = interval
+        previous = None
+        while True:
+            if self.cache is not None:
+                self.cache.invalidate("get_recording", recording_id)
+            recording = self.get_recording(recording_id)
+            if reached(recording, status):
+                return recording
+
+            current = field(recording, "status")
+            backoff = interval if current != previous else min(max_interval, backoff * RecordingWaiter.BACKOFF)
+            previous = current
+            delay = max(poll_delay(recording, interval, max_interval), backoff)
+            if until is not None:
+                left = until - monotonic()
+                if left <= 0:
+                    raise RecordingWaitTimeoutError(
+                        "Recording %s did not reach %s within %s seconds" % (recording_id, status, timeout)
+                    )
+                delay = min(delay, left)
+            sleep(cap(delay))  # The next poll raises DeadlineExceededError once the deadline of the context passed
+
+    def download_recording(
+        self: OpenViduClient,
+        recording_id: str,
+        dest: str,
+        chunk_size: int = CHUNK_SIZE,
+        segments: int = 1,
+        progress: Optional[ProgressCallback] = None,
+    ) -> str:
+        """
+        Stream the file of a ready recording to `dest`, a file or a directory, in chunks of `chunk_size` bytes.
+        A download interrupted in this call or an earlier one resumes with a Range request from its .part file.
+        With segments > 1 large files are fetched as that many byte ranges in parallel. Returns the file path.
+        """
+
+        if self.cache is not None:
+            self.cache.invalidate("get_recording", recording_id)
+        url = recording_url(self.get_recording(recording_id))
+        path = destination(dest, url)
+        part = path + PART
+
+        head = None
+        if segments > 1 or os.path.exists(part + SEGMENTS):
+            head = self._send("HEAD", url, credentials=same_origin(url, self._host))
+        segment_plan = plan(part, head, segments, chunk_size)
+        if segment_plan is None:
+            done = os.path.getsize(part) if os.path.exists(part) else 0
+            self._download_segment(url, part, Segment(0, None, done), chunk_size, Progress(progress, done=done))
+            return finish(part, path)
+
+        tracker = Progress(progress, segment_plan.size, segment_plan.done)
+        left = [segment for segment in segment_plan.segments if not segment.complete]
+        try:
+            with ThreadPoolExecutor(max(1, len(left))) as executor:
+                for future in [
+                    # Each segment runs in a copy of the context, so it keeps the deadline of the download
+                    executor.submit(
+                        copy_context().run, self._download_segment, url, part, segment, chunk_size, tracker
+                    )
+                    for segment in left
+                ]:
+                    future.result()
+        finally:
+            segment_plan.save()
+        return finish(part, path)
+
+    def _download_segment(
+        self: OpenViduClient, url: str, part: str, segment: Segment, chunk_size: int, progress: Progress
+    ) -> None:
+        """Write the bytes left of the segment at their offset, resuming when the stream breaks off."""
+
+        attempt = 0
+        while True:
+            response: Response = self._send(
+                "GET", url, stream=True, headers=segment.headers(), credentials=same_origin(url, self._host)
             )
-
-        return response.json()
-
-    def delete_connection(self: OpenViduClient, session_id: str, connection_id: str) -> dict:
-        """."""
-
-        session_url: str = urljoin(self._apis["session"], session_id)
-        connection_url: str = urljoin(session_url, "connection")
-        url: str = urljoin(connection_url, connection_id)
-        with Client(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = client.delete(url, headers=self._headers)
-
-        if response.status_code == 400:
-            raise SessionDoesNotExistError("No Session exists for the passed SESSION_ID")
-        if response.status_code == 404:
-            raise ConnectionNotFound("No Connection for the passed CONNECTION_ID")
-
-        return response.json()
-
-    def start_recording(self: OpenViduClient, **kwargs: str) -> dict:
-        """."""
-
-        url: str = urljoin(self._apis["recordings"], "start")
-        with Client(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = client.post(url, headers=self._headers, json=kwargs)
-
-        if response.status_code == 400:
-            raise RecordingBodyParameterError("Problem with some body parameter")
-        if response.status_code == 404:
-            raise SessionNotFoundError("No session exists for the passed session body parameter")
-        if response.status_code == 406:
-            raise RecordingNoConnectedParticipantsError("The session has no connected participants")
-        if response.status_code == 409:
-            raise RecordingNotConfiguredForMediaNodeError(
-                "The session is not configured for using MediaMode ROUTED or it is already being recorded"
-            )
-        if response.status_code == 422:
-            raise RecordingResolutionOrBrowserSettingsError(
-                "resolution parameter exceeds acceptable values (for both width and height, min 100px and max 1999px) "
-                "or trying to start a recording with both hasAudio and hasVideo to false"
-            )
-        if response.status_code == 501:
-            raise RecordingDisabledOnServerError(
-                "OpenVidu Server recording module is disabled: "
-                "OPENVIDU_RECORDING configuration property is set to false"
-            )
-
-        return response.json()
-
-    def stop_recording(self: OpenViduClient, recording_id: str) -> dict:
-        """."""
-
-        stop_url: str = urljoin(self._apis["recordings"], "stop")
-        url: str = urljoin(stop_url, recording_id)
-        with Client() as client:
-            response: Response = client.post(url, headers=self._headers)
-
-        if response.status_code == 404:
-            raise RecordingNotFoundError("No recording exists for the passed RECORDING_ID")
-        if response.status_code == 406:
-            raise RecordingStartingProgressError(
-                "Recording has starting status. Wait until started status before stopping the recording"
-            )
-        if response.status_code == 501:
-            raise RecordingDisabledOnServerError(
-                "OpenVidu Server recording module is disabled: "
-                "OPENVIDU_RECORDING configuration property is set to false"
-            )
-
-        return response.json()
-
-    def get_recording(self: OpenViduClient, recording_id: str) -> dict:
-        """."""
-
-        url: str = urljoin(self._apis["recordings"], recording_id)
-        with Client() as client:
-            response: Response = client.get(url, headers=self._headers)
-
-        if response.status_code == 404:
-            raise RecordingNotFoundError("No recording exists for the passed RECORDING_ID")
-        if response.status_code == 501:
-            raise RecordingDisabledOnServerError(
-                "OpenVidu Server recording module is disabled: "
-                "OPENVIDU_RECORDING configuration property is set to false"
-            )
-
-        return response.json()
-
-    def get_recordings(self: OpenViduClient) -> dict:
-        """."""
-
-        with Client(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = client.get(self._apis["recordings"], headers=self._headers)
-
-        if response.status_code == 501:
-            raise RecordingDisabledOnServerError(
-                "OpenVidu Server recording module is disabled: "
-                "OPENVIDU_RECORDING configuration property is set to false"
-            )
-
-        return response.json()
-
-    def delete_recording(self: OpenViduClient, recording_id: str) -> dict:
-        """."""
-
-        url: str = urljoin(self._apis["recordings"], recording_id)
-        with Client(verify=self._verify, timeout=self._timeout) as client:
-            response: Response = client.delete(url, headers=self._headers)
-
-        if response.status_code == 404:
-            raise RecordingNotFoundError("No recording exists for the passed RECORDING_ID")
-        if response.status_code == 409:
-            raise RecordingNotCompletedError("The recording has started status. Stop it before deletion")
-        if response.status_code == 501:
-            raise RecordingDisabledOnServerError(
-                "OpenVidu Server recording module is disabled: "
-                "OPENVIDU_RECORDING configuration property is set to false"
-            )
-
-        return response.json()
+            try:
+                mode = open_mode(response, segment, progress)
+                if mode is None:
+                    return
+                with open(part, mode) as file:
+                    file.seek(segment.offset)
+                    for chunk in response.iter_bytes(chunk_size):
+                        check()
+                        file.write(chunk)
+                        segment.done += len(chunk)
+                        progress.add(len(chunk))
+                if segment.end is None or segment.complete:
+                    return
+            except TransportError:
+                if attempt + 1 >= self.retry.attempts:
+                    raise
+            finally:
+                response.close()
+            attempt += 1
+            if attempt >= self.retry.attempts:
+                raise Error("Download of %s broke off at byte %d" % (url, segment.offset))
+
+    def iter_sessions(self: OpenViduClient, projection: Any = None) -> Iterator[dict]:
+        """Sessions of the server, yielded one at a time while the response streams in, optionally projected."""
+
+        return self._iter_page(ENDPOINTS_BY_NAME["get_sessions"], projection)
+
+    def iter_recordings(self: OpenViduClient, projection: Any = None) -> Iterator[dict]:
+        """Recordings of the server, yielded one at a time while the response streams in, optionally projected."""
+
+        return self._iter_page(ENDPOINTS_BY_NAME["get_recordings"], projection)
+
+    def _iter_page(self: OpenViduClient, endpoint: Endpoint, projection: Any = None) -> Iterator[dict]:
+        """Parse the content array of a paged response incrementally, holding one element at a time."""
+
+        response: Response = self._send("GET", self._urls[endpoint.name], stream=True)
+        try:
+            self._raise_for_status(endpoint, response)
+            self._raise_for_error(endpoint, response)
+
+            fields = as_projection(projection)
+            parser = ContentParser()
+            for chunk in response.iter_bytes():
+                for element in parser.feed(chunk):
+                    data = self.codec.loads(element) if fields is None else fields.project(element, self.codec)
+                    yield self._parse(data, endpoint.model)
+        finally:
+            response.close()
+
+
+def _method(endpoint: Endpoint) -> Callable:
+    """API method of OpenViduClient for the endpoint."""
+
+    def method(self: OpenViduClient, *args: str, **kwargs: Any) -> Any:
+        return self._call(endpoint, args, kwargs)
+
+    return method
+
+
+bind(OpenViduClient, _method)
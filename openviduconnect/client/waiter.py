@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Tuple
+
+from .deadline import current_deadline
+from ..exceptions import (
+    RecordingDisabledOnServerError,
+    RecordingFailedError,
+    RecordingNotFoundError,
+    RecordingWaitTimeoutError,
+)
+from ..exceptions.base import Error
+
+logger = logging.getLogger(__name__)
+
+# Statuses a recording goes through, "failed" may end any of them
+STATUSES = ("starting", "started", "stopped", "ready")
+FAILED = "failed"
+
+
+def field(recording: Any, key: str) -> Any:
+    """Field of a recording, whether the client returns dicts or models."""
+
+    return recording.get(key) if isinstance(recording, dict) else getattr(recording, key)
+
+
+def reached(recording: Any, status: str) -> bool:
+    """Whether the recording is in `status` or past it, raise RecordingFailedError once it failed."""
+
+    current = field(recording, "status")
+    if current == status:
+        return True
+    if current == FAILED:
+        raise RecordingFailedError("Recording %s failed while waiting for %s" % (field(recording, "id"), status))
+    if current not in STATUSES or status not in STATUSES:
+        return False
+    return STATUSES.index(current) >= STATUSES.index(status)
+
+
+def poll_delay(recording: Any, interval: float, max_interval: float) -> float:
+    """
+    Seconds until the recording is worth polling again: soon while starting, at the longest while it records
+    (only stop_recording moves it on) and, while processing after the stop, in proportion to its duration.
+    """
+
+    status = field(recording, "status")
+    if status == "started":
+        return max_interval
+    if status == "stopped":
+        return min(max_interval, max(interval, (field(recording, "duration") or 0.0) * 0.02))
+    return interval
+
+
+def validate(status: str) -> None:
+    """."""
+
+    if status not in STATUSES and status != FAILED:
+        raise ValueError("Unknown recording status %r, expected one of %s" % (status, ", ".join(STATUSES)))
+
+
+class RecordingWaiter(object):
+    """
+    Introduction: Waiters of recording statuses of one AsyncOpenViduClient.
+    Objective: Serve every pending wait_for_recording from one shared get_recordings poll with adaptive backoff.
+    Params: AsyncOpenViduClient, shortest and longest seconds between two polls
+    """
+
+    BACKOFF = 1.5
+
+    def __init__(self: RecordingWaiter, client: Any, interval: float = 0.5, max_interval: float = 10.0) -> None:
+        """
+        @:param client: AsyncOpenViduClient polled
+        @:param interval: Shortest seconds between two polls (Default: 0.5)
+        @:param max_interval: Longest seconds between two polls (Default: 10.0)
+        """
+
+        self.client = client
+        self.interval = interval
+        self.max_interval = max_interval
+        self.polls = 0
+        self._waiters: Dict[str, List[Tuple[str, asyncio.Future]]] = {}
+        self._task: asyncio.Task = None
+        self._wake: asyncio.Event = None
+
+    def __repr__(self):
+        """."""
+
+        return "<%s waiting=%d polls=%d>" % (self.__class__.__name__, len(self._waiters), self.polls)
+
+    async def wait(self: RecordingWaiter, recording_id: str, status: str, timeout: float = None) -> Any:
+        """Recording once it is in `status` or past it."""
+
+        future = asyncio.get_event_loop().create_future()
+        self._waiters.setdefault(recording_id, []).append((status, future))
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+        else:
+            self._wake.set()
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise RecordingWaitTimeoutError(
+                "Recording %s did not reach %s within %s seconds" % (recording_id, status, timeout)
+            )
+        finally:
+            self._discard(recording_id, future)
+
+    def _discard(self: RecordingWaiter, recording_id: str, future: asyncio.Future) -> None:
+        """Forget a waiter that finished, timed out or got cancelled."""
+
+        waiters = self._waiters.get(recording_id)
+        if waiters is None:
+            return
+        waiters[:] = [waiter for waiter in waiters if waiter[1] is not future]
+        if not waiters:
+            del self._waiters[recording_id]
+
+    async def _run(self: RecordingWaiter) -> None:
+        """Poll while anyone waits, backing off while nothing changes."""
+
+        current_deadline.set(None)  # Shared by every waiter, each one bounds its own wait
+        backoff = self.interval
+        previous: Dict[str, str] = {}
+        while self._waiters:
+            self._wake.clear()
+            try:
+                delays, previous, changed = self._dispatch(await self._poll(), previous)
+            except RecordingDisabledOnServerError as error:
+                self._fail_all(error)
+                return
+            except Exception:
+                logger.exception("Polling the recordings for wait_for_recording failed")
+                delays, changed = [], False
+
+            backoff = self.interval if changed else min(self.max_interval, backoff * self.BACKOFF)
+            delay = max(min(delays, default=self.max_interval), backoff)
+            try:
+                # New waiters wake the loop, but never sooner than the shortest interval
+                await asyncio.wait_for(self._wake.wait(), delay)
+                await asyncio.sleep(self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self: RecordingWaiter) -> Dict[str, Any]:
+        """Every recording of the server by id, bypassing the response cache."""
+
+        if self.client.cache is not None:
+            self.client.cache.invalidate("get_recordings")
+        page = await self.client.get_recordings()
+        self.polls += 1
+        recordings = page["content"] if isinstance(page, dict) else page
+        return {field(recording, "id"): recording for recording in recordings}
+
+    def _dispatch(
+        self: RecordingWaiter, recordings: Dict[str, Any], previous: Dict[str, str]
+    ) -> Tuple[List[float], Dict[str, str], bool]:
+        """Resolve the waiters the poll answers, return the next delays, statuses and whether any changed."""
+
+        delays = []
+        statuses = {}
+        for recording_id, waiters in list(self._waiters.items()):
+            recording = recordings.get(recording_id)
+            for status, future in waiters:
+                if future.done():
+                    continue
+                if recording is None:
+                    future.set_exception(RecordingNotFoundError("No recording exists for the passed RECORDING_ID"))
+                    continue
+                try:
+                    if reached(recording, status):
+                        future.set_result(recording)
+                except Error as error:
+                    future.set_exception(error)
+            if recording is not None:
+                statuses[recording_id] = field(recording, "status")
+                delays.append(poll_delay(recording, self.interval, self.max_interval))
+        return delays, statuses, statuses != previous
+
+    def _fail_all(self: RecordingWaiter, error: Exception) -> None:
+        """."""
+
+        for waiters in self._waiters.values():
+            for _, future in waiters:
+                if not future.done():
+                    future.set_exception(error)
@@ -15,4 +15,8 @@ from .errors import (
     RecordingNotFoundError,
     RecordingStartingProgressError,
     RecordingNotCompletedError,
+    CircuitOpenError,
+    RecordingFailedError,
+    RecordingWaitTimeoutError,
+    DeadlineExceededError,
 )
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from .base import OpenViduError
+from .base import Error, OpenViduError
 
 
 class SessionBodyParameterError(OpenViduError):
@@ -97,3 +97,27 @@ class RecordingNotCompletedError(OpenViduError):
     """Stop recording before accessing it"""
 
     status = 409
+
+
+class CircuitOpenError(Error):
+    """Host is failing, calls are refused until the circuit breaker lets a probe through"""
+
+    pass
+
+
+class RecordingFailedError(Error):
+    """Recording ended in the failed status instead of the awaited one"""
+
+    pass
+
+
+class RecordingWaitTimeoutError(Error, TimeoutError):
+    """Recording did not reach the awaited status in time"""
+
+    pass
+
+
+class DeadlineExceededError(Error, TimeoutError):
+    """Deadline of the call ran out, retries and waits included"""
+
+    pass
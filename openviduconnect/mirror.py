@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from .client.deadline import current_deadline
+from .exceptions import RecordingDisabledOnServerError
+from .models import Model
+
+logger = logging.getLogger(__name__)
+
+
+class MirrorEvent(object):
+    """Change of one mirrored object: kind is session, connection or recording, type is added, changed or removed"""
+
+    __slots__ = ("kind", "type", "id", "old", "new")
+
+    ADDED = "added"
+    CHANGED = "changed"
+    REMOVED = "removed"
+
+    def __init__(self: MirrorEvent, kind: str, type: str, id: str, old: dict = None, new: dict = None) -> None:
+        """."""
+
+        self.kind = kind
+        self.type = type
+        self.id = id
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        """."""
+
+        return "<%s %s %s %r>" % (self.__class__.__name__, self.kind, self.type, self.id)
+
+
+def _plain(item: Any) -> dict:
+    """JSON object of a response item, whether the client returns dicts or models."""
+
+    return item.to_dict() if isinstance(item, Model) else item
+
+
+def _content(page: Any) -> List[dict]:
+    """Items of a paged response, whether the client returns dicts or lists of models."""
+
+    if isinstance(page, dict):
+        return page.get("content") or []
+    return [_plain(item) for item in page]
+
+
+class SessionIndex(object):
+    """
+    Introduction: In-memory index of the sessions, connections and recordings of one OpenVidu Server.
+    Objective: Answer lookups by session, connection and recording id in O(1), every mutation returns its events.
+    Params: None
+    """
+
+    def __init__(self: SessionIndex) -> None:
+        """."""
+
+        self.sessions: Dict[str, dict] = {}
+        self.connections: Dict[str, dict] = {}
+        self.recordings: Dict[str, dict] = {}
+        self._session_of: Dict[str, str] = {}
+        self._connections_of: Dict[str, Set[str]] = {}
+
+    def __repr__(self):
+        """."""
+
+        return "<%s sessions=%d connections=%d recordings=%d>" % (
+            self.__class__.__name__, len(self.sessions), len(self.connections), len(self.recordings)
+        )
+
+    # Lookups
+
+    def session(self: SessionIndex, session_id: str) -> Optional[dict]:
+        """Session without its connections, see session_connections."""
+
+        return self.sessions.get(session_id)
+
+    def connection(self: SessionIndex, connection_id: str) -> Optional[dict]:
+        """."""
+
+        return self.connections.get(connection_id)
+
+    def recording(self: SessionIndex, recording_id: str) -> Optional[dict]:
+        """."""
+
+        return self.recordings.get(recording_id)
+
+    def session_of(self: SessionIndex, connection_id: str) -> Optional[str]:
+        """Id of the session holding the connection."""
+
+        return self._session_of.get(connection_id)
+
+    def session_connections(self: SessionIndex, session_id: str) -> List[dict]:
+        """."""
+
+        return [self.connections[connection_id] for connection_id in self._connections_of.get(session_id, ())]
+
+    def publisher_count(self: SessionIndex, session_id: str) -> int:
+        """Streams published in the session."""
+
+        return sum(len(connection.get("publishers") or ()) for connection in self.session_connections(session_id))
+
+    def is_recording(self: SessionIndex, recording_id: str) -> bool:
+        """Whether the recording is starting or started."""
+
+        recording = self.recordings.get(recording_id)
+        return recording is not None and recording.get("status") in ("starting", "started")
+
+    # Mutations
+
+    def upsert_session(self: SessionIndex, session: dict) -> List[MirrorEvent]:
+        """Add or update a session, its connections too when the session carries them."""
+
+        session = dict(session)
+        connections = session.pop("connections", None)
+        session_id = session["id"]
+        old = self.sessions.get(session_id)
+        self.sessions[session_id] = session
+        events = []
+        if old is None:
+            self._connections_of.setdefault(session_id, set())
+            events.append(MirrorEvent("session", MirrorEvent.ADDED, session_id, new=session))
+        elif old != session:
+            events.append(MirrorEvent("session", MirrorEvent.CHANGED, session_id, old=old, new=session))
+        if connections is not None:
+            events += self.replace_connections(session_id, _content(connections))
+        return events
+
+    def remove_session(self: SessionIndex, session_id: str) -> List[MirrorEvent]:
+        """Remove a session and its connections."""
+
+        old = self.sessions.pop(session_id, None)
+        events = []
+        for connection_id in list(self._connections_of.get(session_id, ())):
+            events += self.remove_connection(connection_id)
+        self._connections_of.pop(session_id, None)
+        if old is not None:
+            events.append(MirrorEvent("session", MirrorEvent.REMOVED, session_id, old=old))
+        return events
+
+    def upsert_connection(self: SessionIndex, session_id: str, connection: dict) -> List[MirrorEvent]:
+        """."""
+
+        connection_id = connection["id"]
+        old = self.connections.get(connection_id)
+        self.connections[connection_id] = connection
+        self._session_of[connection_id] = session_id
+        self._connections_of.setdefault(session_id, set()).add(connection_id)
+        if old is None:
+            return [MirrorEvent("connection", MirrorEvent.ADDED, connection_id, new=connection)]
+        if old != connection:
+            return [MirrorEvent("connection", MirrorEvent.CHANGED, connection_id, old=old, new=connection)]
+        return []
+
+    def remove_connection(self: SessionIndex, connection_id: str) -> List[MirrorEvent]:
+        """."""
+
+        old = self.connections.pop(connection_id, None)
+        session_id = self._session_of.pop(connection_id, None)
+        if session_id is not None:
+            self._connections_of.get(session_id, set()).discard(connection_id)
+        if old is None:
+            return []
+        return [MirrorEvent("connection", MirrorEvent.REMOVED, connection_id, old=old)]
+
+    def replace_connections(self: SessionIndex, session_id: str, connections: Iterable[dict]) -> List[MirrorEvent]:
+        """Make the connections of the session match a fresh listing."""
+
+        events = []
+        seen = set()
+        for connection in connections:
+            seen.add(connection["id"])
+            events += self.upsert_connection(session_id, connection)
+        for connection_id in list(self._connections_of.get(session_id, set()) - seen):
+            events += self.remove_connection(connection_id)
+        return events
+
+    def replace_sessions(self: SessionIndex, sessions: Iterable[dict]) -> List[MirrorEvent]:
+        """Make the sessions and connections match a fresh get_sessions snapshot."""
+
+        events = []
+        seen = set()
+        for session in sessions:
+            seen.add(session["id"])
+            events += self.upsert_session(session)
+        for session_id in list(self.sessions.keys() - seen):
+            events += self.remove_session(session_id)
+        return events
+
+    def upsert_recording(self: SessionIndex, recording: dict) -> List[MirrorEvent]:
+        """."""
+
+        recording_id = recording["id"]
+        old = self.recordings.get(recording_id)
+        self.recordings[recording_id] = recording
+        if old is None:
+            return [MirrorEvent("recording", MirrorEvent.ADDED, recording_id, new=recording)]
+        if old != recording:
+            return [MirrorEvent("recording", MirrorEvent.CHANGED, recording_id, old=old, new=recording)]
+        return []
+
+    def remove_recording(self: SessionIndex, recording_id: str) -> List[MirrorEvent]:
+        """."""
+
+        old = self.recordings.pop(recording_id, None)
+        return [] if old is None else [MirrorEvent("recording", MirrorEvent.REMOVED, recording_id, old=old)]
+
+    def replace_recordings(self: SessionIndex, recordings: Iterable[dict]) -> List[MirrorEvent]:
+        """Make the recordings match a fresh get_recordings snapshot."""
+
+        events = []
+        seen = set()
+        for recording in recordings:
+            seen.add(recording["id"])
+            events += self.upsert_recording(recording)
+        for recording_id in list(self.recordings.keys() - seen):
+            events += self.remove_recording(recording_id)
+        return events
+
+
+class SessionMirror(object):
+    """
+    Introduction: Live local copy of the sessions, connections and recordings of an OpenVidu Server.
+    Objective: Poll get_sessions/get_recordings on a schedule, diff every snapshot and answer lookups without calls.
+    Params: AsyncOpenViduClient, poll interval in seconds and whether recordings are mirrored
+    """
+
+    def __init__(
+        self: SessionMirror,
+        client: Any,
+        interval: float = 5.0,
+        recordings: bool = True,
+        queue_size: int = 10000,
+    ) -> None:
+        """
+        @:param client: AsyncOpenViduClient of the server
+        @:param interval: Seconds between two polls (Default: 5.0)
+        @:param recordings: Mirror the recordings too, turned off when the server has them disabled (Default: True)
+        @:param queue_size: Events kept per subscriber of events(), the oldest are dropped beyond (Default: 10000)
+        """
+
+        self.client = client
+        self.interval = interval
+        self.recordings = recordings
+        self.index = SessionIndex()
+        self.polls = 0
+        self._queue_size = queue_size
+        self._subscribers: List[asyncio.Queue] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def __repr__(self):
+        """."""
+
+        return "<%s %r polls=%d>" % (self.__class__.__name__, self.index, self.polls)
+
+    async def __aenter__(self):
+        """."""
+
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """."""
+
+        await self.stop()
+
+    # Lookups, no network call
+
+    def session(self: SessionMirror, session_id: str) -> Optional[dict]:
+        """."""
+
+        return self.index.session(session_id)
+
+    def connection(self: SessionMirror, connection_id: str) -> Optional[dict]:
+        """."""
+
+        return self.index.connection(connection_id)
+
+    def recording(self: SessionMirror, recording_id: str) -> Optional[dict]:
+        """."""
+
+        return self.index.recording(recording_id)
+
+    def session_of(self: SessionMirror, connection_id: str) -> Optional[str]:
+        """Id of the session holding the connection."""
+
+        return self.index.session_of(connection_id)
+
+    def publisher_count(self: SessionMirror, session_id: str) -> int:
+        """."""
+
+        return self.index.publisher_count(session_id)
+
+    def is_recording(self: SessionMirror, recording_id: str) -> bool:
+        """."""
+
+        return self.index.is_recording(recording_id)
+
+    # Polling
+
+    async def refresh(self: SessionMirror) -> List[MirrorEvent]:
+        """Poll the server once, apply the differences and publish their events."""
+
+        events = self.index.replace_sessions(_content(await self.client.get_sessions()))
+        if self.recordings:
+            try:
+                events += self.index.replace_recordings(_content(await self.client.get_recordings()))
+            except RecordingDisabledOnServerError:
+                self.recordings = False
+        self.polls += 1
+        self.publish(events)
+        return events
+
+    def publish(self: SessionMirror, events: Iterable[MirrorEvent]) -> None:
+        """Hand events to every subscriber of events()."""
+
+        for queue in self._subscribers:
+            for event in events:
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(event)
+
+    async def start(self: SessionMirror) -> None:
+        """Take a first snapshot, then keep polling in the background."""
+
+        if self._task is None:
+            await self.refresh()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self: SessionMirror) -> None:
+        """."""
+
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self: SessionMirror) -> None:
+        """."""
+
+        current_deadline.set(None)  # The task runs in its own copy of the context, free of the deadline of start()
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Polling the OpenVidu Server for the session mirror failed")
+
+    async def events(self: SessionMirror) -> AsyncIterator[MirrorEvent]:
+        """Changes applied to the mirror from now on, until the consumer stops iterating."""
+
+        queue: asyncio.Queue = asyncio.Queue(self._queue_size)
+        self._subscribers.append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.remove(queue)
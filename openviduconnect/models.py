@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class Model(object):
+    """
+    Introduction: Compact typed view of an object returned by the REST APIs.
+    Objective: Keep fields in slots instead of a per-object dict, unknown keys are kept aside in `extra`.
+    Params: Decoded JSON object of the API
+    """
+
+    __slots__ = ("extra",)
+
+    # (attribute, JSON key) pairs copied into the slots of the model
+    _fields: Tuple[Tuple[str, str], ...] = ()
+    # JSON keys read by the model itself, left out of `extra`
+    _keys: frozenset = frozenset()
+
+    def __init__(self: Model, data: Dict[str, Any]) -> None:
+        """
+        @:param data: Decoded JSON object of the API
+        """
+
+        for attribute, key in self._fields:
+            setattr(self, attribute, data.get(key))
+        extra = None
+        if not self._keys.issuperset(data):
+            extra = {key: value for key, value in data.items() if key not in self._keys}
+        self.extra: Optional[Dict[str, Any]] = extra
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Slot every field and remember the JSON keys the model reads."""
+
+        super().__init_subclass__(**kwargs)
+        cls._keys = frozenset(key for _, key in cls._fields) | cls._keys
+
+    def __repr__(self):
+        """."""
+
+        return "<%s %r>" % (self.__class__.__name__, getattr(self, "id", None))
+
+    def __eq__(self, other: Any) -> bool:
+        """."""
+
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def to_dict(self: Model) -> Dict[str, Any]:
+        """JSON object of the API the model was built from."""
+
+        data = dict(self.extra or ())
+        for attribute, key in self._fields:
+            data[key] = getattr(self, attribute)
+        return data
+
+
+class Publisher(Model):
+    """Stream published by a Connection"""
+
+    _fields = (
+        ("stream_id", "streamId"),
+        ("created_at", "createdAt"),
+        ("media_options", "mediaOptions"),
+    )
+    __slots__ = tuple(attribute for attribute, _ in _fields)
+
+    @property
+    def id(self: Publisher) -> str:
+        """."""
+
+        return self.stream_id
+
+
+class Connection(Model):
+    """Connection of a participant to a Session, its publishers are parsed on first access"""
+
+    _fields = (
+        ("id", "id"),
+        ("object", "object"),
+        ("type", "type"),
+        ("status", "status"),
+        ("session_id", "sessionId"),
+        ("created_at", "createdAt"),
+        ("active_at", "activeAt"),
+        ("location", "location"),
+        ("ip", "ip"),
+        ("platform", "platform"),
+        ("token", "token"),
+        ("server_data", "serverData"),
+        ("client_data", "clientData"),
+        ("record", "record"),
+        ("role", "role"),
+        ("kurento_options", "kurentoOptions"),
+        ("rtsp_uri", "rtspUri"),
+        ("adaptative_bitrate", "adaptativeBitrate"),
+        ("only_play_with_subscribers", "onlyPlayWithSubscribers"),
+        ("network_cache", "networkCache"),
+        ("subscribers", "subscribers"),
+    )
+    _keys = frozenset({"publishers"})
+    __slots__ = tuple(attribute for attribute, _ in _fields) + ("_publishers",)
+
+    def __init__(self: Connection, data: Dict[str, Any]) -> None:
+        """
+        @:param data: Decoded JSON object of the API
+        """
+
+        super().__init__(data)
+        self._publishers = data.get("publishers")
+
+    @property
+    def publishers(self: Connection) -> List[Publisher]:
+        """."""
+
+        publishers = self._publishers
+        if publishers and not isinstance(publishers[0], Publisher):
+            publishers = self._publishers = [Publisher(publisher) for publisher in publishers]
+        return publishers or []
+
+    def to_dict(self: Connection) -> Dict[str, Any]:
+        """."""
+
+        data = super().to_dict()
+        if self._publishers is not None:
+            data["publishers"] = [
+                publisher.to_dict() if isinstance(publisher, Publisher) else publisher
+                for publisher in self._publishers
+            ]
+        return data
+
+
+class Session(Model):
+    """Session of the server, its connections are parsed on first access"""
+
+    _fields = (
+        ("id", "id"),
+        ("object", "object"),
+        ("created_at", "createdAt"),
+        ("media_mode", "mediaMode"),
+        ("recording_mode", "recordingMode"),
+        ("default_recording_properties", "defaultRecordingProperties"),
+        ("custom_session_id", "customSessionId"),
+        ("recording", "recording"),
+        ("forced_video_codec", "forcedVideoCodec"),
+        ("allow_transcoding", "allowTranscoding"),
+    )
+    _keys = frozenset({"connections"})
+    __slots__ = tuple(attribute for attribute, _ in _fields) + ("_connections", "connection_count")
+
+    def __init__(self: Session, data: Dict[str, Any]) -> None:
+        """
+        @:param data: Decoded JSON object of the API
+        """
+
+        super().__init__(data)
+        connections = data.get("connections") or {}
+        self.connection_count: int = connections.get("numberOfElements", 0)
+        self._connections = connections.get("content")
+
+    @property
+    def connections(self: Session) -> List[Connection]:
+        """."""
+
+        connections = self._connections
+        if connections and not isinstance(connections[0], Connection):
+            connections = self._connections = [Connection(connection) for connection in connections]
+        return connections or []
+
+    def to_dict(self: Session) -> Dict[str, Any]:
+        """."""
+
+        data = super().to_dict()
+        if self._connections is not None:
+            data["connections"] = {
+                "numberOfElements": self.connection_count,
+                "content": [
+                    connection.to_dict() if isinstance(connection, Connection) else connection
+                    for connection in self._connections
+                ],
+            }
+        return data
+
+
+class Recording(Model):
+    """Recording of a Session"""
+
+    _fields = (
+        ("id", "id"),
+        ("object", "object"),
+        ("name", "name"),
+        ("output_mode", "outputMode"),
+        ("has_audio", "hasAudio"),
+        ("has_video", "hasVideo"),
+        ("recording_layout", "recordingLayout"),
+        ("custom_layout", "customLayout"),
+        ("resolution", "resolution"),
+        ("frame_rate", "frameRate"),
+        ("session_id", "sessionId"),
+        ("created_at", "createdAt"),
+        ("size", "size"),
+        ("duration", "duration"),
+        ("url", "url"),
+        ("status", "status"),
+    )
+    __slots__ = tuple(attribute for attribute, _ in _fields)
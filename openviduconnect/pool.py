@@ -0,0 +1,521 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from time import monotonic
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .client.deadline import current_deadline
+from .client.scheduler import BACKGROUND, current_priority
+from .exceptions import ConnectionNotFound, SessionDoesNotExistError, SessionExistsError, SessionNotFoundError
+from .models import Session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = "default"
+
+# Answers of a deletion meaning the connection is already gone, with its session or on its own
+_GONE = (SessionNotFoundError, SessionDoesNotExistError, ConnectionNotFound)
+
+
+def _id(item: Any) -> str:
+    """Id of a response item, whether the client returns dicts or models."""
+
+    return item["id"] if isinstance(item, dict) else item.id
+
+
+class _Bucket(object):
+    """Pre-created connections of one (session, profile), oldest first."""
+
+    __slots__ = ("session_id", "profile", "options", "low", "high", "entries", "refilling")
+
+    def __init__(self: _Bucket, session_id: str, profile: str, options: dict, low: int, high: int) -> None:
+        """."""
+
+        self.session_id = session_id
+        self.profile = profile
+        self.options = options
+        self.low = low
+        self.high = high
+        self.entries: Deque[Tuple[float, Any]] = deque()
+        self.refilling = False
+
+
+class _Refiller(ABC):
+    """Background task running refill() every interval, or sooner when _notify() is called."""
+
+    interval = 1.0
+    _wake: Optional[asyncio.Event] = None
+    _task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        """."""
+
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """."""
+
+        await self.stop()
+
+    @abstractmethod
+    async def refill(self: _Refiller) -> None:
+        """One pass of expiry and refill."""
+
+    @abstractmethod
+    async def _drain(self: _Refiller) -> None:
+        """Release what the pool holds, called by stop()."""
+
+    def _notify(self: _Refiller) -> None:
+        """Wake the background refill before its interval elapses."""
+
+        if self._wake is not None:
+            self._wake.set()
+
+    async def start(self: _Refiller) -> None:
+        """Fill the pool, then keep it filled in the background."""
+
+        if self._task is None:
+            self._wake = asyncio.Event()
+            await self.refill()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self: _Refiller, drain: bool = True) -> None:
+        """Stop refilling, releasing what the pool holds unless `drain` is False."""
+
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._wake = None
+        if drain:
+            await self._drain()
+
+    async def _run(self: _Refiller) -> None:
+        """Refill with the background priority, so the calls of the users go first."""
+
+        current_priority.set(BACKGROUND)  # The task runs in its own copy of the context
+        current_deadline.set(None)  # Not bound by the deadline of the call that started it
+        while True:
+            # Not wait_for(): before Python 3.12 it can turn the cancellation of stop() into a TimeoutError
+            wake = asyncio.ensure_future(self._wake.wait())
+            try:
+                await asyncio.wait((wake,), timeout=self.interval)
+            finally:
+                wake.cancel()
+            self._wake.clear()
+            refill = asyncio.ensure_future(self.refill())
+            try:
+                await asyncio.shield(refill)
+            except asyncio.CancelledError:
+                # Let the pass land, so what it created on the server is pooled and then drained by stop()
+                await asyncio.gather(refill, return_exceptions=True)
+                raise
+            except Exception:
+                logger.exception("Refilling the %s failed", self.__class__.__name__)
+
+
+class TokenPool(_Refiller):
+    """
+    Introduction: Pool of pre-created connections, so a join pops a token from memory instead of a round trip.
+    Objective: Keep every (session, profile) between its watermarks in the background and revoke stale connections.
+    Params: AsyncOpenViduClient, low and high watermarks, seconds a pooled connection lives and refill concurrency
+    """
+
+    def __init__(
+        self: TokenPool,
+        client: Any,
+        low: int = 2,
+        high: int = 10,
+        ttl: float = 600.0,
+        interval: float = 1.0,
+        concurrency: int = 10,
+    ) -> None:
+        """
+        @:param client: AsyncOpenViduClient of the server
+        @:param low: Refill a (session, profile) right away once fewer connections are pooled (Default: 2)
+        @:param high: Connections pooled per (session, profile), every pass tops the pool up to it (Default: 10)
+        @:param ttl: Seconds a pooled connection is handed out, then revoked with delete_connection (Default: 600.0)
+        @:param interval: Seconds between two expiry and refill passes (Default: 1.0)
+        @:param concurrency: create_connection/delete_connection calls in flight per bucket (Default: 10)
+        """
+
+        if not 0 <= low <= high:
+            raise ValueError("The watermarks need 0 <= low <= high, got low=%d high=%d" % (low, high))
+
+        self.client = client
+        self.low = low
+        self.high = high
+        self.ttl = ttl
+        self.interval = interval
+        self.concurrency = concurrency
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.revoked = 0
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self._in_flight: Set[asyncio.Future] = set()
+        self._unrevoked: Dict[str, List[Any]] = {}
+
+    def __repr__(self):
+        """."""
+
+        return "<%s buckets=%d pooled=%d hits=%d misses=%d>" % (
+            self.__class__.__name__, len(self._buckets), self.pooled, self.hits, self.misses
+        )
+
+    @property
+    def pooled(self: TokenPool) -> int:
+        """Connections currently pooled over every bucket."""
+
+        return sum(len(bucket.entries) for bucket in self._buckets.values())
+
+    def available(self: TokenPool, session_id: str, profile: str = DEFAULT_PROFILE) -> int:
+        """."""
+
+        bucket = self._buckets.get((session_id, profile))
+        return 0 if bucket is None else len(bucket.entries)
+
+    def add(
+        self: TokenPool,
+        session_id: str,
+        profile: str = DEFAULT_PROFILE,
+        low: int = None,
+        high: int = None,
+        **options: Any,
+    ) -> None:
+        """Pool connections of the session created with the body parameters `options` under the name `profile`."""
+
+        key = (session_id, profile)
+        if key not in self._buckets:
+            self._buckets[key] = _Bucket(
+                session_id, profile, options, self.low if low is None else low, self.high if high is None else high
+            )
+        self._notify()
+
+    async def acquire(self: TokenPool, session_id: str, profile: str = DEFAULT_PROFILE) -> Any:
+        """Connection, holding the token, for one join: pooled when available, created right away otherwise."""
+
+        bucket = self._buckets.get((session_id, profile))
+        if bucket is None:
+            raise KeyError("No profile %r is pooled for the session %r, see add" % (profile, session_id))
+
+        now = monotonic()
+        stale = []
+        connection = None
+        while bucket.entries:
+            expires, candidate = bucket.entries.popleft()
+            if expires > now:
+                connection = candidate
+                break
+            stale.append(candidate)
+        if stale:
+            self._spawn(self._revoke(session_id, stale))
+        if len(bucket.entries) < bucket.low:
+            self._notify()
+
+        if connection is not None:
+            self.hits += 1
+            return connection
+        self.misses += 1
+        return await self.client.create_connection(session_id, **bucket.options)
+
+    async def discard(self: TokenPool, session_id: str) -> None:
+        """Stop pooling for the session and revoke its pooled connections, call it before closing the session."""
+
+        connections = []
+        for key in [key for key in self._buckets if key[0] == session_id]:
+            connections += [connection for _, connection in self._buckets.pop(key).entries]
+        await self._revoke(session_id, connections)
+
+    async def stop(self: TokenPool, drain: bool = True) -> None:
+        """Stop refilling, await the revocations in flight and revoke the pooled connections unless `drain` is False."""
+
+        await super().stop(drain)
+        while self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    def _spawn(self: TokenPool, coroutine: Awaitable[None]) -> None:
+        """Run a revocation in the background, awaited by stop()."""
+
+        task = asyncio.ensure_future(coroutine)
+        self._in_flight.add(task)
+        task.add_done_callback(self._landed)
+
+    def _landed(self: TokenPool, task: asyncio.Future) -> None:
+        """."""
+
+        self._in_flight.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Revoking expired connections failed: %r", task.exception())
+
+    @property
+    def unrevoked(self: TokenPool) -> int:
+        """Connections whose deletion failed, retried by the next pass."""
+
+        return sum(len(connections) for connections in self._unrevoked.values())
+
+    async def refill(self: TokenPool) -> None:
+        """One pass: retry the failed revocations, revoke the expired connections, then top every bucket up."""
+
+        await asyncio.gather(
+            self._retry_revoke(), *(self._refill(bucket) for bucket in list(self._buckets.values()))
+        )
+
+    async def _refill(self: TokenPool, bucket: _Bucket) -> None:
+        """."""
+
+        if bucket.refilling:
+            return
+        bucket.refilling = True
+        try:
+            now = monotonic()
+            stale = []
+            while bucket.entries and bucket.entries[0][0] <= now:
+                stale.append(bucket.entries.popleft()[1])
+            await self._revoke(bucket.session_id, stale)
+
+            missing = bucket.high - len(bucket.entries)
+            if missing <= 0:
+                return
+            results = await self.client.create_connections(
+                bucket.session_id, [bucket.options] * missing, concurrency=self.concurrency
+            )
+            expires = monotonic() + self.ttl
+            created = [result for result in results if not isinstance(result, Exception)]
+            self.created += len(created)
+            if any(isinstance(result, SessionNotFoundError) for result in results):
+                # The session is gone, so are the connections pooled for it
+                self._buckets.pop((bucket.session_id, bucket.profile), None)
+                return
+            if self._buckets.get((bucket.session_id, bucket.profile)) is not bucket:
+                await self._revoke(bucket.session_id, created)  # Discarded while the connections were created
+                return
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.warning("Pre-creating a connection of the session %s failed: %r", bucket.session_id, result)
+            bucket.entries.extend((expires, connection) for connection in created)
+        finally:
+            bucket.refilling = False
+
+    async def _revoke(self: TokenPool, session_id: str, connections: List[Any]) -> None:
+        """
+        Delete unused connections, the ones already gone with their session count as revoked too.
+        The others are still on the server: kept aside and retried by the next pass.
+        """
+
+        if not connections:
+            return
+        results = await self.client.delete_connections(
+            session_id, [_id(connection) for connection in connections], concurrency=self.concurrency
+        )
+        for connection, result in zip(connections, results):
+            if not isinstance(result, Exception) or isinstance(result, _GONE):
+                self.revoked += 1
+                continue
+            logger.warning(
+                "Revoking the connection %s of the session %s failed: %r", _id(connection), session_id, result
+            )
+            self._unrevoked.setdefault(session_id, []).append(connection)
+
+    async def _retry_revoke(self: TokenPool) -> None:
+        """Revoke again the connections whose deletion failed."""
+
+        unrevoked, self._unrevoked = self._unrevoked, {}
+        await asyncio.gather(*(self._revoke(session_id, connections) for session_id, connections in unrevoked.items()))
+
+    async def _drain(self: TokenPool) -> None:
+        """Revoke every pooled connection, last try for the failed revocations."""
+
+        await asyncio.gather(
+            self._retry_revoke(), *(self.discard(session_id) for session_id in {key[0] for key in self._buckets})
+        )
+        if self._unrevoked:
+            logger.error("%d connections could not be revoked and stay on the server", self.unrevoked)
+
+
+class SessionPool(_Refiller):
+    """
+    Introduction: Warm pool of pre-created sessions, handed out instantly and bound to a local name on demand.
+    Objective: Skip the create_session round trip at meeting start and resolve customSessionId races in one call.
+    Params: AsyncOpenViduClient, warm sessions kept, seconds before an idle one is deleted and create_session body
+    """
+
+    def __init__(
+        self: SessionPool,
+        client: Any,
+        size: int = 5,
+        max_idle: float = 3600.0,
+        interval: float = 5.0,
+        concurrency: int = 10,
+        **properties: Any,
+    ) -> None:
+        """
+        @:param client: AsyncOpenViduClient of the server
+        @:param size: Warm sessions kept ready (Default: 5)
+        @:param max_idle: Seconds a warm session waits, it is deleted and replaced after (Default: 3600.0)
+        @:param interval: Seconds between two garbage collection and refill passes (Default: 5.0)
+        @:param concurrency: create_session/delete_session calls in flight (Default: 10)
+        @:param properties: Body parameters of the sessions, mediaMode, recordingMode, defaultRecordingProperties...
+        """
+
+        self.client = client
+        self.size = size
+        self.max_idle = max_idle
+        self.interval = interval
+        self.concurrency = concurrency
+        self.properties = properties
+        self.bound: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.collected = 0
+        self._warm: Deque[Tuple[float, Any]] = deque()
+        self._uncollected: List[Any] = []
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._refilling = False
+
+    def __repr__(self):
+        """."""
+
+        return "<%s warm=%d bound=%d hits=%d misses=%d>" % (
+            self.__class__.__name__, len(self._warm), len(self.bound), self.hits, self.misses
+        )
+
+    @property
+    def warm(self: SessionPool) -> int:
+        """Sessions ready to be handed out."""
+
+        return len(self._warm)
+
+    async def acquire(self: SessionPool, name: str = None) -> Any:
+        """Warm session, bound to `name` when given so later calls with the same name get the same session."""
+
+        if name is None:
+            return await self._take()
+        if name in self.bound:
+            return self.bound[name]
+        return await self._single(name, self._take)
+
+    async def get_or_create(self: SessionPool, custom_session_id: str, **properties: Any) -> Any:
+        """
+        Session with the customSessionId, created on the server when missing. The id is shared with other processes,
+        so when one of them won the race (409) a minimal session is returned without fetching it.
+        """
+
+        if custom_session_id in self.bound:
+            return self.bound[custom_session_id]
+        return await self._single(custom_session_id, lambda: self._create_named(custom_session_id, properties))
+
+    async def release(self: SessionPool, name: str) -> None:
+        """Delete the session of `name` on the server and unbind it, it stays bound when the deletion fails."""
+
+        session = self.bound.get(name)
+        if session is None:
+            return
+        try:
+            await self.client.delete_session(_id(session))
+        except SessionNotFoundError:
+            pass  # Already closed, e.g. by the server once its last participant left
+        if self.bound.get(name) is session:
+            del self.bound[name]
+
+    async def refill(self: SessionPool) -> None:
+        """One pass: delete the warm sessions idle for longer than max_idle, then create new ones up to size."""
+
+        if self._refilling:
+            return
+        self._refilling = True
+        try:
+            now = monotonic()
+            idle = []
+            while self._warm and self._warm[0][0] + self.max_idle <= now:
+                idle.append(self._warm.popleft()[1])
+            while len(self._warm) > self.size:
+                idle.append(self._warm.popleft()[1])
+            uncollected, self._uncollected = self._uncollected, []
+            await self._collect(uncollected + idle)
+
+            missing = self.size - len(self._warm)
+            if missing <= 0:
+                return
+            results = await self.client.create_sessions([self.properties] * missing, concurrency=self.concurrency)
+            created = monotonic()
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.warning("Pre-creating a session failed: %r", result)
+                    continue
+                self.created += 1
+                self._warm.append((created, result))
+        finally:
+            self._refilling = False
+
+    async def _take(self: SessionPool) -> Any:
+        """Pop a warm session, create one right away when the pool is empty."""
+
+        self._notify()
+        if self._warm:
+            self.hits += 1
+            return self._warm.popleft()[1]
+        self.misses += 1
+        return await self.client.create_session(**self.properties)
+
+    async def _create_named(self: SessionPool, custom_session_id: str, properties: dict) -> Any:
+        """."""
+
+        try:
+            return await self.client.create_session(
+                **{**self.properties, **properties, "customSessionId": custom_session_id}
+            )
+        except SessionExistsError:
+            session = {"id": custom_session_id, "object": "session", "customSessionId": custom_session_id}
+            return self.client._parse(session, Session)
+
+    async def _single(self: SessionPool, name: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run one factory per name at a time, concurrent callers share its session, which gets bound to the name."""
+
+        task = self._in_flight.get(name)
+        if task is None:
+            task = self._in_flight[name] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda done: self._bind(name, done))
+        # Shielded so a cancelled caller does not cancel the call the other callers wait on
+        return await asyncio.shield(task)
+
+    def _bind(self: SessionPool, name: str, task: asyncio.Future) -> None:
+        """Bind the session of a finished factory to its name."""
+
+        del self._in_flight[name]
+        if not task.cancelled() and task.exception() is None:
+            self.bound[name] = task.result()
+
+    async def _collect(self: SessionPool, sessions: List[Any]) -> None:
+        """Delete the sessions, the ones still on the server after a failure are retried by the next pass."""
+
+        if not sessions:
+            return
+        results = await self.client.bulk(
+            [lambda session_id=_id(session): self.client.delete_session(session_id) for session in sessions],
+            self.concurrency,
+        )
+        for session, result in zip(sessions, results):
+            if not isinstance(result, Exception) or isinstance(result, SessionNotFoundError):
+                self.collected += 1
+                continue
+            logger.warning("Deleting the idle session %s failed: %r", _id(session), result)
+            self._uncollected.append(session)
+
+    async def _drain(self: SessionPool) -> None:
+        """Delete the warm sessions, bound ones are in use and left to release()."""
+
+        sessions = self._uncollected + [session for _, session in self._warm]
+        self._uncollected = []
+        self._warm.clear()
+        await self._collect(sessions)
+        if self._uncollected:
+            logger.error("%d idle sessions could not be deleted and stay on the server", len(self._uncollected))
@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from time import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .client.deadline import current_deadline
+from .client.scheduler import BACKGROUND, prioritized
+from .exceptions import (
+    ConnectionNotFound,
+    RecordingDisabledOnServerError,
+    RecordingNotCompletedError,
+    RecordingNotFoundError,
+    RecordingStartingProgressError,
+    SessionDoesNotExistError,
+    SessionNotFoundError,
+)
+from .mirror import _content
+
+logger = logging.getLogger(__name__)
+
+SESSION = "session"
+CONNECTION = "connection"
+RECORDING = "recording"
+
+# Answers meaning the object went away between the listing and the deletion
+GONE = (SessionNotFoundError, SessionDoesNotExistError, ConnectionNotFound, RecordingNotFoundError)
+
+
+def _age(item: dict, now: float) -> float:
+    """Seconds since the object was created, createdAt is in milliseconds."""
+
+    return now - (item.get("createdAt") or 0) / 1000.0
+
+
+class Rule(ABC):
+    """Selection of stale objects of one kind: session, connection or recording"""
+
+    kind = ""
+
+    @abstractmethod
+    def matches(self: Rule, item: dict, now: float) -> bool:
+        """Whether the object, as listed by the server, is stale at `now` (seconds since the epoch)."""
+
+    def __repr__(self):
+        """."""
+
+        return "<%s>" % (self.__class__.__name__,)
+
+
+class EmptySession(Rule):
+    """Session without any connection, pending ones included, `min_age` seconds after its creation"""
+
+    kind = SESSION
+
+    def __init__(self: EmptySession, min_age: float = 600.0) -> None:
+        """."""
+
+        self.min_age = min_age
+
+    def matches(self: EmptySession, item: dict, now: float) -> bool:
+        """."""
+
+        connections = item.get("connections") or {}
+        return not connections.get("numberOfElements") and _age(item, now) >= self.min_age
+
+    def __repr__(self):
+        """."""
+
+        return "<%s older than %ss>" % (self.__class__.__name__, self.min_age)
+
+
+class SessionOlderThan(Rule):
+    """Session created more than `max_age` seconds ago, whoever is still connected"""
+
+    kind = SESSION
+
+    def __init__(self: SessionOlderThan, max_age: float) -> None:
+        """."""
+
+        self.max_age = max_age
+
+    def matches(self: SessionOlderThan, item: dict, now: float) -> bool:
+        """."""
+
+        return _age(item, now) >= self.max_age
+
+    def __repr__(self):
+        """."""
+
+        return "<%s %ss>" % (self.__class__.__name__, self.max_age)
+
+
+class PendingConnection(Rule):
+    """Connection whose token was never used, `max_age` seconds after its creation"""
+
+    kind = CONNECTION
+
+    def __init__(self: PendingConnection, max_age: float = 3600.0) -> None:
+        """."""
+
+        self.max_age = max_age
+
+    def matches(self: PendingConnection, item: dict, now: float) -> bool:
+        """."""
+
+        return item.get("status") == "pending" and _age(item, now) >= self.max_age
+
+    def __repr__(self):
+        """."""
+
+        return "<%s older than %ss>" % (self.__class__.__name__, self.max_age)
+
+
+class RecordingOlderThan(Rule):
+    """
+    Recording in one of `statuses` created more than `max_age` seconds ago.
+    A "started" recording is stopped, its deletion waits for a later sweep once its file is processed.
+    """
+
+    kind = RECORDING
+
+    def __init__(self: RecordingOlderThan, max_age: float, statuses: Iterable[str] = ("ready", "failed")) -> None:
+        """."""
+
+        self.max_age = max_age
+        self.statuses = frozenset(statuses)
+
+    def matches(self: RecordingOlderThan, item: dict, now: float) -> bool:
+        """."""
+
+        return item.get("status") in self.statuses and _age(item, now) >= self.max_age
+
+    def __repr__(self):
+        """."""
+
+        return "<%s %ss %s>" % (self.__class__.__name__, self.max_age, "/".join(sorted(self.statuses)))
+
+
+class SweepReport(object):
+    """Outcome of one sweep: selected (kind, id, rule) triples, then what was deleted, stopped, skipped or failed"""
+
+    __slots__ = ("dry_run", "selected", "deleted", "stopped", "skipped", "errors")
+
+    def __init__(self: SweepReport, dry_run: bool) -> None:
+        """."""
+
+        self.dry_run = dry_run
+        self.selected: List[Tuple[str, str, Rule]] = []
+        self.deleted: List[str] = []
+        self.stopped: List[str] = []
+        self.skipped: Dict[str, str] = {}
+        self.errors: Dict[str, Exception] = {}
+
+    def __repr__(self):
+        """."""
+
+        return "<%s%s selected=%d deleted=%d stopped=%d skipped=%d errors=%d>" % (
+            self.__class__.__name__, " dry-run" if self.dry_run else "", len(self.selected), len(self.deleted),
+            len(self.stopped), len(self.skipped), len(self.errors),
+        )
+
+
+class Sweeper(object):
+    """
+    Introduction: Garbage collector of the stale sessions, connections and recordings of an OpenVidu Server.
+    Objective: Select them from the listings by rules, then delete them with bounded concurrency, once or periodically.
+    Params: AsyncOpenViduClient, rules, concurrency of the deletions and seconds between two sweeps
+    """
+
+    def __init__(
+        self: Sweeper,
+        client: Any,
+        rules: Iterable[Rule],
+        concurrency: int = 10,
+        interval: float = 300.0,
+        dry_run: bool = False,
+        keep: Callable[[str, dict], bool] = None,
+    ) -> None:
+        """
+        @:param client: AsyncOpenViduClient of the server
+        @:param rules: Rules selecting the stale objects, an object matching any of them is stale
+        @:param concurrency: Deletions in flight (Default: 10)
+        @:param interval: Seconds between two sweeps of the background task (Default: 300.0)
+        @:param dry_run: Only report what would be deleted (Default: False)
+        @:param keep: Called with (kind, object), True protects the object from every rule (Default: None)
+        """
+
+        self.client = client
+        self.rules = list(rules)
+        self.concurrency = concurrency
+        self.interval = interval
+        self.dry_run = dry_run
+        self.keep = keep
+        self.sweeps = 0
+        self.last_report: Optional[SweepReport] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __repr__(self):
+        """."""
+
+        return "<%s rules=%d sweeps=%d>" % (self.__class__.__name__, len(self.rules), self.sweeps)
+
+    async def __aenter__(self):
+        """."""
+
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """."""
+
+        await self.stop()
+
+    def _rules(self: Sweeper, kind: str) -> List[Rule]:
+        """."""
+
+        return [rule for rule in self.rules if rule.kind == kind]
+
+    def _stale(self: Sweeper, kind: str, item: dict, now: float) -> Optional[Rule]:
+        """First rule the object matches, None when it is kept."""
+
+        if self.keep is not None and self.keep(kind, item):
+            return None
+        return next((rule for rule in self._rules(kind) if rule.matches(item, now)), None)
+
+    async def sweep(self: Sweeper, dry_run: bool = None) -> SweepReport:
+        """List the server once, select the stale objects and delete them unless this is a dry run."""
+
+        report = SweepReport(self.dry_run if dry_run is None else dry_run)
+        with prioritized(BACKGROUND):
+            now = time()
+            if self._rules(SESSION) or self._rules(CONNECTION):
+                sessions = _content(await self.client.get_sessions(pending_connections=True, web_rtc_stats=False))
+                await self._sweep_sessions(sessions, now, report)
+            if self._rules(RECORDING):
+                try:
+                    recordings = _content(await self.client.get_recordings())
+                except RecordingDisabledOnServerError:
+                    recordings = []
+                await self._sweep_recordings(recordings, now, report)
+        self.sweeps += 1
+        self.last_report = report
+        return report
+
+    async def _sweep_sessions(self: Sweeper, sessions: List[dict], now: float, report: SweepReport) -> None:
+        """Delete the stale sessions, then the stale connections of the sessions left."""
+
+        stale = []
+        connections: Dict[str, List[str]] = {}
+        for session in sessions:
+            rule = self._stale(SESSION, session, now)
+            if rule is not None:
+                report.selected.append((SESSION, session["id"], rule))
+                if session.get("recording"):
+                    report.skipped[session["id"]] = "recording in progress"
+                else:
+                    stale.append(session["id"])
+                continue
+            for connection in (session.get("connections") or {}).get("content") or []:
+                rule = self._stale(CONNECTION, connection, now)
+                if rule is not None:
+                    report.selected.append((CONNECTION, connection["id"], rule))
+                    connections.setdefault(session["id"], []).append(connection["id"])
+        if report.dry_run:
+            return
+
+        calls = [lambda session_id=session_id: self.client.delete_session(session_id) for session_id in stale]
+        ids = list(stale)
+        for session_id, connection_ids in connections.items():
+            calls += [
+                lambda session_id=session_id, connection_id=connection_id: self.client.delete_connection(
+                    session_id, connection_id
+                )
+                for connection_id in connection_ids
+            ]
+            ids += connection_ids
+        self._record(ids, await self.client.bulk(calls, self.concurrency), report)
+
+    async def _sweep_recordings(self: Sweeper, recordings: List[dict], now: float, report: SweepReport) -> None:
+        """Delete the stale recordings, stopping the ones still recording."""
+
+        stale = []
+        started = []
+        for recording in recordings:
+            rule = self._stale(RECORDING, recording, now)
+            if rule is None:
+                continue
+            report.selected.append((RECORDING, recording["id"], rule))
+            if recording.get("status") in ("starting", "started"):
+                started.append(recording["id"])
+            else:
+                stale.append(recording["id"])
+        if report.dry_run:
+            return
+
+        results = await self.client.bulk(
+            [lambda recording_id=recording_id: self.client.stop_recording(recording_id) for recording_id in started],
+            self.concurrency,
+        )
+        for recording_id, result in zip(started, results):
+            if isinstance(result, RecordingStartingProgressError):
+                report.skipped[recording_id] = "recording still starting"
+            elif isinstance(result, GONE):
+                report.skipped[recording_id] = "already gone"
+            elif isinstance(result, Exception):
+                report.errors[recording_id] = result
+            else:
+                # Deleted by a later sweep, once the file is processed
+                report.stopped.append(recording_id)
+
+        results = await self.client.bulk(
+            [lambda recording_id=recording_id: self.client.delete_recording(recording_id) for recording_id in stale],
+            self.concurrency,
+        )
+        self._record(stale, results, report)
+
+    @staticmethod
+    def _record(ids: List[str], results: List[Any], report: SweepReport) -> None:
+        """Sort the outcomes of the deletions into the report."""
+
+        for object_id, result in zip(ids, results):
+            if isinstance(result, RecordingNotCompletedError):
+                report.skipped[object_id] = "recording not completed"
+            elif isinstance(result, GONE):
+                report.skipped[object_id] = "already gone"
+            elif isinstance(result, Exception):
+                report.errors[object_id] = result
+            else:
+                report.deleted.append(object_id)
+
+    async def start(self: Sweeper) -> None:
+        """Sweep in the background every interval, starting now."""
+
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self: Sweeper) -> None:
+        """."""
+
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self: Sweeper) -> None:
+        """."""
+
+        current_deadline.set(None)  # The task runs in its own copy of the context, free of the deadline of start()
+        while True:
+            try:
+                report = await self.sweep()
+                if report.selected:
+                    logger.info("Sweep of the OpenVidu Server: %r", report)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Sweeping the OpenVidu Server failed")
+            await asyncio.sleep(self.interval)
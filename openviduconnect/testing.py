@@ -0,0 +1,612 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import re
+import time
+from base64 import b64encode
+from random import Random
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs
+
+from httpx import AsyncBaseTransport, BaseTransport, ConnectError, ReadTimeout, Request, Response
+
+Latency = Union[None, float, Callable[[], float]]
+
+
+def constant(seconds: float) -> Callable[[], float]:
+    """Latency distribution always waiting `seconds`."""
+
+    return lambda: seconds
+
+
+def uniform(low: float, high: float, seed: int = None) -> Callable[[], float]:
+    """Latency distribution uniform between `low` and `high` seconds."""
+
+    random = Random(seed)
+    return lambda: random.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float = 0.5, seed: int = None) -> Callable[[], float]:
+    """Long tailed latency distribution around `median` seconds."""
+
+    random = Random(seed)
+    mu = math.log(median)
+    return lambda: random.lognormvariate(mu, sigma)
+
+
+def exponential(mean: float, seed: int = None) -> Callable[[], float]:
+    """Latency distribution with exponential inter-arrival around `mean` seconds."""
+
+    random = Random(seed)
+    return lambda: random.expovariate(1.0 / mean)
+
+
+def _now() -> int:
+    """Epoch milliseconds, the time unit of the REST APIs."""
+
+    return int(time.time() * 1000)
+
+
+class FakeOpenViduServer(BaseTransport, AsyncBaseTransport):
+    """
+    Introduction: In-memory stand-in of the OpenVidu Server REST APIs, plugged in as an httpx transport.
+    Objective: Benchmark and exercise the clients offline, with state transitions and the documented status codes.
+    Params: Secret, latency distribution, fault rates and recording behaviour
+    """
+
+    CUSTOM_SESSION_ID = re.compile(r"^[a-zA-Z0-9_\-]+$")
+    MEDIA_MODES = ("ROUTED", "RELAYED")
+    RECORDING_MODES = ("ALWAYS", "MANUAL")
+    OUTPUT_MODES = ("COMPOSED", "COMPOSED_QUICK_START", "INDIVIDUAL")
+    ROLES = ("SUBSCRIBER", "PUBLISHER", "MODERATOR")
+    TYPES = ("WEBRTC", "IPCAM")
+
+    def __init__(
+        self: FakeOpenViduServer,
+        secret: str = "MY_SECRET",
+        host: str = "https://openvidu.fake",
+        latency: Latency = None,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        connect_error_rate: float = 0.0,
+        recording_enabled: bool = True,
+        recording_startup: float = 0.0,
+        recording_processing: float = 0.0,
+        seed: int = None,
+    ) -> None:
+        """
+        @:param secret: Secret expected in the Basic authorization of the requests (Default: "MY_SECRET")
+        @:param host: Host used in the tokens and recording URLs (Default: "https://openvidu.fake")
+        @:param latency: Seconds or distribution (constant, uniform, lognormal, exponential) per request, past the read
+            timeout of the request it raises httpx.ReadTimeout as a network transport would (Default: None)
+        @:param error_rate: Share of requests answered with `error_status` (Default: 0.0)
+        @:param error_status: Status code of the injected errors (Default: 503)
+        @:param connect_error_rate: Share of requests failing with httpx.ConnectError (Default: 0.0)
+        @:param recording_enabled: False answers every recording API with 501 (Default: True)
+        @:param recording_startup: Seconds a recording stays "starting" before "started" (Default: 0.0)
+        @:param recording_processing: Seconds a recording stays "stopped" before "ready" (Default: 0.0)
+        @:param seed: Seed of the fault injection (Default: None)
+        """
+
+        self.secret = secret
+        self.host = host.rstrip("/")
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.connect_error_rate = connect_error_rate
+        self.recording_enabled = recording_enabled
+        self.recording_startup = recording_startup
+        self.recording_processing = recording_processing
+
+        self.sessions: Dict[str, dict] = {}
+        self.recordings: Dict[str, dict] = {}
+        self._stopped_at: Dict[str, int] = {}
+        self.requests = 0
+        self.faults = 0
+        self._random = Random(seed)
+        self._counter = 0
+        self._lock = Lock()
+        self._authorization = "Basic %s" % (b64encode(("OPENVIDUAPP:%s" % (secret,)).encode()).decode(),)
+
+    def __repr__(self):
+        """."""
+
+        return "<%s sessions=%d recordings=%d requests=%d>" % (
+            self.__class__.__name__, len(self.sessions), len(self.recordings), self.requests
+        )
+
+    # Transport interface
+
+    def handle_request(self: FakeOpenViduServer, request: Request) -> Response:
+        """."""
+
+        delay = self._delay()
+        timeout = self._read_timeout(request)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise self._timed_out(request, delay)
+        if delay:
+            time.sleep(delay)
+        return self._answer(request)
+
+    async def handle_async_request(self: FakeOpenViduServer, request: Request) -> Response:
+        """."""
+
+        delay = self._delay()
+        timeout = self._read_timeout(request)
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise self._timed_out(request, delay)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._answer(request)
+
+    def _delay(self: FakeOpenViduServer) -> float:
+        """Latency of the next request."""
+
+        if self.latency is None:
+            return 0.0
+        if callable(self.latency):
+            return max(0.0, self.latency())
+        return self.latency
+
+    @staticmethod
+    def _read_timeout(request: Request) -> Optional[float]:
+        """Read timeout of the request, the network transports enforce it, None without one."""
+
+        return (request.extensions.get("timeout") or {}).get("read")
+
+    def _timed_out(self: FakeOpenViduServer, request: Request, delay: float) -> ReadTimeout:
+        """Error of a request whose latency exceeds its read timeout."""
+
+        with self._lock:
+            self.requests += 1
+            self.faults += 1
+        return ReadTimeout("Latency of %.3f seconds exceeds the read timeout" % (delay,), request=request)
+
+    def _answer(self: FakeOpenViduServer, request: Request) -> Response:
+        """Inject the faults, then route the request."""
+
+        with self._lock:
+            self.requests += 1
+            if self.connect_error_rate and self._random.random() < self.connect_error_rate:
+                self.faults += 1
+                raise ConnectError("Injected connect error", request=request)
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.faults += 1
+                return Response(self.error_status, request=request)
+            if request.headers.get("Authorization") != self._authorization:
+                return Response(401, request=request)
+            if request.url.path.startswith("/openvidu/recordings/"):
+                return self._serve_file(request)
+            status, data = self._route(request)
+
+        if data is None:
+            return Response(status, request=request)
+        return Response(status, content=json.dumps(data).encode(), request=request,
+                        headers={"Content-Type": "application/json"})
+
+    def _route(self: FakeOpenViduServer, request: Request) -> Tuple[int, Optional[dict]]:
+        """Status code and JSON answer of the request."""
+
+        path = request.url.path
+        if not path.startswith("/openvidu/api/"):
+            return 404, None
+        parts = path[len("/openvidu/api/"):].strip("/").split("/")
+        method = request.method
+        query = {key: values[-1] for key, values in parse_qs(request.url.query.decode()).items()}
+        body = {}
+        if request.content:
+            try:
+                body = json.loads(request.content)
+            except ValueError:
+                return 400, None
+            if not isinstance(body, dict):
+                return 400, None
+
+        if parts[0] == "sessions":
+            if len(parts) == 1:
+                if method == "POST":
+                    return self._create_session(body)
+                if method == "GET":
+                    return 200, self._page(
+                        [self._session_view(session, query) for session in self.sessions.values()]
+                    )
+            elif len(parts) == 2:
+                if method == "GET":
+                    session = self.sessions.get(parts[1])
+                    return (404, None) if session is None else (200, self._session_view(session, query))
+                if method == "DELETE":
+                    return self._delete_session(parts[1])
+            elif len(parts) == 3 and parts[2] == "connection":
+                if method == "POST":
+                    return self._create_connection(parts[1], body)
+                if method == "GET":
+                    session = self.sessions.get(parts[1])
+                    if session is None:
+                        return 404, None
+                    return 200, self._page(list(session["connections"].values()))
+            elif len(parts) == 4 and parts[2] == "connection":
+                if method == "GET":
+                    session = self.sessions.get(parts[1])
+                    if session is None:
+                        return 400, None
+                    connection = session["connections"].get(parts[3])
+                    return (404, None) if connection is None else (200, connection)
+                if method == "PATCH":
+                    return self._update_connection(parts[1], parts[3], body)
+                if method == "DELETE":
+                    return self._delete_connection(parts[1], parts[3])
+        elif parts[0] == "recordings":
+            if not self.recording_enabled:
+                return 501, None
+            self._advance_recordings()
+            if parts[1:] == ["start"] and method == "POST":
+                return self._start_recording(body)
+            if len(parts) == 3 and parts[1] == "stop" and method == "POST":
+                return self._stop_recording(parts[2])
+            if len(parts) == 1 and method == "GET":
+                return 200, self._page(list(self.recordings.values()))
+            if len(parts) == 2:
+                if method == "GET":
+                    recording = self.recordings.get(parts[1])
+                    return (404, None) if recording is None else (200, recording)
+                if method == "DELETE":
+                    return self._delete_recording(parts[1])
+        return 405, None
+
+    # Sessions
+
+    def _create_session(self: FakeOpenViduServer, body: dict) -> Tuple[int, Optional[dict]]:
+        """."""
+
+        custom_session_id = body.get("customSessionId") or ""
+        media_mode = body.get("mediaMode", "ROUTED")
+        recording_mode = body.get("recordingMode", "MANUAL")
+        if (
+            media_mode not in self.MEDIA_MODES
+            or recording_mode not in self.RECORDING_MODES
+            or (custom_session_id and not self.CUSTOM_SESSION_ID.match(custom_session_id))
+        ):
+            return 400, None
+        if custom_session_id in self.sessions:
+            return 409, None
+
+        session_id = custom_session_id or "ses_%s" % (self._next_id(),)
+        defaults = {
+            "name": "", "hasAudio": True, "hasVideo": True, "outputMode": "COMPOSED",
+            "recordingLayout": "BEST_FIT", "resolution": "1280x720", "frameRate": 25, "shmSize": 536870912,
+        }
+        defaults.update(body.get("defaultRecordingProperties") or {})
+        self.sessions[session_id] = {
+            "id": session_id,
+            "object": "session",
+            "createdAt": _now(),
+            "mediaMode": media_mode,
+            "recordingMode": recording_mode,
+            "defaultRecordingProperties": defaults,
+            "customSessionId": custom_session_id,
+            "connections": {},
+            "recording": False,
+            "forcedVideoCodec": body.get("forcedVideoCodec", "VP8"),
+            "allowTranscoding": bool(body.get("allowTranscoding", False)),
+        }
+        return 200, self._session_view(self.sessions[session_id], {})
+
+    def _delete_session(self: FakeOpenViduServer, session_id: str) -> Tuple[int, Optional[dict]]:
+        """."""
+
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return 404, None
+        for recording in self.recordings.values():
+            if recording["sessionId"] == session_id and recording["status"] in ("starting", "started"):
+                self._finish_recording(recording)
+        return 204, None
+
+    def _session_view(self: FakeOpenViduServer, session: dict, query: Dict[str, str]) -> dict:
+        """JSON of the session, honouring the pendingConnections query flag."""
+
+        pending = query.get("pendingConnections", "true") != "false"
+        connections = [
+            connection for connection in session["connections"].values()
+            if pending or connection["status"] != "pending"
+        ]
+        view = dict(session)
+        view["connections"] = self._page(connections)
+        return view
+
+    # Connections
+
+    def _create_connection(self: FakeOpenViduServer, session_id: str, body: dict) -> Tuple[int, Optional[dict]]:
+        """."""
+
+        kind = body.get("type", "WEBRTC")
+        role = body.get("role", "PUBLISHER")
+        if kind not in self.TYPES or role not in self.ROLES or (kind == "IPCAM" and not body.get("rtspUri")):
+            return 400, None
+        session = self.sessions.get(session_id)
+        if session is None:
+            return 404, None
+        if kind == "IPCAM" and "unreachable" in body["rtspUri"]:
+            return 500, None
+
+        connection_id = "con_%s" % (self._next_id(),)
+        token = "wss://%s?sessionId=%s&token=tok_%s" % (self.host.split("://")[-1], session_id, connection_id[4:])
+        connection = {
+            "id": connection_id,
+            "object": "connection",
+            "type": kind,
+            "status": "active" if kind == "IPCAM" else "pending",
+            "sessionId": session_id,
+            "createdAt": _now(),
+            "activeAt": _now() if kind == "IPCAM" else None,
+            "location": None,
+            "ip": None,
+            "platform": None,
+            "token": token,
+            "serverData": body.get("data", ""),
+            "clientData": None,
+            "record": bool(body.get("record", True)),
+            "role": role if kind == "WEBRTC" else None,
+            "kurentoOptions": body.get("kurentoOptions"),
+            "rtspUri": body.get("rtspUri"),
+            "adaptativeBitrate": body.get("adaptativeBitrate"),
+            "onlyPlayWithSubscribers": body.get("onlyPlayWithSubscribers"),
+            "networkCache": body.get("networkCache"),
+            "publishers": [],
+            "subscribers": [],
+        }
+        if kind == "IPCAM":
+            connection["publishers"].append(self._publisher(connection_id))
+        session["connections"][connection_id] = connection
+        return 200, connection
+
+    def _update_connection(
+        self: FakeOpenViduServer, session_id: str, connection_id: str, body: dict
+    ) -> Tuple[int, Optional[dict]]:
+        """."""
+
+        if set(body) - {"role", "record"} or body.get("role", "PUBLISHER") not in self.ROLES:
+            return 400, None
+        session = self.sessions.get(session_id)
+        connection = None if session is None else session["connections"].get(connection_id)
+        if connection is None:
+            return 404, None
+        connection.update(body)
+        return 200, connection
+
+    def _delete_connection(self: FakeOpenViduServer, session_id: str, connection_id: str) -> Tuple[int, Optional[dict]]:
+        """."""
+
+        session = self.sessions.get(session_id)
+        if session is None:
+            return 400, None
+        if session["connections"].pop(connection_id, None) is None:
+            return 404, None
+        return 204, None
+
+    def _publisher(self: FakeOpenViduServer, connection_id: str) -> dict:
+        """."""
+
+        return {
+            "streamId": "str_CAM_%s" % (connection_id,),
+            "createdAt": _now(),
+            "mediaOptions": {
+                "hasAudio": True, "audioActive": True, "hasVideo": True, "videoActive": True,
+                "typeOfVideo": "CAMERA", "frameRate": 30, "videoDimensions": '{"width":640,"height":480}',
+                "filter": {},
+            },
+        }
+
+    # Recordings
+
+    def _start_recording(self: FakeOpenViduServer, body: dict) -> Tuple[int, Optional[dict]]:
+        """."""
+
+        session_id = body.get("session")
+        output_mode = body.get("outputMode", "COMPOSED")
+        if not session_id or output_mode not in self.OUTPUT_MODES:
+            return 400, None
+        session = self.sessions.get(session_id)
+        if session is None:
+            return 404, None
+        if not any(connection["status"] == "active" for connection in session["connections"].values()):
+            return 406, None
+        if session["mediaMode"] != "ROUTED" or session["recording"]:
+            return 409, None
+        has_audio, has_video = body.get("hasAudio", True), body.get("hasVideo", True)
+        resolution = body.get("resolution", "1280x720")
+        try:
+            width, height = (int(side) for side in resolution.split("x"))
+        except ValueError:
+            return 400, None
+        if not (has_audio or has_video) or not (100 <= width <= 1999 and 100 <= height <= 1999):
+            return 422, None
+
+        recording_id = session_id
+        number = 1
+        while recording_id in self.recordings:
+            recording_id = "%s~%d" % (session_id, number)
+            number += 1
+        name = body.get("name") or recording_id
+        session["recording"] = True
+        recording = self.recordings[recording_id] = {
+            "id": recording_id,
+            "object": "recording",
+            "name": name,
+            "outputMode": output_mode,
+            "hasAudio": has_audio,
+            "hasVideo": has_video,
+            "recordingLayout": body.get("recordingLayout", "BEST_FIT"),
+            "customLayout": body.get("customLayout", ""),
+            "resolution": resolution,
+            "frameRate": body.get("frameRate", 25),
+            "sessionId": session_id,
+            "createdAt": _now(),
+            "size": 0,
+            "duration": 0,
+            "url": None,
+            "status": "starting",
+        }
+        self._advance_recordings()
+        return 200, recording
+
+    def _stop_recording(self: FakeOpenViduServer, recording_id: str) -> Tuple[int, Optional[dict]]:
+        """."""
+
+        recording = self.recordings.get(recording_id)
+        if recording is None:
+            return 404, None
+        if recording["status"] == "starting":
+            return 406, None
+        if recording["status"] == "started":
+            self._finish_recording(recording)
+            self._advance_recordings()
+        return 200, recording
+
+    def _delete_recording(self: FakeOpenViduServer, recording_id: str) -> Tuple[int, Optional[dict]]:
+        """."""
+
+        recording = self.recordings.get(recording_id)
+        if recording is None:
+            return 404, None
+        if recording["status"] in ("starting", "started"):
+            return 409, None
+        del self.recordings[recording_id]
+        return 204, None
+
+    def _finish_recording(self: FakeOpenViduServer, recording: dict) -> None:
+        """Move a started recording to stopped, sizing it from its duration."""
+
+        now = _now()
+        recording["status"] = "stopped"
+        recording["duration"] = round((now - recording["createdAt"]) / 1000.0, 3)
+        recording["size"] = int(recording["duration"] * 125000)  # ~1 Mbps
+        self._stopped_at[recording["id"]] = now
+        session = self.sessions.get(recording["sessionId"])
+        if session is not None:
+            session["recording"] = False
+
+    def _advance_recordings(self: FakeOpenViduServer) -> None:
+        """Apply the starting -> started and stopped -> ready transitions that are due."""
+
+        now = _now()
+        for recording in self.recordings.values():
+            if recording["status"] == "starting" and now - recording["createdAt"] >= self.recording_startup * 1000:
+                recording["status"] = "started"
+            elif (
+                recording["status"] == "stopped"
+                and now - self._stopped_at.get(recording["id"], now) >= self.recording_processing * 1000
+            ):
+                recording["status"] = "ready"
+                self._stopped_at.pop(recording["id"], None)
+                extension = "mp4" if recording["outputMode"] != "INDIVIDUAL" else "zip"
+                recording["url"] = "%s/openvidu/recordings/%s/%s.%s" % (
+                    self.host, recording["id"], recording["name"], extension
+                )
+
+    # Recording files
+
+    def recording_file(self: FakeOpenViduServer, recording_id: str) -> bytes:
+        """Content of the file of a ready recording, `size` deterministic bytes."""
+
+        recording = self.recordings[recording_id]
+        pattern = ("%s:" % (recording_id,)).encode() + bytes(range(256))
+        return (pattern * (recording["size"] // len(pattern) + 1))[:recording["size"]]
+
+    def _serve_file(self: FakeOpenViduServer, request: Request) -> Response:
+        """Answer GET and HEAD of a recording URL, honouring single byte ranges like the OpenVidu Server."""
+
+        parts = request.url.path[len("/openvidu/recordings/"):].split("/")
+        recording = self.recordings.get(parts[0])
+        if len(parts) != 2 or recording is None or recording["status"] != "ready":
+            return Response(404, request=request)
+        if request.method not in ("GET", "HEAD"):
+            return Response(405, request=request)
+
+        content = self.recording_file(parts[0])
+        size = len(content)
+        headers = {"Accept-Ranges": "bytes", "Content-Type": "video/mp4"}
+        if request.method == "HEAD":
+            return Response(200, request=request, headers=dict(headers, **{"Content-Length": str(size)}))
+
+        match = re.match(r"^bytes=(\d+)-(\d*)$", request.headers.get("Range", ""))
+        if match is None:
+            return Response(200, content=content, request=request, headers=headers)
+        start = int(match.group(1))
+        end = min(int(match.group(2)) if match.group(2) else size - 1, size - 1)
+        if start >= size or start > end:
+            return Response(416, request=request, headers={"Content-Range": "bytes */%d" % (size,)})
+        headers["Content-Range"] = "bytes %d-%d/%d" % (start, end, size)
+        return Response(206, content=content[start:end + 1], request=request, headers=headers)
+
+    # Helpers
+
+    def _next_id(self: FakeOpenViduServer) -> str:
+        """."""
+
+        self._counter += 1
+        return "%08x" % (self._counter,)
+
+    @staticmethod
+    def _page(content: List[dict]) -> dict:
+        """."""
+
+        return {"numberOfElements": len(content), "content": content}
+
+    def join(self: FakeOpenViduServer, session_id: str, connection_id: str, publish: bool = True) -> dict:
+        """Simulate a participant connecting with the token of a pending connection."""
+
+        with self._lock:
+            connection = self.sessions[session_id]["connections"][connection_id]
+            connection.update({
+                "status": "active", "activeAt": _now(), "location": "unknown", "ip": "127.0.0.1",
+                "platform": "Chrome 90.0.4430.93 on Linux 64-bit", "clientData": "",
+            })
+            if publish and connection["role"] in ("PUBLISHER", "MODERATOR"):
+                connection["publishers"] = [self._publisher(connection_id)]
+            return connection
+
+    def populate(
+        self: FakeOpenViduServer, sessions: int = 0, connections: int = 0, recordings: int = 0, data_size: int = 0
+    ) -> None:
+        """
+        Fill the server so the listings have realistic sizes.
+        @:param sessions: Sessions to create
+        @:param connections: Active publishing connections per session
+        @:param recordings: Ready recordings to create, spread over the sessions
+        @:param data_size: Length of the serverData of every connection
+        """
+
+        with self._lock:
+            created = []
+            for _ in range(sessions):
+                status, session = self._create_session({})
+                created.append(session["id"])
+                for _ in range(connections):
+                    status, connection = self._create_connection(session["id"], {"data": "x" * data_size})
+                    connection.update({"status": "active", "activeAt": _now(), "ip": "127.0.0.1"})
+                    connection["publishers"] = [self._publisher(connection["id"])]
+            for index in range(recordings if created else 0):
+                session_id = created[index % len(created)]
+                recording_id = session_id if session_id not in self.recordings else "%s~%d" % (session_id, index)
+                self.recordings[recording_id] = {
+                    "id": recording_id, "object": "recording", "name": recording_id, "outputMode": "COMPOSED",
+                    "hasAudio": True, "hasVideo": True, "recordingLayout": "BEST_FIT", "customLayout": "",
+                    "resolution": "1280x720", "frameRate": 25, "sessionId": session_id, "createdAt": _now(),
+                    "size": 7500000, "duration": 60.0, "status": "ready",
+                    "url": "%s/openvidu/recordings/%s/%s.mp4" % (self.host, recording_id, recording_id),
+                }
+
+    def reset(self: FakeOpenViduServer) -> None:
+        """Forget every session, recording and counter."""
+
+        with self._lock:
+            self.sessions.clear()
+            self.recordings.clear()
+            self._stopped_at.clear()
+            self.requests = self.faults = 0
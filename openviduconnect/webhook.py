@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from .mirror import MirrorEvent, SessionIndex, SessionMirror
+
+logger = logging.getLogger(__name__)
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+_REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed"}
+
+# Keys the handler of each event reads, as alternatives: participantId is the connectionId of servers before 2.16
+_REQUIRED: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+    "sessionCreated": (("sessionId",),),
+    "sessionDestroyed": (("sessionId",),),
+    "participantJoined": (("sessionId",), ("connectionId", "participantId")),
+    "participantLeft": (("connectionId", "participantId"),),
+    "webrtcConnectionCreated": (("connectionId",),),
+    "webrtcConnectionDestroyed": (("connectionId",),),
+    "recordingStatusChanged": (("id",), ("sessionId",), ("status",)),
+}
+
+
+class WebhookReceiver(object):
+    """
+    Introduction: Receiver of the webhook events POSTed by the OpenVidu Server.
+    Objective: Apply sessionCreated, participantJoined, recordingStatusChanged... incrementally to a local store.
+    Params: SessionMirror (or bare SessionIndex) to update and the headers the server is configured to send
+    """
+
+    def __init__(
+        self: WebhookReceiver,
+        target: Union[SessionMirror, SessionIndex],
+        headers: Dict[str, str] = None,
+        path: str = "/",
+    ) -> None:
+        """
+        @:param target: SessionMirror, whose polling is then only a reconciliation safety net, or a SessionIndex
+        @:param headers: Headers every event must carry, as set in OPENVIDU_WEBHOOK_HEADERS (Default: None)
+        @:param path: Path the events are POSTed to when served standalone (Default: "/")
+        """
+
+        self.mirror = target if isinstance(target, SessionMirror) else None
+        self.index = target.index if isinstance(target, SessionMirror) else target
+        self.headers = {name.lower(): value for name, value in (headers or {}).items()}
+        self.path = path
+        self.received = 0
+        self.ignored = 0
+        self._handlers: Dict[str, Callable[[dict], List[MirrorEvent]]] = {
+            "sessionCreated": self._session_created,
+            "sessionDestroyed": self._session_destroyed,
+            "participantJoined": self._participant_joined,
+            "participantLeft": self._participant_left,
+            "webrtcConnectionCreated": self._webrtc_connection_created,
+            "webrtcConnectionDestroyed": self._webrtc_connection_destroyed,
+            "recordingStatusChanged": self._recording_status_changed,
+        }
+
+    def __repr__(self):
+        """."""
+
+        return "<%s received=%d ignored=%d>" % (self.__class__.__name__, self.received, self.ignored)
+
+    def handle(self: WebhookReceiver, event: Dict[str, Any]) -> List[MirrorEvent]:
+        """Apply one decoded webhook event, publish and return the changes it made, ValueError when malformed."""
+
+        self.received += 1
+        handler = self._handlers.get(event.get("event"))
+        if handler is None:
+            self.ignored += 1
+            return []
+        for keys in _REQUIRED.get(event["event"], ()):
+            if not any(isinstance(event.get(key), str) and event[key] for key in keys):
+                raise ValueError("%s event without %s" % (event["event"], " or ".join(keys)))
+        events = handler(event)
+        if self.mirror is not None and events:
+            self.mirror.publish(events)
+        return events
+
+    def authorized(self: WebhookReceiver, headers: Dict[str, str]) -> bool:
+        """Whether the request carries every configured header, names are lower case."""
+
+        return all(headers.get(name) == value for name, value in self.headers.items())
+
+    def receive(self: WebhookReceiver, method: str, path: str, headers: Dict[str, str], body: bytes) -> int:
+        """Status code answering one HTTP request of the server."""
+
+        if path != self.path:
+            return 404
+        if method != "POST":
+            return 405
+        if not self.authorized(headers):
+            return 401
+        try:
+            event = json.loads(body)
+        except ValueError:
+            return 400
+        if not isinstance(event, dict):
+            return 400
+        try:
+            self.handle(event)
+        except (KeyError, TypeError, ValueError) as error:
+            # Malformed or partial event, answered without dropping the connection of the server
+            logger.warning("Rejected an OpenVidu webhook event: %r", error)
+            return 400
+        return 200
+
+    # Event handlers
+
+    def _session_created(self: WebhookReceiver, event: dict) -> List[MirrorEvent]:
+        """."""
+
+        session_id = event["sessionId"]
+        if self.index.session(session_id) is not None:
+            return []
+        return self.index.upsert_session({"id": session_id, "object": "session", "createdAt": event.get("timestamp")})
+
+    def _session_destroyed(self: WebhookReceiver, event: dict) -> List[MirrorEvent]:
+        """."""
+
+        return self.index.remove_session(event["sessionId"])
+
+    def _participant_joined(self: WebhookReceiver, event: dict) -> List[MirrorEvent]:
+        """."""
+
+        session_id = event["sessionId"]
+        events = self._session_created(event)
+        connection_id = event.get("connectionId") or event["participantId"]
+        connection = dict(self.index.connection(connection_id) or {
+            "id": connection_id, "object": "connection", "type": "WEBRTC", "sessionId": session_id,
+            "publishers": [], "subscribers": [],
+        })
+        connection.update({
+            "status": "active",
+            "activeAt": event.get("timestamp"),
+            "location": event.get("location"),
+            "ip": event.get("ip"),
+            "platform": event.get("platform"),
+            "clientData": event.get("clientData"),
+            "serverData": event.get("serverData", connection.get("serverData")),
+        })
+        return events + self.index.upsert_connection(session_id, connection)
+
+    def _participant_left(self: WebhookReceiver, event: dict) -> List[MirrorEvent]:
+        """."""
+
+        return self.index.remove_connection(event.get("connectionId") or event["participantId"])
+
+    def _webrtc_connection_created(self: WebhookReceiver, event: dict) -> List[MirrorEvent]:
+        """A publisher when receivingFrom is empty, a subscriber of that connection otherwise."""
+
+        found = self.index.connection(event["connectionId"])
+        if found is None:
+            return []
+        connection = dict(found)
+        if event.get("receivingFrom"):
+            connection["subscribers"] = list(connection.get("subscribers") or ()) + [
+                {"streamId": event.get("streamId"), "createdAt": event.get("timestamp")}
+            ]
+        else:
+            connection["publishers"] = list(connection.get("publishers") or ()) + [{
+                "streamId": event.get("streamId"),
+                "createdAt": event.get("timestamp"),
+                "mediaOptions": {
+                    "hasAudio": event.get("audioEnabled"),
+                    "hasVideo": event.get("videoEnabled"),
+                    "typeOfVideo": event.get("videoSource"),
+                    "frameRate": event.get("videoFramerate"),
+                    "videoDimensions": event.get("videoDimensions"),
+                },
+            }]
+        return self.index.upsert_connection(self.index.session_of(connection["id"]), connection)
+
+    def _webrtc_connection_destroyed(self: WebhookReceiver, event: dict) -> List[MirrorEvent]:
+        """."""
+
+        found = self.index.connection(event["connectionId"])
+        if found is None:
+            return []
+        connection = dict(found)
+        key = "subscribers" if event.get("receivingFrom") else "publishers"
+        connection[key] = [
+            stream for stream in connection.get(key) or () if stream.get("streamId") != event.get("streamId")
+        ]
+        return self.index.upsert_connection(self.index.session_of(connection["id"]), connection)
+
+    def _recording_status_changed(self: WebhookReceiver, event: dict) -> List[MirrorEvent]:
+        """."""
+
+        recording = dict(self.index.recording(event["id"]) or {"id": event["id"], "object": "recording"})
+        recording.update({
+            key: event[key]
+            for key in (
+                "name", "outputMode", "resolution", "recordingLayout", "hasAudio", "hasVideo", "size",
+                "duration", "status", "sessionId",
+            )
+            if key in event
+        })
+        recording.setdefault("createdAt", event.get("startTime"))
+        events = self.index.upsert_recording(recording)
+
+        session = self.index.session(event["sessionId"])
+        if session is not None:
+            recording_flag = recording["status"] in ("starting", "started")
+            if session.get("recording") != recording_flag:
+                events += self.index.upsert_session(dict(session, recording=recording_flag))
+        return events
+
+    # Serving
+
+    async def __call__(self: WebhookReceiver, scope: Scope, receive: Receive, send: Send) -> None:
+        """ASGI application, mount it where OPENVIDU_WEBHOOK_ENDPOINT points to."""
+
+        if scope["type"] != "http":
+            return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        # Mounted applications see their own path, the standalone path only applies to serve()
+        status = self.receive(scope["method"], self.path, headers, body)
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-length", b"0")]})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def serve(self: WebhookReceiver, host: str = "0.0.0.0", port: int = 8000) -> asyncio.AbstractServer:
+        """Serve the events standalone over plain HTTP/1.1, close the returned server to stop."""
+
+        return await asyncio.start_server(self._connection, host, port)
+
+    async def _connection(self: WebhookReceiver, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer the requests of one keep-alive connection of the server."""
+
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status = self.receive(method, path, headers, body)
+                writer.write(b"HTTP/1.1 %d %s\r\nContent-Length: 0\r\n\r\n" % (status, _REASONS[status].encode()))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except Exception:
+            logger.exception("Handling an OpenVidu webhook request failed")
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(
+        reader: asyncio.StreamReader,
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        """Method, path, lower case headers and body of the next request, None at the end of the connection."""
+
+        line = await reader.readline()
+        if not line:
+            return None
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+        return method, target.split("?", 1)[0], headers, body
@@ -0,0 +1,42 @@
+import pytest
+
+from openviduconnect import AsyncOpenViduClient, OpenViduClient
+from openviduconnect.client.retry import CircuitBreaker, RetryPolicy
+from openviduconnect.testing import FakeOpenViduServer
+
+SECRET = "MY_SECRET"
+
+
+@pytest.fixture
+def server():
+    """."""
+
+    return FakeOpenViduServer(secret=SECRET, seed=7)
+
+
+@pytest.fixture
+def options(server):
+    """Client options over the fake server: a breaker of the test's own and retries without real backoff."""
+
+    def build(**kwargs):
+        kwargs.setdefault("transport", server)
+        kwargs.setdefault("retry", RetryPolicy(backoff=0.001, max_backoff=0.001))
+        kwargs.setdefault("circuit_breaker", CircuitBreaker())
+        return kwargs
+
+    return build
+
+
+@pytest.fixture
+def client(server, options):
+    """."""
+
+    with OpenViduClient(server.host, SECRET, **options()) as ov:
+        yield ov
+
+
+@pytest.fixture
+def async_client(server, options):
+    """Factory of async clients, to be entered inside the event loop of the test."""
+
+    return lambda **kwargs: AsyncOpenViduClient(server.host, SECRET, **options(**kwargs))
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from openviduconnect.client.limiter import AdaptiveLimiter
+from openviduconnect.client.scheduler import BACKGROUND, INTERACTIVE, NORMAL, PriorityScheduler
+from openviduconnect.testing import constant
+
+
+def test_interactive_request_passes_a_full_lower_load():
+    async def main():
+        scheduler = PriorityScheduler(total=4, reserved=1)
+        for _ in range(2):
+            await scheduler.acquire(NORMAL)
+        await scheduler.acquire(BACKGROUND)
+        background = asyncio.ensure_future(scheduler.acquire(BACKGROUND))
+        await asyncio.sleep(0)
+        assert not background.done()
+        await asyncio.wait_for(scheduler.acquire(INTERACTIVE), 0.1)
+        # The lower classes only get in while the reserved slot stays free
+        scheduler.release(NORMAL)
+        await asyncio.sleep(0)
+        assert not background.done()
+        scheduler.release(NORMAL)
+        await asyncio.wait_for(background, 0.1)
+
+    asyncio.run(main())
+
+
+def test_starved_request_is_promoted():
+    async def main():
+        scheduler = PriorityScheduler(total=1, reserved=0, max_wait=0.01)
+        await scheduler.acquire(NORMAL)
+        background = asyncio.ensure_future(scheduler.acquire(BACKGROUND))
+        await asyncio.sleep(0.02)
+        normal = asyncio.ensure_future(scheduler.acquire(NORMAL))
+        await asyncio.sleep(0)
+        scheduler.release(NORMAL)
+        await asyncio.wait_for(background, 0.1)
+        assert not normal.done() and scheduler.promoted == 1
+        scheduler.release(BACKGROUND)
+        await asyncio.wait_for(normal, 0.1)
+
+    asyncio.run(main())
+
+
+def test_scheduler_rejects_reserving_every_slot():
+    with pytest.raises(ValueError):
+        PriorityScheduler(total=4, reserved=4)
+
+
+def test_limiter_bounds_concurrency_and_backs_off():
+    async def main():
+        limiter = AdaptiveLimiter(initial_limit=2, latency_target=10.0)
+        await limiter.aacquire()
+        await limiter.aacquire()
+        third = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0)
+        assert not third.done() and limiter.queue_depth == 1
+        limiter.release(0.01, ok=False)
+        assert limiter.decreases == 1 and limiter.limit == 1
+        await asyncio.sleep(0)
+        assert not third.done()
+        limiter.release(0.01, ok=True)
+        await asyncio.wait_for(third, 0.1)
+        assert limiter.in_flight == 1
+
+    asyncio.run(main())
+
+
+def test_limiter_hands_back_a_cancelled_wait():
+    async def main():
+        limiter = AdaptiveLimiter(initial_limit=1)
+        await limiter.aacquire()
+        waiting = asyncio.ensure_future(limiter.aacquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        limiter.release()
+        assert limiter.in_flight == 0 and limiter.queue_depth == 0
+
+    asyncio.run(main())
+
+
+def test_client_with_scheduler_and_limiter(server, async_client):
+    server.latency = constant(0.005)
+
+    async def main():
+        scheduler = PriorityScheduler(total=3, reserved=1)
+        limiter = AdaptiveLimiter(initial_limit=2)
+        async with async_client(scheduler=scheduler, limiter=limiter) as aov:
+            await aov.create_session(customSessionId="a")
+            results = await aov.create_connections("a", [{}] * 10, concurrency=10)
+        assert not [result for result in results if isinstance(result, Exception)]
+        assert limiter.in_flight == 0
+        assert all(value == 0 for value in scheduler.in_flight.values())
+
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+import pytest
+
+from openviduconnect import OpenViduClient
+from openviduconnect.client.cache import MISSING, ResponseCache
+from openviduconnect.exceptions.base import Error
+
+
+@pytest.fixture
+def cached(server, options):
+    """."""
+
+    with OpenViduClient(server.host, server.secret, **options(cache=ResponseCache())) as ov:
+        yield ov
+
+
+def test_hit_is_a_copy(server, cached):
+    cached.create_session(customSessionId="a")
+    cached.get_session("a")["id"] = "changed"
+    requests = server.requests
+    assert cached.get_session("a")["id"] == "a"
+    assert server.requests == requests
+    assert cached.cache.stats["hits"] == 1
+
+
+def test_endpoints_without_ttl_are_not_counted(cached):
+    cached.create_session(customSessionId="a")
+    for _ in range(3):
+        cached.get_connections("a")
+    assert cached.cache.stats == {"hits": 0, "misses": 0, "evictions": 0, "size": 0}
+
+
+def test_writes_invalidate(cached):
+    cached.create_session(customSessionId="a")
+    assert cached.get_sessions()["numberOfElements"] == 1
+    cached.create_session(customSessionId="b")
+    assert cached.get_sessions()["numberOfElements"] == 2
+    assert cached.get_session("a")["connections"]["numberOfElements"] == 0
+    cached.create_connection("a")
+    assert cached.get_session("a")["connections"]["numberOfElements"] == 1
+
+
+def test_error_is_not_cached(server, cached):
+    cached.create_session(customSessionId="a")
+    server.error_rate = 1.0
+    with pytest.raises(Error):
+        cached.get_session("a")
+    assert cached.cache.get("get_session", "a") is MISSING
+
+
+def test_read_overlapping_an_invalidation_is_not_kept():
+    cache = ResponseCache()
+    generation = cache.generation
+    cache.invalidate("get_session", "a")
+    cache.set(b"{}", "get_session", "a", generation=generation)
+    cache.set(b"{}", "get_session", "b", generation=generation)
+    assert cache.get("get_session", "a") is MISSING
+    assert cache.get("get_session", "b") == b"{}"
+
+    generation = cache.generation
+    cache.invalidate("get_session")
+    cache.set(b"{}", "get_session", "c", generation=generation)
+    assert cache.get("get_session", "c") is MISSING
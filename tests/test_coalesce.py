@@ -0,0 +1,97 @@
+import asyncio
+
+from httpx import AsyncBaseTransport
+
+from openviduconnect.client.cache import MISSING, ResponseCache
+
+
+class Gate(AsyncBaseTransport):
+    """Holds the GETs of the fake server until opened, counting them."""
+
+    def __init__(self, server):
+        self.server = server
+        self.opened = asyncio.Event()
+        self.gets = 0
+
+    async def handle_async_request(self, request):
+        if request.method == "GET":
+            self.gets += 1
+            await self.opened.wait()
+        return await self.server.handle_async_request(request)
+
+
+def test_identical_reads_share_one_request(server, async_client):
+    async def main():
+        gate = Gate(server)
+        async with async_client(transport=gate) as aov:
+            await aov.create_session(customSessionId="a")
+            reads = [asyncio.ensure_future(aov.get_session("a")) for _ in range(5)]
+            await asyncio.sleep(0.01)
+            gate.opened.set()
+            sessions = await asyncio.gather(*reads)
+        assert gate.gets == 1
+        assert all(session == sessions[0] for session in sessions)
+        # Every caller gets an object of its own
+        assert len({id(session) for session in sessions}) == 5
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_keeps_the_fetch_of_the_others(server, async_client):
+    async def main():
+        gate = Gate(server)
+        async with async_client(transport=gate) as aov:
+            await aov.create_session(customSessionId="a")
+            first = asyncio.ensure_future(aov.get_session("a"))
+            second = asyncio.ensure_future(aov.get_session("a"))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            await asyncio.sleep(0.01)
+            gate.opened.set()
+            assert (await second)["id"] == "a"
+            assert first.cancelled()
+        assert gate.gets == 1
+
+    asyncio.run(main())
+
+
+def test_fetch_is_cancelled_with_its_last_caller(server, async_client):
+    async def main():
+        gate = Gate(server)
+        async with async_client(transport=gate) as aov:
+            await aov.create_session(customSessionId="a")
+            reads = [asyncio.ensure_future(aov.get_session("a")) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            for read in reads:
+                read.cancel()
+            await asyncio.sleep(0.01)
+            assert not aov._in_flight
+            gate.opened.set()
+            assert (await aov.get_session("a"))["id"] == "a"
+        assert gate.gets == 2
+
+    asyncio.run(main())
+
+
+def test_write_drops_only_the_reads_it_made_stale(server, async_client):
+    async def main():
+        gate = Gate(server)
+        async with async_client(transport=gate, cache=ResponseCache()) as aov:
+            await aov.create_session(customSessionId="a")
+            await aov.create_session(customSessionId="b")
+            stale = asyncio.ensure_future(aov.get_session("a"))
+            kept = asyncio.ensure_future(aov.get_session("b"))
+            await asyncio.sleep(0.01)
+            await aov.create_connection("a")
+            later = [asyncio.ensure_future(aov.get_session(session_id)) for session_id in ("a", "b")]
+            await asyncio.sleep(0.01)
+            gate.opened.set()
+            await asyncio.gather(stale, kept, *later)
+
+            # The read of "a" issued after the write went to the server again, the one of "b" joined the first
+            assert gate.gets == 3
+            assert len(later[0].result()["connections"]["content"]) == 1
+            # The read of "a" that overlapped the write is not cached, the one of "b" is
+            assert aov.cache.get("get_session", "b") is not MISSING
+
+    asyncio.run(main())
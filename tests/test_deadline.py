@@ -0,0 +1,80 @@
+import asyncio
+from time import monotonic
+
+import pytest
+from httpx import AsyncBaseTransport
+
+from openviduconnect import OpenViduClient
+from openviduconnect.client.deadline import deadline, remaining
+from openviduconnect.exceptions import DeadlineExceededError
+from openviduconnect.testing import constant
+
+
+class HangsOnce(AsyncBaseTransport):
+    """Never answers the first request, passes the others to the fake server."""
+
+    def __init__(self, server):
+        self.server = server
+        self.requests = 0
+
+    async def handle_async_request(self, request):
+        self.requests += 1
+        if self.requests == 1:
+            await asyncio.Event().wait()
+        return await self.server.handle_async_request(request)
+
+
+def test_nested_deadline_only_shortens():
+    with deadline(10.0):
+        with deadline(20.0):
+            assert remaining() <= 10.0
+        with deadline(0.5):
+            assert remaining() <= 0.5
+        with deadline(None):
+            assert 0.5 < remaining() <= 10.0
+    assert remaining() is None
+
+
+def test_sync_call_past_its_deadline(server, options):
+    server.latency = constant(0.2)
+    with OpenViduClient(server.host, server.secret, **options(deadline=0.05)) as ov:
+        started = monotonic()
+        with pytest.raises(DeadlineExceededError):
+            ov.get_sessions()
+        assert monotonic() - started < 0.2
+
+
+def test_deadline_covers_retries(server, options):
+    server.error_rate = 1.0
+    server.latency = constant(0.03)
+    with OpenViduClient(server.host, server.secret, **options(deadline=0.05)) as ov:
+        with pytest.raises(DeadlineExceededError):
+            ov.get_sessions()
+    assert server.requests < ov.retry.attempts
+
+
+def test_async_call_past_its_deadline(server, async_client):
+    server.latency = constant(0.2)
+
+    async def main():
+        async with async_client() as aov:
+            with pytest.raises(DeadlineExceededError):
+                await aov.get_sessions(deadline=0.05)
+            with deadline(0.05):
+                with pytest.raises(DeadlineExceededError):
+                    await aov.create_session()
+
+    asyncio.run(main())
+
+
+def test_hung_read_does_not_hold_later_ones(server, async_client):
+    async def main():
+        transport = HangsOnce(server)
+        async with async_client(transport=transport) as aov:
+            with pytest.raises(DeadlineExceededError):
+                await aov.get_sessions(deadline=0.05)
+            assert (await aov.get_sessions(deadline=1.0))["numberOfElements"] == 0
+            assert not aov._in_flight
+        assert transport.requests == 2
+
+    asyncio.run(main())
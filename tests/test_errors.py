@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from openviduconnect import AsyncOpenViduClient, OpenViduClient
+from openviduconnect.exceptions import SessionNotFoundError
+from openviduconnect.exceptions.base import Error
+from openviduconnect.models import Session
+
+
+def test_wrong_secret_raises(server, options):
+    with OpenViduClient(server.host, "WRONG", **options()) as ov:
+        with pytest.raises(Error, match="answered 401"):
+            ov.create_connection("ses_1")
+        with pytest.raises(Error, match="answered 401"):
+            ov.get_sessions()
+
+
+def test_wrong_secret_raises_with_models(server, options):
+    with OpenViduClient(server.host, "WRONG", **options(models=True)) as ov:
+        with pytest.raises(Error, match="answered 401"):
+            ov.get_session("ses_1")
+
+
+def test_empty_error_body_raises(server, client):
+    server.error_rate = 1.0
+    with pytest.raises(Error, match="answered 503"):
+        client.get_sessions()
+    with pytest.raises(Error, match="answered 503"):
+        client.create_session()
+
+
+def test_json_error_body_is_not_a_result(server, client):
+    server.error_status = 500
+    server.error_rate = 1.0
+    with pytest.raises(Error, match="answered 500"):
+        client.get_recordings()
+
+
+def test_typed_error(client):
+    with pytest.raises(SessionNotFoundError):
+        client.get_session("missing")
+
+
+def test_no_content_is_none(client):
+    client.create_session(customSessionId="a")
+    assert client.delete_session("a") is None
+
+
+def test_models(server, options):
+    with OpenViduClient(server.host, server.secret, **options(models=True)) as ov:
+        session = ov.create_session(customSessionId="a")
+        assert isinstance(session, Session)
+        assert [item.id for item in ov.get_sessions()] == ["a"]
+
+
+def test_iteration_raises(server, options):
+    with OpenViduClient(server.host, "WRONG", **options()) as ov:
+        with pytest.raises(Error, match="answered 401"):
+            list(ov.iter_sessions())
+
+
+def test_async_wrong_secret_raises(server, options):
+    async def main():
+        async with AsyncOpenViduClient(server.host, "WRONG", **options()) as aov:
+            with pytest.raises(Error, match="answered 401"):
+                await aov.create_connection("ses_1")
+            with pytest.raises(Error, match="answered 401"):
+                async for _ in aov.iter_sessions():
+                    pass
+
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+from httpx import ConnectError
+
+from openviduconnect.client.retry import RetryPolicy
+from openviduconnect.pool import SessionPool, TokenPool
+
+
+@pytest.fixture
+def single_attempt(async_client):
+    """Async clients failing on the first transport error, so that faults reach the pools."""
+
+    return lambda **kwargs: async_client(retry=RetryPolicy(attempts=1), **kwargs)
+
+
+def test_token_pool_fills_and_hands_out(server, async_client):
+    async def main():
+        async with async_client() as aov:
+            await aov.create_session(customSessionId="a")
+            async with TokenPool(aov, low=0, high=3, interval=60.0) as pool:
+                pool.add("a")
+                await pool.refill()
+                assert pool.available("a") == 3
+                connection = await pool.acquire("a")
+                assert connection["token"] and pool.hits == 1
+            # Only the acquired connection is left on the server
+            assert list(server.sessions["a"]["connections"]) == [connection["id"]]
+
+    asyncio.run(main())
+
+
+def test_token_pool_keeps_failed_revocations(server, single_attempt):
+    async def main():
+        async with single_attempt() as aov:
+            await aov.create_session(customSessionId="a")
+            pool = TokenPool(aov, low=2, high=2)
+            pool.add("a")
+            await pool.refill()
+
+            server.connect_error_rate = 1.0
+            await pool.discard("a")
+            assert pool.revoked == 0 and pool.unrevoked == 2
+            assert len(server.sessions["a"]["connections"]) == 2
+
+            server.connect_error_rate = 0.0
+            aov.circuit_breaker.success()
+            await pool.stop()
+            assert pool.revoked == 2 and pool.unrevoked == 0
+            assert not server.sessions["a"]["connections"]
+
+    asyncio.run(main())
+
+
+def test_session_pool_release_failure_keeps_the_binding(server, single_attempt):
+    async def main():
+        async with single_attempt() as aov:
+            pool = SessionPool(aov, size=1, interval=60.0)
+            await pool.start()
+            session = await pool.acquire("meeting")
+
+            server.connect_error_rate = 1.0
+            with pytest.raises(ConnectError):
+                await pool.release("meeting")
+            assert pool.bound["meeting"] is session
+
+            server.connect_error_rate = 0.0
+            aov.circuit_breaker.success()
+            await pool.release("meeting")
+            assert "meeting" not in pool.bound and session["id"] not in server.sessions
+            await pool.stop()
+            assert not server.sessions
+
+    asyncio.run(main())
+
+
+def test_session_pool_keeps_failed_collections(server, single_attempt):
+    async def main():
+        async with single_attempt() as aov:
+            pool = SessionPool(aov, size=2, interval=60.0)
+            await pool.start()
+
+            server.connect_error_rate = 1.0
+            await asyncio.wait_for(pool.stop(), 1.0)
+            assert pool.collected == 0 and len(server.sessions) == 2
+
+            server.connect_error_rate = 0.0
+            aov.circuit_breaker.success()
+            await pool.stop()
+            assert pool.collected == 2 and not server.sessions
+
+    asyncio.run(main())
+
+
+def test_session_pool_get_or_create_race(server, async_client):
+    async def main():
+        async with async_client() as aov:
+            await aov.create_session(customSessionId="shared")
+            pool = SessionPool(aov, size=0)
+            sessions = await asyncio.gather(*(pool.get_or_create("shared") for _ in range(3)))
+            assert {session["id"] for session in sessions} == {"shared"}
+            assert pool.bound["shared"] is sessions[0]
+
+    asyncio.run(main())
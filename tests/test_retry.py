@@ -0,0 +1,94 @@
+from time import sleep
+
+import pytest
+from httpx import AsyncBaseTransport, BaseTransport, ConnectError, Response
+
+from openviduconnect import OpenViduClient
+from openviduconnect.client.retry import CircuitBreaker, RetryPolicy
+from openviduconnect.exceptions import CircuitOpenError, SessionExistsError
+from openviduconnect.exceptions.base import Error
+
+
+class FirstPostFails(BaseTransport, AsyncBaseTransport):
+    """Lets the first POST reach the server, then answers it with a 503 as a failing proxy would."""
+
+    def __init__(self, server):
+        self.server = server
+        self.failed = False
+
+    def handle_request(self, request):
+        response = self.server.handle_request(request)
+        if request.method == "POST" and not self.failed:
+            self.failed = True
+            return Response(503)
+        return response
+
+    async def handle_async_request(self, request):
+        return self.handle_request(request)
+
+
+def test_retries_exhausted(server, client):
+    server.error_rate = 1.0
+    with pytest.raises(Error, match="answered 503"):
+        client.get_sessions()
+    assert server.requests == client.retry.attempts
+
+
+def test_unsafe_post_is_not_retried(server, client):
+    server.error_rate = 1.0
+    with pytest.raises(Error):
+        client.create_session()
+    assert server.requests == 1
+
+
+def test_unsent_post_is_retried(server, client):
+    server.connect_error_rate = 1.0
+    with pytest.raises(ConnectError):
+        client.create_session()
+    assert server.requests == client.retry.attempts
+
+
+def test_retried_create_session_gets_its_session(server, options):
+    with OpenViduClient(server.host, server.secret, **options(transport=FirstPostFails(server))) as ov:
+        session = ov.create_session(customSessionId="a")
+        assert session["id"] == "a"
+        assert ov.get_sessions()["numberOfElements"] == 1
+        with pytest.raises(SessionExistsError):
+            ov.create_session(customSessionId="a")
+
+
+def test_breaker_opens(server, options):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60.0)
+    server.error_rate = 1.0
+    with OpenViduClient(server.host, server.secret, **options(circuit_breaker=breaker)) as ov:
+        with pytest.raises(Error):
+            ov.get_sessions()
+        assert breaker.state == breaker.OPEN
+        requests = server.requests
+        with pytest.raises(CircuitOpenError):
+            ov.get_sessions()
+        assert server.requests == requests
+
+
+def test_breaker_half_open_probe(server, options):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+    policy = RetryPolicy(attempts=1)
+    server.error_rate = 1.0
+    with OpenViduClient(server.host, server.secret, **options(circuit_breaker=breaker, retry=policy)) as ov:
+        with pytest.raises(Error):
+            ov.get_sessions()
+        assert breaker.state == breaker.OPEN
+
+        # A failed probe opens the circuit again
+        sleep(0.06)
+        with pytest.raises(Error):
+            ov.get_sessions()
+        assert breaker.state == breaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            ov.get_sessions()
+
+        # A healthy probe closes it
+        sleep(0.06)
+        server.error_rate = 0.0
+        assert ov.get_sessions()["numberOfElements"] == 0
+        assert breaker.state == breaker.CLOSED